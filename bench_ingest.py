@@ -0,0 +1,252 @@
+"""
+Ingest benchmark: drive process_webhook_data + _flush_roster in-process with a
+synthetic Companion export (synthetic_export.py) and record, per stage:
+wall time, peak RSS and files/bytes written under uploads/.
+
+    python bench_ingest.py                                  # week 1, 32 x 53 + 200 FA
+    python bench_ingest.py --weeks 3 --json bench/ingest_main.json
+    python bench_ingest.py --json bench/ingest_new.json --compare bench/ingest_main.json
+
+Runs in a throwaway working directory (so uploads/ is empty at the start)
+with the roster debounce disabled: the roster flush is its own stage. Every
+stage of every week is reported; "stages" in the JSON sums them over weeks.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+# before any service module reads it: the bench flushes rosters explicitly
+os.environ["ROSTER_DEBOUNCE_SEC"] = "86400"
+os.environ["ROSTER_FLUSH_ON_COMPLETE"] = "0"
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except Exception:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class RssSampler:
+    """Peak RSS while a stage runs (sampled every few ms)."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._t = None
+
+    def __enter__(self):
+        self.peak = rss_bytes()
+        self._t = threading.Thread(target=self._run, daemon=True)
+        self._t.start()
+        return self
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, rss_bytes())
+            self._stop.wait(self.interval)
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._t.join()
+        self.peak = max(self.peak, rss_bytes())
+
+
+def snapshot(root: str) -> dict:
+    out = {}
+    for d, _, files in os.walk(root):
+        for fn in files:
+            p = os.path.join(d, fn)
+            try:
+                st = os.stat(p)
+            except OSError:
+                continue
+            out[p] = (st.st_mtime_ns, st.st_size, st.st_ino)
+    return out
+
+
+def written_between(before: dict, after: dict) -> tuple[int, int]:
+    """Files touched and bytes written; a file that only grew in place (WAL, capture log) counts its growth."""
+    files = bytes_ = 0
+    for p, (mt, size, ino) in after.items():
+        old = before.get(p)
+        if old == (mt, size, ino):
+            continue
+        files += 1
+        if old and old[2] == ino and size >= old[1]:
+            bytes_ += size - old[1]
+        else:
+            bytes_ += size
+    return files, bytes_
+
+
+def git_rev() -> str | None:
+    try:
+        return subprocess.run(["git", "-C", HERE, "rev-parse", "--short", "HEAD"],
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def run(weeks: int, seed: int, quiet: bool) -> dict:
+    from flask import Flask
+
+    from synthetic_export import export, LEAGUE_ID, TEAMS, PER_TEAM, FREE_AGENTS
+    from services.webhook_service import process_webhook_data
+    from services.webhook_helpers import _flush_roster
+    from services.capture_log import flush_capture
+
+    app = Flask("bench_ingest")
+    app.config["UPLOAD_FOLDER"] = "uploads"
+    os.makedirs("uploads", exist_ok=True)
+    league_data = {}
+
+    runs = []
+
+    devnull = open(os.devnull, "w")
+
+    def stage(name: str, week: int, fn):
+        before = snapshot("uploads")
+        with RssSampler() as s, redirect_stdout(devnull if quiet else sys.stdout):
+            st = time.perf_counter()
+            fn()
+            wall = time.perf_counter() - st
+        flush_capture()
+        files, bytes_ = written_between(before, snapshot("uploads"))
+        row = {
+            "stage": name, "week": week, "wall_sec": round(wall, 4),
+            "peak_rss_mb": round(s.peak / 1e6, 2), "files_written": files, "bytes_written": bytes_,
+        }
+        runs.append(row)
+        print(f"  {name:<16} week {week}  {wall * 1000:9.1f} ms  peak RSS {row['peak_rss_mb']:8.1f} MB  "
+              f"files {files:4d}  {bytes_ / 1e6:7.2f} MB")
+
+    def send(items):
+        def go():
+            for subpath, payload in items:
+                body = json.dumps(payload).encode("utf-8")
+                process_webhook_data(payload, subpath, {"Content-Type": "application/json"}, body, app, league_data)
+        return go
+
+    def flush_rosters():
+        dest = os.path.join("uploads", LEAGUE_ID, "season_global", "week_global")
+        _flush_roster(LEAGUE_ID, dest, "uploads")
+
+    for week in range(1, weeks + 1):
+        items = export(week, seed)
+        by_kind = {}
+        for subpath, payload in items:
+            kind = subpath.rsplit("/", 1)[-1]
+            if kind == "roster":
+                kind = "roster_chunks"
+            by_kind.setdefault(kind, []).append((subpath, payload))
+
+        print(f"🏈 Week {week}: {len(items)} payloads")
+        for kind, group in by_kind.items():
+            stage(kind, week, send(group))
+        stage("roster_flush", week, flush_rosters)
+    devnull.close()
+
+    stages = {}
+    for r in runs:
+        agg = stages.setdefault(r["stage"], {"wall_sec": 0.0, "peak_rss_mb": 0.0, "files_written": 0, "bytes_written": 0})
+        agg["wall_sec"] = round(agg["wall_sec"] + r["wall_sec"], 4)
+        agg["peak_rss_mb"] = max(agg["peak_rss_mb"], r["peak_rss_mb"])
+        agg["files_written"] += r["files_written"]
+        agg["bytes_written"] += r["bytes_written"]
+
+    return {
+        "meta": {
+            "git_rev": git_rev(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "weeks": weeks,
+            "seed": seed,
+            "teams": TEAMS, "per_team": PER_TEAM, "free_agents": FREE_AGENTS,
+            "shared_state": os.getenv("SHARED_STATE_BACKEND", "sqlite"),
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "total": {
+            "wall_sec": round(sum(r["wall_sec"] for r in runs), 4),
+            "peak_rss_mb": max((r["peak_rss_mb"] for r in runs), default=0.0),
+            "files_written": sum(r["files_written"] for r in runs),
+            "bytes_written": sum(r["bytes_written"] for r in runs),
+        },
+        "stages": stages,
+        "runs": runs,
+    }
+
+
+def compare(new: dict, old_path: str):
+    with open(old_path, "r", encoding="utf-8") as f:
+        old = json.load(f)
+    print(f"\n📊 vs {old_path} (rev {old.get('meta', {}).get('git_rev')})")
+    print(f"{'stage':<16}{'old ms':>10}{'new ms':>10}{'Δ%':>8}{'old MB':>9}{'new MB':>9}{'old files':>10}{'new files':>10}")
+    names = list(new["stages"]) + [n for n in old.get("stages", {}) if n not in new["stages"]]
+    for name in names + ["total"]:
+        a = old["total"] if name == "total" else old.get("stages", {}).get(name)
+        b = new["total"] if name == "total" else new["stages"].get(name)
+        if not a or not b:
+            print(f"{name:<16}  (only in {'new' if b else 'old'})")
+            continue
+        d = 100 * (b["wall_sec"] - a["wall_sec"]) / a["wall_sec"] if a["wall_sec"] else 0.0
+        print(f"{name:<16}{a['wall_sec'] * 1000:>10.1f}{b['wall_sec'] * 1000:>10.1f}{d:>+8.1f}"
+              f"{a['peak_rss_mb']:>9.1f}{b['peak_rss_mb']:>9.1f}{a['files_written']:>10}{b['files_written']:>10}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--weeks", type=int, default=1, help="export weeks 1..N back to back")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--json", help="write results to this JSON file")
+    ap.add_argument("--compare", help="earlier results JSON to diff against")
+    ap.add_argument("--keep", action="store_true", help="keep the scratch directory")
+    ap.add_argument("--verbose", action="store_true", help="show the app's own ingest logging")
+    args = ap.parse_args()
+
+    json_path = os.path.abspath(args.json) if args.json else None
+    compare_path = os.path.abspath(args.compare) if args.compare else None
+
+    work = tempfile.mkdtemp(prefix="bench_ingest_")
+    cwd = os.getcwd()
+    os.chdir(work)
+    try:
+        results = run(args.weeks, args.seed, quiet=not args.verbose)
+    finally:
+        os.chdir(cwd)
+        if args.keep:
+            print(f"📁 Scratch kept at {work}")
+        else:
+            shutil.rmtree(work, ignore_errors=True)
+
+    t = results["total"]
+    print(f"\n⏱️ Total {t['wall_sec']:.3f}s, peak RSS {t['peak_rss_mb']} MB, "
+          f"{t['files_written']} files / {t['bytes_written'] / 1e6:.2f} MB written")
+
+    if json_path:
+        os.makedirs(os.path.dirname(json_path), exist_ok=True)
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results written to {json_path}")
+    if compare_path:
+        compare(results, compare_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Page latency while an export is ingested: parse pool on vs off.
+
+    python bench_parse_pool.py                        # 2 pool workers, 4 reader threads
+    python bench_parse_pool.py --workers 4 --readers 8 --json bench/parse_pool.json
+
+Each mode runs in a fresh interpreter in a scratch directory. Week 1 of the
+synthetic export (synthetic_export.py) is ingested first so every page has
+data; then reader threads request a fixed page mix through the Flask test
+client while week 2 is posted to /webhook, until the ingest queue has drained
+and the roster flush has run. Reported per mode: export wall time and page
+latency p50 / p95 / p99 / max during the export (page cache included, as in
+production: every ingest write invalidates it).
+
+    off   PARSE_POOL_WORKERS=0: parse, roster merge and summaries on the ingest threads
+    on    PARSE_POOL_WORKERS=N: the same steps in pool processes
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MODES = ("off", "on")
+
+
+def child(mode: str, workers: int, readers: int):
+    os.environ["PARSE_POOL_WORKERS"] = str(workers if mode == "on" else 0)
+    os.environ["ROSTER_DEBOUNCE_SEC"] = "0.5"
+    os.environ["ROSTER_FLUSH_ON_COMPLETE"] = "0"
+    sys.path.insert(0, HERE)
+
+    from replay_webhooks import percentile
+    from synthetic_export import LEAGUE_ID, export
+
+    devnull = open(os.devnull, "w")
+    with redirect_stdout(devnull):
+        import madden_flask_app as m
+        from services.parse_pool import shutdown_parse_pool
+        client = m.app.test_client()
+
+    def post_export(week: int):
+        for subpath, payload in export(week):
+            client.post(f"/webhook/{subpath}", data=json.dumps(payload), content_type="application/json")
+
+    def settle():
+        while True:
+            s = m.ingest_status()
+            js = m.job_queue_status()
+            if s["depth"] == 0 and not s["active"] and not m.scheduler_status()["pending"] \
+                    and not js["pending"] and not js["running"]:
+                return
+            time.sleep(0.01)
+
+    with redirect_stdout(devnull):
+        post_export(1)
+        settle()
+
+    q = f"league={LEAGUE_ID}&season=season_0&week=week_2"
+    pages = [
+        f"/rosters?league={LEAGUE_ID}",
+        f"/rosters?league={LEAGUE_ID}&pos=QB&page=2",
+        f"/stats?{q}",
+        f"/rushing?{q}",
+        f"/defense?{q}",
+        f"/standings?league={LEAGUE_ID}",
+    ]
+    latencies = []
+    stop = threading.Event()
+
+    def reader(n: int):
+        c = m.app.test_client()
+        i = n
+        while not stop.is_set():
+            st = time.perf_counter()
+            c.get(pages[i % len(pages)])
+            latencies.append(time.perf_counter() - st)
+            i += 1
+
+    with redirect_stdout(devnull):
+        threads = [threading.Thread(target=reader, args=(n,), daemon=True) for n in range(readers)]
+        st = time.perf_counter()
+        for t in threads:
+            t.start()
+        post_export(2)
+        settle()
+        wall = time.perf_counter() - st
+        stop.set()
+        for t in threads:
+            t.join()
+
+    ms = [v * 1000 for v in latencies]
+    print(json.dumps({
+        "mode": mode,
+        "workers": workers if mode == "on" else 0,
+        "readers": readers,
+        "export_sec": round(wall, 3),
+        "requests": len(ms),
+        "p50_ms": round(percentile(ms, 50), 2),
+        "p95_ms": round(percentile(ms, 95), 2),
+        "p99_ms": round(percentile(ms, 99), 2),
+        "max_ms": round(max(ms), 2),
+        "pool": m.parse_pool_status()["tasks"],
+    }))
+    sys.stdout.flush()
+    shutdown_parse_pool()   # os._exit skips atexit; pool processes would keep stdout open
+    os._exit(0)
+
+
+def run_mode(mode: str, workers: int, readers: int) -> dict:
+    work = tempfile.mkdtemp(prefix=f"bench_parse_pool_{mode}_")
+    try:
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", mode,
+             "--workers", str(workers), "--readers", str(readers)],
+            cwd=work, capture_output=True, text=True, check=True,
+        ).stdout
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+    return json.loads([ln for ln in out.splitlines() if ln.startswith("{")][-1])
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--workers", type=int, default=2, help="PARSE_POOL_WORKERS for the 'on' run")
+    ap.add_argument("--readers", type=int, default=4, help="page request threads")
+    ap.add_argument("--json", help="also write the results to this JSON file")
+    ap.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        child(args.child, args.workers, args.readers)
+        return
+
+    results = [run_mode(mode, args.workers, args.readers) for mode in MODES]
+    print(f"🏈 week 2 export, {args.readers} reader threads, cpus={os.cpu_count()}")
+    print(f"{'mode':<6}{'workers':>8}{'export s':>10}{'requests':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for r in results:
+        print(f"{r['mode']:<6}{r['workers']:>8}{r['export_sec']:>10.2f}{r['requests']:>10}"
+              f"{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}{r['max_ms']:>9.1f}")
+
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
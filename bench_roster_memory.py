@@ -0,0 +1,93 @@
+"""
+Memory benchmark: old dict roster layout vs compact RosterPlayer records.
+
+    python bench_roster_memory.py                      # synthetic 32 teams x 53 + 200 FA
+    python bench_roster_memory.py --roster uploads/<league>/season_global/week_global/rosters.json
+
+Old layout = one normalized dict per player holding the Companion payload under
+"_raw" (+ a dict(p) copy per player for the cached /rosters sections).
+New layout = RosterPlayer records (raw payload not retained) + p.copy() records.
+"""
+import argparse
+import gc
+import json
+import os
+import tracemalloc
+
+from services.roster_records import RosterPlayer, RawRosterSource, normalize_player
+from synthetic_export import TEAMS, PER_TEAM, FREE_AGENTS, synthetic_league
+
+
+def load_roster_file(path: str) -> list[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    if isinstance(raw, dict):
+        return raw.get("rosterInfoList") or raw.get("players") or raw.get("items") or []
+    return raw if isinstance(raw, list) else []
+
+
+def measure(build) -> tuple[int, object]:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    obj = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, obj
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--roster", help="rosters.json / parsed_rosters.json to use instead of synthetic data")
+    ap.add_argument("--json", help="also write the results to this JSON file")
+    args = ap.parse_args()
+
+    source_path = args.roster
+
+    def raw_players():
+        return load_roster_file(source_path) if source_path else synthetic_league()
+
+    # old: normalized dicts keep the whole raw payload alive through "_raw"
+    def old_layout():
+        players = [normalize_player(p) for p in raw_players()]
+        ui = [dict(p) for p in players]
+        return players, ui
+
+    # new: compact records; raw payloads are garbage once the list is built
+    def new_layout():
+        src = RawRosterSource(source_path or "<synthetic>", 0.0)
+        players = [RosterPlayer(normalize_player(p), p, src, i) for i, p in enumerate(raw_players())]
+        ui = [p.copy() for p in players]
+        return players, ui
+
+    old_bytes, old = measure(old_layout)
+    n = len(old[0])
+    del old
+    new_bytes, new = measure(new_layout)
+    del new
+
+    results = {
+        "players": n,
+        "source": source_path or f"synthetic {TEAMS}x{PER_TEAM} + {FREE_AGENTS} FA",
+        "old_bytes": old_bytes,
+        "new_bytes": new_bytes,
+        "old_bytes_per_player": round(old_bytes / n) if n else 0,
+        "new_bytes_per_player": round(new_bytes / n) if n else 0,
+        "reduction_pct": round(100 * (1 - new_bytes / old_bytes), 1) if old_bytes else 0.0,
+    }
+
+    print(f"📦 Roster memory ({results['source']}, players={n})")
+    print(f"   old dict layout : {old_bytes / 1e6:8.2f} MB  ({results['old_bytes_per_player']} B/player)")
+    print(f"   compact records : {new_bytes / 1e6:8.2f} MB  ({results['new_bytes_per_player']} B/player)")
+    print(f"   reduction       : {results['reduction_pct']}%")
+
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Peak memory of one large roster post: streamed vs buffered ingest.
+
+    python bench_roster_stream.py                          # 3,000-player free agent pool
+    python bench_roster_stream.py --players 5000 --json bench/roster_stream.json
+
+Each mode runs in a fresh interpreter in a scratch directory and posts the
+same synthetic payload (synthetic_export.py) to /webhook/.../freeagents/roster
+through the Flask test client, then waits for the ingest queue to drain.
+Reported per mode: Python heap peak above the pre-request baseline
+(tracemalloc) and process peak RSS growth over the same window. The roster
+debounce is disabled, so the numbers cover the request + ingest job only.
+
+    stream    ROSTER_STREAMING=1: body → spool file, players decoded one by one
+    buffered  ROSTER_STREAMING=0: get_json() + request.data + process_webhook_data
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MODES = ("stream", "buffered")
+
+
+def child(mode: str, players: int):
+    os.environ["ROSTER_STREAMING"] = "1" if mode == "stream" else "0"
+    os.environ["ROSTER_DEBOUNCE_SEC"] = "86400"
+    os.environ["ROSTER_FLUSH_ON_COMPLETE"] = "0"
+    sys.path.insert(0, HERE)
+
+    import gc
+    import tracemalloc
+    from bench_ingest import RssSampler, rss_bytes
+    from synthetic_export import LEAGUE_ID, PLATFORM, TEAMS, roster_players
+
+    devnull = open(os.devnull, "w")
+    with redirect_stdout(devnull):
+        import madden_flask_app as m
+        client = m.app.test_client()
+        client.get("/api/health/ingest")
+
+    subpath = f"{PLATFORM}/{LEAGUE_ID}/freeagents/roster"
+    body = json.dumps({"success": True, "rosterInfoList": roster_players(TEAMS, players, 0, TEAMS)}).encode("utf-8")
+
+    gc.collect()
+    tracemalloc.start()
+    base_heap = tracemalloc.get_traced_memory()[0]
+    base_rss = rss_bytes()
+    st = time.perf_counter()
+    with RssSampler() as rss, redirect_stdout(devnull):
+        r = client.post(f"/webhook/{subpath}", data=body, content_type="application/json")
+        while True:
+            s = m.ingest_status()
+            if s["depth"] == 0 and not s["active"]:
+                break
+            time.sleep(0.005)
+    wall = time.perf_counter() - st
+    heap_peak = tracemalloc.get_traced_memory()[1] - base_heap
+    tracemalloc.stop()
+
+    pending = m.get_shared_state().map_len(f"roster:{LEAGUE_ID}")
+    print(json.dumps({
+        "mode": mode,
+        "status": r.status_code,
+        "players": players,
+        "body_mb": round(len(body) / 1e6, 2),
+        "accumulated": pending,
+        "wall_sec": round(wall, 3),
+        "heap_peak_mb": round(heap_peak / 1e6, 2),
+        "rss_growth_mb": round(max(0, rss.peak - base_rss) / 1e6, 2),
+    }))
+    sys.stdout.flush()
+    os._exit(0)   # skip the shutdown roster flush: not part of the measurement
+
+
+def run_mode(mode: str, players: int) -> dict:
+    work = tempfile.mkdtemp(prefix=f"bench_roster_stream_{mode}_")
+    try:
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", mode, "--players", str(players)],
+            cwd=work, capture_output=True, text=True, check=True,
+        ).stdout
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+    return json.loads([ln for ln in out.splitlines() if ln.startswith("{")][-1])
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--players", type=int, default=3000, help="players in the roster payload")
+    ap.add_argument("--json", help="also write the results to this JSON file")
+    ap.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        child(args.child, args.players)
+        return
+
+    results = [run_mode(mode, args.players) for mode in MODES]
+    print(f"🏈 {args.players} players, {results[0]['body_mb']} MB body")
+    print(f"{'mode':<10}{'status':>8}{'stored':>8}{'wall ms':>10}{'heap peak MB':>14}{'RSS growth MB':>15}")
+    for r in results:
+        print(f"{r['mode']:<10}{r['status']:>8}{r['accumulated']:>8}{r['wall_sec'] * 1000:>10.1f}"
+              f"{r['heap_peak_mb']:>14.2f}{r['rss_growth_mb']:>15.2f}")
+
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
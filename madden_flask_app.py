@@ -1,21 +1,24 @@
-from flask import Flask, request, jsonify, url_for, redirect, make_response
+from flask import Flask, request, jsonify, url_for, redirect, make_response, Response
 from flask import send_from_directory
 
-from datetime import datetime
+from datetime import datetime, timezone
+from functools import wraps
 import os
 import json
 import hmac
 import requests
-from threading import Timer
 from hashlib import sha256
-from threading import Lock
-from time import time
+from time import time, time_ns
 import re
 
 from config import UPLOAD_FOLDER
 
 import services.webhook_helpers as webhook_helpers
-from services.power_rankings import build_power_rankings
+from services.power_rankings import (
+    rebuild_power_rankings,
+    get_power_rankings,
+    POWER_RANKINGS_DEBOUNCE_SEC,
+)
 
 from parsers.schedule_parser import parse_schedule_data
 from parsers.rosters_parser import parse_rosters_data, rebuild_parsed_rosters
@@ -31,6 +34,7 @@ from flask import render_template
 from urllib.parse import urlparse, parse_qs
 
 from collections import Counter, defaultdict
+from collections.abc import Mapping
 
 from pathlib import Path
 
@@ -48,7 +52,42 @@ import tempfile
 from dotenv import load_dotenv
 load_dotenv(dotenv_path=Path(__file__).with_name(".env"), override=True)
 
-from services.webhook_service import process_webhook_data
+from services.webhook_service import process_webhook_data, process_roster_stream
+from services.shared_state import get_shared_state, SharedLeagueData
+from services.stats_store import load_week_rows
+from services.season_totals import load_season_totals, season_leaderboard, sort_fields, SUM_FIELDS
+from services.generation import (
+    GLOBAL,
+    generation_key,
+    bump_generation,
+    generation_validators,
+)
+from services.webhook_helpers import ingest_league_key, webhook_category, note_roster_arrival, roster_coverage
+from services.webhook_helpers import find_league_in_subpath as league_in_subpath, is_team_id
+from services.page_cache import page_cache_get, page_cache_put, page_cache_status
+from services.roster_records import RosterPlayer, RawRosterSource, load_roster_records
+from services.parse_pool import run_in_pool, parse_pool_status
+from services.request_body import read_decoded, decoded_stream, decoded_headers, UnsupportedEncoding, BodyTooLarge
+from services.player_identity import get_identity_index, identity_index_status
+from services.capture_log import tail_capture, capture_status, capture_webhook, capture_webhook_file
+from services.metrics import span, render_prometheus, count_webhook_duplicate
+from services.scheduler import schedule, scheduler_status
+from services.league_locks import league_lock, league_lock_status
+from services.job_queue import (
+    register_job, on_event, emit, recover_jobs, list_jobs, retry_job, discard_job, job_queue_status,
+)
+from services.build_graph import rebuild_stale, build_graph_status, DERIVED_REBUILD_DELAY_SEC
+from services.summary_helpers import post_summary_to_discord
+from services.ingest_ledger import body_digest, duplicate_for_subpath
+from services.ingest_queue import (
+    enqueue_webhook,
+    spool_webhook_stream,
+    enqueue_spooled,
+    discard_spooled,
+    set_ingest_handler,
+    recover_spooled_jobs,
+    ingest_status,
+)
 
 
 print("🚀 Running Madden Flask App!")
@@ -148,7 +187,8 @@ def validate_rosters_on_boot():
         print(f"🚨 Roster corrupted on boot: {e}")
 
 
-league_data = {}
+# latest_* keys are backed by the shared state store (see services/shared_state.py)
+league_data = SharedLeagueData()
 rehydrate_latest_state()
 validate_rosters_on_boot()
 
@@ -170,10 +210,91 @@ POST_ROUND_TO_WEEK = {
 PLAYOFF_ADVANCE_HIDDEN_WEEKS = {19, 20, 21, 22, 23}
 
 # --- Roster debounce state ---
-_roster_pending: dict[str, list] = {}   # {league_id: [ {data, raw, len} , ... ]}
-_roster_timers: dict[str, Timer] = {}   # {league_id: Timer}
-_roster_state: dict[str, dict] = {}     # {league_id: {"last_hash": str, "last_len": int}}
-_roster_lock = Lock()
+# pending payloads / deadlines / last hash are in the shared state store;
+# this worker only keeps a "roster_write:<league>" job on its scheduler.
+# Writes under uploads/<league>/ hold that league's write lock (services/league_locks.py).
+
+
+# --- Generation-based HTTP validators + page cache ----------------------------
+# Every ingest write bumps a counter (services/generation.py); read routes
+# derive their ETag from the counters they depend on and answer 304 before
+# touching any JSON or template. Full responses come from the page cache
+# (services/page_cache.py) while their counters are unchanged.
+
+def generation_cached(deps):
+    """deps() -> list of generation keys the current request's response depends on."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            dep_keys = deps()
+            query = tuple(sorted((k, v) for k, v in request.args.items(multi=True) if v != ""))
+            etag, last_modified = generation_validators(dep_keys, request.path, query)
+            # Only claim a Last-Modified second once it is over, otherwise a
+            # second write in the same second would be hidden behind a 304.
+            if last_modified and int(last_modified) + 1 > time():
+                last_modified = None
+
+            not_modified = etag in request.if_none_match
+            if not request.if_none_match and last_modified and request.if_modified_since:
+                not_modified = int(last_modified) <= request.if_modified_since.timestamp()
+
+            if not_modified:
+                resp = make_response("", 304)
+            else:
+                cache_key = (request.path, tuple(dep_keys), query)
+                cached = page_cache_get(cache_key, etag)
+                if cached:
+                    body, status, content_type = cached
+                    resp = make_response(body, status)
+                    resp.content_type = content_type
+                else:
+                    resp = make_response(view(*args, **kwargs))
+                    if resp.status_code == 200 and not resp.is_streamed:
+                        page_cache_put(cache_key, etag, dep_keys, resp.get_data(),
+                                       resp.status_code, resp.content_type)
+
+            if resp.status_code in (200, 304):
+                resp.set_etag(etag)
+                if last_modified:
+                    resp.last_modified = datetime.fromtimestamp(int(last_modified), timezone.utc)
+                resp.cache_control.no_cache = True
+            return resp
+        return wrapper
+    return decorator
+
+
+def _league_arg(default=DEFAULT_LEAGUE_ID):
+    return request.args.get("league") or league_data.get("latest_league") or default
+
+
+def global_deps(default=DEFAULT_LEAGUE_ID):
+    """Pages built only from season_global / league-root files."""
+    return lambda: [generation_key(_league_arg(default), *GLOBAL)]
+
+
+def league_deps(default=DEFAULT_LEAGUE_ID):
+    """Pages that may read any folder of the league (standings, snapshots)."""
+    return lambda: [generation_key(_league_arg(default))]
+
+
+def week_deps(default=DEFAULT_LEAGUE_ID):
+    """One week's files plus the global team map / rosters."""
+    def deps():
+        league = _league_arg(default)
+        season = request.args.get("season") or league_data.get("latest_season")
+        week = request.args.get("week") or league_data.get("latest_week")
+        if not season or not week:
+            # the view falls back to scanning folders for the latest week
+            return [generation_key(league)]
+
+        season = season if str(season).startswith("season_") else f"season_{season}"
+        if request.args.get("scope") == "season":
+            week = "*"
+        else:
+            week = normalize_period(week)
+        # the keys name the resolved season/week, so a moved pointer changes the ETag
+        return [generation_key(league, season, week), generation_key(league, *GLOBAL)]
+    return deps
 
 
 # --- AP Users storage (admin-editable) ---------------------------------------
@@ -315,7 +436,12 @@ def _ap_remove(user_id: str) -> bool:
     return _ap_lock_call(_inner)
 
 def _admin_ok() -> bool:
-    return request.headers.get("X-Admin-Token") == ADMIN_TOKEN
+    """X-Admin-Token header, or Authorization: Bearer <token> (Prometheus scrapers)."""
+    token = request.headers.get("X-Admin-Token")
+    auth = request.headers.get("Authorization", "")
+    if not token and auth.startswith("Bearer "):
+        token = auth[len("Bearer "):]
+    return bool(token) and hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode())
 
 
 # --- AP Users Admin UI (browser) ---------------------------------------------
@@ -407,8 +533,8 @@ def ap_users_save_all():
         saved_rows = _ap_lock_call(_inner)
 
         # This is now the ONLY browser-admin action that tells the bot
-        # to publish a new AP bulletin to Discord.
-        set_ap_trigger_ready()
+        # to publish a new AP bulletin to Discord (trigger file via the "ap_trigger" job).
+        emit("ap_users_saved", count=len(saved_rows))
 
         return jsonify({
             "ok": True,
@@ -645,12 +771,14 @@ def auto_archive_final_snapshot_if_ready(league_id: str, season: str, week: str)
     if not str(season).startswith("season_"):
         return None
 
-    result = archive_season_final_snapshot(league_id, season)
+    with span("snapshot", "season"):
+        result = archive_season_final_snapshot(league_id, season)
 
     if result:
         if result.get("skipped"):
             print(f"🟡 Final snapshot skipped: {result.get('reason')}")
         else:
+            bump_generation(league_id)
             print(
                 f"✅ Auto-snapshotted final season files for "
                 f"{league_id} {season} {week}"
@@ -666,78 +794,90 @@ def _queue_roster_write(league_id: str, data: dict, raw_body: bytes, output_dir:
     """
     Debounce roster writes for a league; after a short window, write only the largest payload.
     Also avoids re-writing if content hash is unchanged.
+    Pending payloads, the deadline and the last hash live in the shared state
+    store, so payloads that land in different workers are still compared.
     """
-    with _roster_lock:
-        buf = _roster_pending.setdefault(league_id, [])
-        buf.append({
+    state = get_shared_state()
+    pending_ns = f"roster_pending:{league_id}"
+    deadline = f"roster_write:{league_id}"
+
+    state.map_put(pending_ns, {
+        f"{time_ns():020d}-{os.getpid()}": {
             "data": data,
-            "raw": raw_body,
+            "hash": _hash_bytes(raw_body),
             "len": len(
                 data.get("rosterInfoList")
                 or data.get("players")
                 or data.get("items")
                 or []
             ),
-        })
+        }
+    })
+    state.deadline_set(deadline, time() + 2.0)  # 2s debounce window
+
+    def _flush():
+        due = state.deadline_get(deadline)
+        if due is None:
+            return
+        if due - time() > 0.05:
+            _arm(due - time())
+            return
+        if not state.deadline_claim(deadline, time()):
+            return
 
-        # reset timer
-        t = _roster_timers.get(league_id)
-        if t:
-            t.cancel()
+        with league_lock(league_id, app.config["UPLOAD_FOLDER"]):
+            entries = list(state.map_take(pending_ns).values())
 
-        def _flush():
-            with _roster_lock:
-                entries = _roster_pending.pop(league_id, [])
+            if not entries:
+                return
 
-                if not entries:
-                    return
+            best = max(entries, key=lambda e: e["len"])
+            new_hash = best["hash"]
 
-                best = max(entries, key=lambda e: e["len"])
-                new_hash = _hash_bytes(best["raw"])
-                st = _roster_state.get(league_id, {})
+            if state.kv_get(f"roster_last_hash:{league_id}") == new_hash:
+                print("🟡 Roster unchanged; skipping write.")
+                return
 
-                if st.get("last_hash") == new_hash:
-                    print("🟡 Roster unchanged; skipping write.")
-                    return
+            os.makedirs(output_dir, exist_ok=True)
+            out = os.path.join(output_dir, "rosters.json")
 
-                os.makedirs(output_dir, exist_ok=True)
-                out = os.path.join(output_dir, "rosters.json")
+            _atomic_write_json(out, best["data"])
 
-                _atomic_write_json(out, best["data"])
+            print(f"✅ Roster written once after debounce → {out} (players={best['len']})")
 
-                print(f"✅ Roster written once after debounce → {out} (players={best['len']})")
+            state.kv_set(f"roster_last_hash:{league_id}", new_hash)
 
-                _roster_state[league_id] = {
-                    "last_hash": new_hash,
-                    "last_len": best["len"]
-                }
+            parse_rosters_data(best["data"], "roster", output_dir)
 
-                parse_rosters_data(best["data"], "roster", output_dir)
+            _roster_cache.pop(league_id, None)
 
-                _roster_cache.pop(league_id, None)
+    def _arm(delay):
+        # reset the pending write; at shutdown pull the deadline in so _flush writes now
+        def _flush_now():
+            if state.deadline_get(deadline) is not None:
+                state.deadline_set(deadline, time())
+                _flush()
 
-        _roster_timers[league_id] = Timer(2.0, _flush)  # 2s debounce window
-        _roster_timers[league_id].start()
+        schedule(f"roster_write:{league_id}", delay, _flush, on_shutdown=_flush_now)
 
+    _arm(2.0)
 
 
-def set_ap_trigger_ready():
-    try:
-        # Ensure file exists
-        if not trigger_path.exists():
-            _atomic_write_json(str(trigger_path), {"ready": False})
 
-        with open(trigger_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+def set_ap_trigger_ready():
+    """The "ap_trigger" job; a failure raises so the job queue retries it."""
+    # Ensure file exists
+    if not trigger_path.exists():
+        _atomic_write_json(str(trigger_path), {"ready": False})
 
-        data["ready"] = True
+    with open(trigger_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
 
-        _atomic_write_json(str(trigger_path), data)
+    data["ready"] = True
 
-        print("🔥 AP trigger set to READY")
+    _atomic_write_json(str(trigger_path), data)
 
-    except Exception as e:
-        print(f"❌ Failed to set AP trigger: {e}")
+    print("🔥 AP trigger set to READY")
 
 def _upsert_rosters(league_folder: str, incoming: list[dict]) -> list[dict]:
     """Merge incoming roster batch with existing league-wide rosters.json."""
@@ -969,7 +1109,7 @@ def jersey_num(player):
     KEYS = ("jerseyNum", "uniformNumber", "jerseyNumber", "jersey", "number")
 
     def _get(obj, k):
-        if isinstance(obj, dict):
+        if isinstance(obj, Mapping):
             return obj.get(k)
         return getattr(obj, k, None)
 
@@ -993,13 +1133,13 @@ def jersey_num(player):
     # 3) last resort: shallow-deep scan across player and _raw
     if found in (None, ""):
         stack = []
-        if isinstance(player, (dict, list, tuple)):
+        if isinstance(player, (Mapping, list, tuple)):
             stack.append(player)
-        if isinstance(raw, (dict, list, tuple)) and raw is not player:
+        if isinstance(raw, (Mapping, list, tuple)) and raw is not player:
             stack.append(raw)
         while stack:
             cur = stack.pop()
-            if isinstance(cur, dict):
+            if isinstance(cur, Mapping):
                 for k, v in cur.items():
                     if k in KEYS and v not in (None, "", -1):
                         found = v
@@ -1659,7 +1799,7 @@ def home():
     if os.path.exists(base_path):
         for league_id in os.listdir(base_path):
             league_path = os.path.join(base_path, league_id)
-            if not os.path.isdir(league_path):
+            if not os.path.isdir(league_path) or league_id.startswith("."):
                 continue
 
             seasons = []
@@ -1768,41 +1908,37 @@ def api_build_power_rankings():
     week = request.args.get("week") or league_data.get("latest_week")
 
     try:
-        data = build_power_rankings(
+        data = rebuild_power_rankings(
             upload_folder=app.config["UPLOAD_FOLDER"],
             league_id=league,
             season=season,
             week=week,
-            top_n=10
         )
         return jsonify(data)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.get("/api/power-rankings")
+@generation_cached(global_deps())
 def api_power_rankings():
     league = request.args.get("league") or league_data.get("latest_league") or DEFAULT_LEAGUE_ID
 
-    path = os.path.join(
-        app.config["UPLOAD_FOLDER"],
-        str(league),
-        "power_rankings.json"
-    )
+    try:
+        data, _ = get_power_rankings(app.config["UPLOAD_FOLDER"], league)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
-    if not os.path.exists(path):
+    if data is None:
         return jsonify({
             "error": "power_rankings.json not found",
             "league": league
         }), 404
 
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            return jsonify(json.load(f))
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    return jsonify(data)
 
 
 @app.route('/api/teams', methods=['GET'])
+@generation_cached(league_deps())
 def get_teams():
 
     league = request.args.get("league") or league_data.get("latest_league") or DEFAULT_LEAGUE_ID
@@ -1874,7 +2010,25 @@ def get_schedule():
     return jsonify(league_data.get('schedule', []))
 
 
+def _flyer_deps():
+    # the flyer's data comes from global files; the league may only be known
+    # from _latest.json, in which case any write invalidates
+    league = request.args.get("league") or league_data.get("latest_league")
+    if not league:
+        return [generation_key()]
+    keys = [generation_key(league, *GLOBAL)]
+    # week / period label default to the latest pointer: name the resolved
+    # season/week, so a moved pointer changes the ETag (as week_deps does)
+    season = request.args.get("season") or league_data.get("latest_season")
+    week = normalize_period(request.args.get("week") or league_data.get("latest_week") or "week_1")
+    if season:
+        season = season if str(season).startswith("season_") else f"season_{season}"
+        keys.append(generation_key(league, season, week))
+    return keys
+
+
 @app.get("/api/flyer/game")
+@generation_cached(_flyer_deps)
 def flyer_game():
 
     # 1️⃣ Query params first
@@ -2029,51 +2183,372 @@ def flyer_health():
     })
 
 
+def _run_ingest_job(job: dict):
+    """Worker-side half of /webhook: parse, write, then derived rebuilds."""
+    # one writer per league across threads and gunicorn workers; other leagues don't wait
+    with league_lock(job["league"], app.config["UPLOAD_FOLDER"]):
+        _run_ingest_job_locked(job)
+
+
+def _run_ingest_job_locked(job: dict):
+    subpath = job["subpath"]
+    if job.get("stream"):
+        # roster body streamed to the spool by the route; parsed incrementally from there
+        result = process_roster_stream(job, app, league_data)
+        data = {}
+    else:
+        data = job.get("data")
+        if data is None:
+            # recovered from the spool after a restart
+            data = json.loads(job["body"].decode("utf-8", errors="replace"))
+
+        result = process_webhook_data(
+            data,
+            subpath,
+            job["headers"],
+            job["body"],
+            app,
+            league_data
+        )
+    if result and result.get("status") == "duplicate":
+        return
+
+    # derived work (final snapshot) is queued as a background job; the period is
+    # this job's league's, not the global latest_* pointer (another league may have moved it)
+    emit(
+        "webhook_ingested",
+        league_id=job["league"] or find_league_in_subpath(subpath),
+        season=(result or {}).get("season"),
+        week=(result or {}).get("week"),
+        category=webhook_category(data) if data else "roster",
+        upload_folder=app.config["UPLOAD_FOLDER"],
+    )
+
+
+set_ingest_handler(_run_ingest_job)
+
+
+# --- Background jobs (services/job_queue.py) -----------------------------------
+# Ingest emits events; these turn them into persistent, retried jobs.
+def _final_snapshot_job(league_id, season, week, upload_folder):
+    with league_lock(league_id, upload_folder):
+        auto_archive_final_snapshot_if_ready(league_id, season, week)
+
+
+def _discord_recap_job(summary, week_number, league_id, season_dir, week_dir):
+    with span("discord", "defense"):
+        post_summary_to_discord(summary, week_number, league_id, season_dir, week_dir)
+
+
+def _derived_rebuild_job(upload_folder, league_id, season_dir, week_dir):
+    with league_lock(league_id, upload_folder):
+        rebuild_stale(upload_folder, league_id, season_dir, week_dir)
+
+
+register_job("derived_rebuild", _derived_rebuild_job, max_attempts=5, backoff_sec=10)
+register_job("discord_recap", _discord_recap_job, max_attempts=8, backoff_sec=30, max_backoff_sec=1800)
+register_job("final_snapshot", _final_snapshot_job, max_attempts=5, backoff_sec=30)
+register_job("ap_trigger", set_ap_trigger_ready, max_attempts=10, backoff_sec=5)
+
+# Raw files the build graph reads; one coalesced rebuild per folder after a burst of posts.
+# 🏆 Standings / league info feed the power rankings: keep their old debounce.
+for _category, _delay in (
+    ("standings", POWER_RANKINGS_DEBOUNCE_SEC),
+    ("league", POWER_RANKINGS_DEBOUNCE_SEC),
+    ("schedule", DERIVED_REBUILD_DELAY_SEC),
+    ("passing", DERIVED_REBUILD_DELAY_SEC),
+    ("rushing", DERIVED_REBUILD_DELAY_SEC),
+    ("defense", DERIVED_REBUILD_DELAY_SEC),
+):
+    on_event(
+        f"{_category}_written", "derived_rebuild",
+        key="derived_rebuild:{league_id}:{season_dir}:{week_dir}",
+        delay=_delay,
+        args=lambda e: {k: e[k] for k in ("upload_folder", "league_id", "season_dir", "week_dir")},
+    )
+on_event("summary_written", "discord_recap", key="discord_recap:{league_id}:{season_dir}:{week_dir}:{summary[gameId]}")
+on_event(
+    "webhook_ingested", "final_snapshot",
+    key="final_snapshot:{league_id}:{season}",
+    when=lambda e: e["league_id"] and e["season"] and normalize_period(e["week"]) == "week_19",
+    args=lambda e: {k: e[k] for k in ("league_id", "season", "week", "upload_folder")},
+)
+on_event("ap_users_saved", "ap_trigger", key="ap_trigger", args=lambda e: {})
+
+
 @app.route('/webhook', defaults={'subpath': ''}, methods=['POST'])
 @app.route('/webhook/<path:subpath>', methods=['POST'])
 def webhook(subpath):
     print(f"🔔 Webhook hit! Subpath: {subpath}")
 
+    stream_league = _roster_stream_league(subpath)
+    if stream_league:
+        return _webhook_roster_stream(subpath, stream_league)
+
+    # gzip / deflate bodies are decoded here; everything downstream sees plain JSON bytes
     try:
-        data = request.get_json(force=True)
+        with span("decode", "request"):
+            body = read_decoded(request)
+            data = json.loads(body)
+    except UnsupportedEncoding as e:
+        return str(e), 415
+    except BodyTooLarge as e:
+        return str(e), 413
     except Exception as e:
         print(f"❌ Failed to parse JSON: {e}")
         return 'Invalid JSON', 400
 
-    # Extract headers and body inside the request context
-    headers = dict(request.headers)
-    body = request.data
-
-    # 🚫 Removed threading — now it runs immediately in order
-    process_webhook_data(
-        data,
-        subpath,
-        headers,
-        body,
-        app,
-        league_data
-    )
+    if not isinstance(data, dict):
+        return 'Invalid payload', 400
+
+    # Extract headers inside the request context
+    headers = decoded_headers(request)
+
+    result, code = _accept_webhook(subpath, headers, body, data)
+    return jsonify(result), code
+
+
+def _accept_webhook(subpath: str, headers: dict, body: bytes, data: dict) -> tuple[dict, int]:
+    """Dedup + enqueue one decoded payload; shared by /webhook and /webhook/batch."""
+    # ⏩ Validate + enqueue only; ingest workers process each league in order
+    league = ingest_league_key(data, subpath, league_data)
+
+    # 🟰 Identical to what this subpath last delivered → skip ingest entirely
+    digest = body_digest(body)
+    dup = duplicate_for_subpath(league, subpath, digest, app.config["UPLOAD_FOLDER"])
+    if dup:
+        capture_webhook(subpath, headers, body, replay=headers.get("X-Replay") == "1")
+        category = webhook_category(data)
+        count_webhook_duplicate(category)
+        if category == "roster":
+            note_roster_arrival(league, subpath, data.get("rosterInfoList") or [], app.config["UPLOAD_FOLDER"])
+        print(f"🟰 Duplicate payload for {dup}; not queued.")
+        return {"status": "duplicate", "skipped": True, "league": league, "dest": dup, "sha256": digest}, 200
+
+    queued = enqueue_webhook(league, subpath, headers, body, data=data)
+    return {"status": "queued", **queued}, 202
+
+
+@app.route('/webhook/batch', methods=['POST'])
+def webhook_batch():
+    """
+    Many webhooks in one POST: NDJSON, optionally Content-Encoding: gzip.
+
+    One item per line, either {"subpath": "...", "body": <payload object or its
+    JSON text>} (capture log records work as is) or a bare payload, which uses
+    ?subpath=. Every item takes the same dedup + enqueue path as /webhook and
+    gets its own entry in "items"; 207 when any item was rejected.
+    """
+    default_subpath = (request.args.get("subpath") or "").strip("/")
+    headers = decoded_headers(request)
+    items = []
+    counts = Counter()
+
+    def reject(i, subpath, error):
+        items.append({"index": i, "subpath": subpath, "status": "error", "code": 400, "error": error})
+        counts["error"] += 1
 
     try:
-        league = league_data.get("latest_league") or find_league_in_subpath(subpath)
-        season = league_data.get("latest_season")
-        week = league_data.get("latest_week")
-
-        auto_archive_final_snapshot_if_ready(league, season, week)
-
-        if league:
-            build_power_rankings(
-                upload_folder=app.config["UPLOAD_FOLDER"],
-                league_id=league,
-                season=season,
-                week=week,
-                top_n=10
-            )
-            print(f"✅ Power rankings rebuilt for league {league} {season} {week}")
-    except Exception as e:
-        print(f"⚠️ final snapshot failed or Power rankings rebuild skipped/failed: {e}")
+        stream = decoded_stream(request)
+        i = -1
+        for line in stream:
+            if not line.strip():
+                continue
+            i += 1
+            subpath = default_subpath
+            try:
+                rec = json.loads(line)
+            except Exception as e:
+                reject(i, subpath, f"Invalid JSON: {e}")
+                continue
+            if not isinstance(rec, dict):
+                reject(i, subpath, "Invalid payload")
+                continue
+
+            if "body" in rec or "payload" in rec:
+                subpath = str(rec.get("subpath") or default_subpath).strip("/")
+                raw = rec.get("body", rec.get("payload"))
+                try:
+                    if isinstance(raw, str):
+                        body = raw.encode("utf-8")
+                        data = json.loads(body)
+                    else:
+                        data = raw
+                        body = json.dumps(data).encode("utf-8")
+                except Exception as e:
+                    reject(i, subpath, f"Invalid JSON: {e}")
+                    continue
+            else:
+                data, body = rec, line.strip()
+            if not isinstance(data, dict):
+                reject(i, subpath, "Invalid payload")
+                continue
+
+            try:
+                result, code = _accept_webhook(subpath, headers, body, data)
+            except Exception as e:
+                reject(i, subpath, str(e))
+                continue
+            items.append({"index": i, "subpath": subpath, "code": code, **result})
+            counts[result["status"]] += 1
+    except UnsupportedEncoding as e:
+        return str(e), 415
+    except BodyTooLarge as e:
+        return jsonify({"error": str(e), "items": items, "counts": dict(counts)}), 413
+
+    print(f"📦 Webhook batch: {len(items)} item(s) {dict(counts)}")
+    code = 207 if counts["error"] else 200
+    return jsonify({"status": "partial" if counts["error"] else "ok", "counts": dict(counts), "items": items}), code
+
+
+# roster posts are streamed to the spool instead of parsed in the request (ROSTER_STREAMING=0 to disable)
+ROSTER_STREAMING = os.getenv("ROSTER_STREAMING", "1") != "0"
+
+
+def _roster_stream_league(subpath: str) -> str | None:
+    """League for a roster post that can be streamed (league id in the URL), else None."""
+    if not ROSTER_STREAMING:
+        return None
+    sp = (subpath or "").lower().rstrip("/")
+    if not (sp.endswith("/roster") or "freeagents" in sp):
+        return None
+    league = league_in_subpath(subpath)
+    if not league or is_team_id(league):
+        return None
+    return league
+
+
+def _webhook_roster_stream(subpath: str, league: str):
+    """Roster posts: request stream → spool file, no get_json()/request.data copies."""
+    headers = decoded_headers(request)
+    try:
+        with span("decode", "request"):
+            job = spool_webhook_stream(league, subpath, headers, decoded_stream(request))
+    except UnsupportedEncoding as e:
+        return str(e), 415
+    except BodyTooLarge as e:
+        return str(e), 413
+
+    if job["first_byte"] != b"{":
+        discard_spooled(job)
+        print("❌ Failed to parse JSON: streamed roster body is not an object")
+        return 'Invalid JSON', 400
+
+    dup = duplicate_for_subpath(league, subpath, job["sha256"], app.config["UPLOAD_FOLDER"])
+    if dup:
+        capture_webhook_file(subpath, headers, job["spool"], job["body_offset"],
+                             replay=headers.get("X-Replay") == "1", digest=job["sha256"], size=job["size"])
+        discard_spooled(job)
+        count_webhook_duplicate("roster")
+        note_roster_arrival(league, subpath, [], app.config["UPLOAD_FOLDER"])
+        print(f"🟰 Duplicate payload for {dup}; not queued.")
+        return jsonify({"status": "duplicate", "skipped": True, "league": league, "dest": dup,
+                        "sha256": job["sha256"]}), 200
+
+    queued = enqueue_spooled(job)
+    return jsonify({"status": "queued", "streamed": True, **queued}), 202
+
+
+@app.get("/metrics")
+def prometheus_metrics():
+    """Ingest stage histograms + payload counters (Prometheus text format)."""
+    if not _admin_ok():
+        abort(401)
+    return Response(render_prometheus(), mimetype="text/plain; version=0.0.4")
+
+
+@app.get("/api/health/cache")
+def page_cache_health():
+    return jsonify(page_cache_status())
+
+
+@app.get("/api/health/capture")
+def capture_health():
+    return jsonify(capture_status())
+
+
+@app.get("/api/health/identity")
+def identity_health():
+    """Player identity index per league: key counts and which fallback step matched."""
+    return jsonify(identity_index_status(request.args.get("league")))
+
 
-    return 'OK', 200
+@app.get("/api/health/rosters")
+def roster_coverage_health():
+    """Roster export progress: which teams (+ free agents) arrived, which are still missing."""
+    league = request.args.get("league") or league_data.get("latest_league")
+    if not league:
+        return jsonify({"error": "no league"}), 404
+    return jsonify(roster_coverage(str(league), app.config["UPLOAD_FOLDER"]))
+
+
+@app.get("/api/health/scheduler")
+def scheduler_health():
+    return jsonify(scheduler_status())
+
+
+@app.get("/api/health/ingest")
+def ingest_health():
+    return jsonify(ingest_status())
+
+
+@app.get("/api/health/locks")
+def locks_health():
+    """League write locks in this worker: held now, acquisitions, contention and wait time."""
+    return jsonify(league_lock_status())
+
+
+@app.get("/api/health/jobs")
+def jobs_health():
+    """Background job queue: pending / running / failed counts, runs per job."""
+    return jsonify(job_queue_status())
+
+
+@app.get("/api/admin/jobs")
+def admin_jobs():
+    """Pending and failed background jobs (?state=pending|running|failed for one list)."""
+    if not _admin_ok():
+        abort(401)
+    state = request.args.get("state")
+    limit = request.args.get("limit", 200, type=int)
+    if state:
+        return jsonify({"status": job_queue_status(), state: list_jobs(state, limit)})
+    return jsonify({
+        "status": job_queue_status(),
+        "pending": list_jobs("pending", limit),
+        "running": list_jobs("running", limit),
+        "failed": list_jobs("failed", limit),
+    })
+
+
+@app.post("/api/admin/jobs/<int:job_id>/retry")
+def admin_job_retry(job_id):
+    if not _admin_ok():
+        abort(401)
+    if not retry_job(job_id):
+        return jsonify({"ok": False, "error": "no failed job with that id"}), 404
+    return jsonify({"ok": True, "id": job_id})
+
+
+@app.delete("/api/admin/jobs/<int:job_id>")
+def admin_job_discard(job_id):
+    if not _admin_ok():
+        abort(401)
+    if not discard_job(job_id):
+        return jsonify({"ok": False, "error": "no failed job with that id"}), 404
+    return jsonify({"ok": True, "id": job_id})
+
+
+@app.get("/api/health/build")
+def build_graph_health():
+    """Derived artifacts: declared inputs, builds / fresh skips / failures per artifact."""
+    return jsonify(build_graph_status())
+
+
+@app.get("/api/health/parse_pool")
+def parse_pool_health():
+    """Parse pool size, calls/time per task, inline fallbacks."""
+    return jsonify(parse_pool_status())
 
 
 PERIOD_RE = re.compile(r"^(pre|week)_(\d+)$")
@@ -2177,11 +2652,21 @@ def _fmt_player(name, pos=None, jersey=None):
 
 @app.route('/debug', methods=['GET'])
 def get_debug_file():
-    debug_path = os.path.join(app.config['UPLOAD_FOLDER'], 'webhook_debug.txt')
-    if not os.path.exists(debug_path):
-        return "No debug file found yet!", 404
-    with open(debug_path) as f:
-        return f"<pre>{f.read()}</pre>"
+    """Tail of the webhook capture log (?n=5, ?subpath=roster, ?format=json)."""
+    n = max(1, min(request.args.get("n", 1, type=int), 200))
+    records = tail_capture(n, subpath=request.args.get("subpath"))
+    if not records:
+        return "No webhooks captured yet!", 404
+    if request.args.get("format") == "json":
+        return jsonify(records)
+
+    out = []
+    for r in records:
+        ts = datetime.fromtimestamp(r.get("ts") or 0).strftime("%Y-%m-%d %H:%M:%S")
+        out.append(f"===== {ts} SUBPATH: {r.get('subpath')}{' (replay)' if r.get('replay') else ''} =====\n\nHEADERS:\n")
+        out.extend(f"{k}: {v}\n" for k, v in (r.get("headers") or {}).items())
+        out.append(f"\nBODY (sha256 {r.get('sha256')}):\n{r.get('body') or ''}\n\n")
+    return f"<pre>{escape(''.join(out))}</pre>"
 
 
 @app.route('/uploads', methods=['GET'])
@@ -2251,7 +2736,7 @@ def sort_key(p):
 
 def ui_player(p, _dev_to_label):
     # apply your dev-label mapping for consistent UI
-    q = dict(p)
+    q = p.copy()   # RosterPlayer records copy their slots, plain dicts copy as before
     q["dev"] = _dev_to_label(p.get("dev"))
     return q
 
@@ -2261,6 +2746,7 @@ def stats_hash():
 
 
 @app.route('/stats')
+@generation_cached(week_deps())
 def show_stats():
     # Get league/season/week from query or cache
     league = request.args.get("league") or league_data.get("latest_league") or "26969931"
@@ -2275,15 +2761,22 @@ def show_stats():
 
     season = season if str(season).startswith("season_") else f"season_{season}"
     week = normalize_period(week)
+    scope = request.args.get("scope") or "week"
 
     try:
         base_path = os.path.join(app.config['UPLOAD_FOLDER'], league, season, week)
         filepath  = os.path.join(base_path, "passing.json")
 
-        players = []
-        with open(filepath, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            players = data.get("playerPassingStatInfoList", [])
+        if scope == "season":
+            players = season_leaderboard(
+                os.path.join(app.config['UPLOAD_FOLDER'], league, season), "passing"
+            )
+        else:
+            players = load_week_rows("passing", league, season, week)
+        if players is None:
+            with open(filepath, "r", encoding="utf-8") as f:
+                data = json.load(f)
+                players = data.get("playerPassingStatInfoList", [])
 
         # team names
         teams = {}
@@ -2308,17 +2801,57 @@ def show_stats():
         app.logger.exception(f"❌ Error loading stats: {e}")
         players = []
 
-    prev_week, next_week = get_prev_next_week(league, season, week)
+    if scope == "season":
+        prev_week, next_week = None, None
+    else:
+        prev_week, next_week = get_prev_next_week(league, season, week)
 
     return render_template("stats.html",
                            players=players,
                            season=season,
                            week=week,
+                           scope=scope,
                            league=league,
                            prev_week=prev_week,
                            next_week=next_week)
 
 
+@app.get("/api/stats/season")
+def api_season_stats():
+    """Season-to-date leaderboard from the ingest-time accumulator."""
+    league = request.args.get("league") or league_data.get("latest_league")
+    season = request.args.get("season") or league_data.get("latest_season") or "season_0"
+    season = season if str(season).startswith("season_") else f"season_{season}"
+    category = request.args.get("category", "passing")
+    scope = request.args.get("scope", "season")
+    sort_by = request.args.get("sort")
+    limit = request.args.get("limit", type=int)
+
+    if not league:
+        return jsonify({"error": "league is required"}), 400
+    if category not in SUM_FIELDS:
+        return jsonify({"error": f"category must be one of {sorted(SUM_FIELDS)}"}), 400
+    if scope not in ("season", "preseason"):
+        return jsonify({"error": "scope must be 'season' or 'preseason'"}), 400
+    if sort_by and sort_by not in sort_fields(category):
+        return jsonify({"error": f"sort must be one of {sort_fields(category)}"}), 400
+    if limit is not None:
+        limit = max(1, limit)
+
+    rows = season_leaderboard(
+        os.path.join(app.config['UPLOAD_FOLDER'], str(league), season),
+        category, scope=scope, sort_by=sort_by, limit=limit,
+    )
+    return jsonify({
+        "league": str(league),
+        "season": season,
+        "category": category,
+        "scope": scope,
+        "count": len(rows),
+        "players": rows,
+    })
+
+
 @app.route('/receiving')
 def show_receiving_stats():
     league = request.args.get("league")
@@ -2346,9 +2879,11 @@ def show_receiving_stats():
         base_path = os.path.join(app.config['UPLOAD_FOLDER'], league, season, week)
         filepath = os.path.join(base_path, "receiving.json")
 
-        with open(filepath, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            players = data.get("playerReceivingStatInfoList", [])
+        players = load_week_rows("receiving", league, season, week)
+        if players is None:
+            with open(filepath, "r", encoding="utf-8") as f:
+                data = json.load(f)
+                players = data.get("playerReceivingStatInfoList", [])
 
         # Load team names
         team_map_path = os.path.join(app.config['UPLOAD_FOLDER'], league, "team_map.json")
@@ -2411,10 +2946,12 @@ def show_rushing_stats():
         base_path = os.path.join(app.config['UPLOAD_FOLDER'], league, season, week)
         filepath = os.path.join(base_path, "parsed_rushing.json")
 
-        with open(filepath, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            # works for both list and dict outputs:
-            players = data if isinstance(data, list) else data.get("playerRushingStatInfoList", [])
+        players = load_week_rows("rushing", league, season, week)
+        if players is None:
+            with open(filepath, "r", encoding="utf-8") as f:
+                data = json.load(f)
+                # works for both list and dict outputs:
+                players = data if isinstance(data, list) else data.get("playerRushingStatInfoList", [])
 
         # Load team names
         team_map_path = os.path.join(app.config['UPLOAD_FOLDER'], league, "team_map.json")
@@ -2475,78 +3012,33 @@ def show_defense_stats():
         parsed_path = os.path.join(base_path, "parsed_defense.json")
         raw_path    = os.path.join(base_path, "defense.json")
 
-        players = []
-        if os.path.exists(parsed_path):
-            with open(parsed_path, "r", encoding="utf-8") as f:
-                players = json.load(f) or []
-        elif os.path.exists(raw_path):
-            with open(raw_path, "r", encoding="utf-8") as f:
-                data = json.load(f) or {}
-                players = data.get("playerDefensiveStatInfoList", []) or []
-        else:
-            players = []
-
-        # Enrich with position via roster index (defense payload lacks pos)
-        idx = load_roster_index(league)  # already defined in your app
-        rplayers = idx.get("players", [])
-
-        # Build fast lookups from roster -> position and jersey
-        pos_by_roster = {}
-        pos_by_pid = {}
-        pos_by_name_team = {}
-
-        jersey_by_roster = {}
-        jersey_by_pid = {}
-        jersey_by_name_team = {}
-
-        for rp in rplayers:
-            raw = rp.get("_raw") or {}
-            pos = rp.get("pos") or rp.get("position") or raw.get("position") or raw.get("pos")
-
-            jersey = (
-                    rp.get("jerseyNum") or raw.get("jerseyNum")
-                    or raw.get("uniformNumber") or raw.get("jerseyNumber")
-                    or raw.get("jersey") or raw.get("number")
-            )
-
-            rid = str(raw.get("rosterId") or raw.get("id") or "")
-            pid = str(raw.get("playerId") or "")
-            name = (rp.get("name") or raw.get("fullName") or raw.get("playerName"))
-            tid = str(rp.get("teamId") or raw.get("teamId") or raw.get("team") or "")
-
-            if pos:
-                if rid: pos_by_roster[rid] = pos
-                if pid: pos_by_pid[pid] = pos
-                if name and tid: pos_by_name_team[(name, tid)] = pos
-
-            if jersey not in (None, "", -1):
-                if rid: jersey_by_roster[rid] = jersey
-                if pid: jersey_by_pid[pid] = jersey
-                if name and tid: jersey_by_name_team[(name, tid)] = jersey
+        # Stats store first (STATS_STORE=sqlite), then the JSON files
+        players = load_week_rows("defense", league, season, week)
+        if players is None:
+            if os.path.exists(parsed_path):
+                with open(parsed_path, "r", encoding="utf-8") as f:
+                    players = json.load(f) or []
+            elif os.path.exists(raw_path):
+                with open(raw_path, "r", encoding="utf-8") as f:
+                    data = json.load(f) or {}
+                    players = data.get("playerDefensiveStatInfoList", []) or []
+            else:
+                players = []
+
+        # Enrich with position via the shared identity index (defense payload lacks pos)
+        identity = get_identity_index(league)
 
         # Fill missing position/jersey on defense rows
         for p in players:
-            if not (p.get("position") or p.get("pos")):
-                rid = str(p.get("rosterId") or p.get("playerId") or p.get("id") or "")
-                pid = str(p.get("playerId") or "")
-                name = p.get("playerName") or p.get("fullName") or p.get("name")
-                tid = str(p.get("teamId") or p.get("team") or "")
-                pos = (pos_by_roster.get(rid)
-                       or pos_by_pid.get(pid)
-                       or pos_by_name_team.get((name, tid)))
-                if pos:
-                    p["position"] = pos
-
-            if not p.get("jerseyNum"):
-                rid = str(p.get("rosterId") or p.get("playerId") or p.get("id") or "")
-                pid = str(p.get("playerId") or "")
-                name = p.get("playerName") or p.get("fullName") or p.get("name")
-                tid = str(p.get("teamId") or p.get("team") or "")
-                jersey = (jersey_by_roster.get(rid)
-                          or jersey_by_pid.get(pid)
-                          or jersey_by_name_team.get((name, tid)))
-                if jersey not in (None, "", -1):
-                    p["jerseyNum"] = jersey  # enables jersey_num(p)
+            need_pos = not (p.get("position") or p.get("pos"))
+            need_jersey = not p.get("jerseyNum")
+            if not (need_pos or need_jersey):
+                continue
+            match = identity.resolve(p)
+            if need_pos and match.pos:
+                p["position"] = match.pos
+            if need_jersey and match.jersey not in (None, "", -1):
+                p["jerseyNum"] = match.jersey  # enables jersey_num(p)
 
         # Load team names
         teams = {}
@@ -2745,18 +3237,17 @@ def rookie_preseason_stats():
     def team_name(team_id):
         return (team_map.get(str(team_id), {}) or {}).get("name", "Unknown")
 
-    def stat_player_key(row):
-        return str(
-            row.get("rosterId")
-            or row.get("playerId")
-            or row.get("id")
-            or f"{row.get('playerName') or row.get('name')}_{row.get('teamId')}"
-        )
-
     leaders = {}
 
+    identity = get_identity_index(league)
+
     def ensure_player(key, row):
         info = rookie_lookup.get(key)
+        if not info:
+            # stat rows keyed by name/team (no rosterId) still resolve to the roster player
+            match = identity.resolve(row)
+            key = match.key
+            info = rookie_lookup.get(key) if key else None
         if not info:
             return None
 
@@ -2782,79 +3273,56 @@ def rookie_preseason_stats():
 
         return leaders[key]
 
-    for week in preseason_weeks:
-        base_path = os.path.join(app.config["UPLOAD_FOLDER"], league, season, week)
+    # Preseason totals are accumulated at ingest (pre_1..pre_3, see season_totals)
+    totals = load_season_totals(
+        os.path.join(app.config["UPLOAD_FOLDER"], league, season), scope="preseason"
+    )
 
-        # Passing
-        passing_path = os.path.join(base_path, "passing.json")
-        if os.path.exists(passing_path):
-            with open(passing_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            for row in data.get("playerPassingStatInfoList", []) or []:
-                key = stat_player_key(row)
-                player = ensure_player(key, row)
-                if not player:
-                    continue
+    for key, row in (totals.get("passing") or {}).items():
+        player = ensure_player(key, row)
+        if not player:
+            continue
 
-                player["passYds"] += int(row.get("passYds") or 0)
-                player["passTDs"] += int(row.get("passTDs") or 0)
-                player["passINTs"] += int(row.get("passINTs") or 0)
-                player["totalYds"] += int(row.get("passYds") or 0)
-                player["totalTDs"] += int(row.get("passTDs") or 0)
+        player["passYds"] += int(row.get("passYds") or 0)
+        player["passTDs"] += int(row.get("passTDs") or 0)
+        player["passINTs"] += int(row.get("passINTs") or 0)
+        player["totalYds"] += int(row.get("passYds") or 0)
+        player["totalTDs"] += int(row.get("passTDs") or 0)
 
-        # Rushing
-        rushing_path = os.path.join(base_path, "parsed_rushing.json")
-        if os.path.exists(rushing_path):
-            with open(rushing_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            rows = data if isinstance(data, list) else data.get("playerRushingStatInfoList", [])
-            for row in rows or []:
-                key = stat_player_key(row)
-                player = ensure_player(key, row)
-                if not player:
-                    continue
+    for key, row in (totals.get("rushing") or {}).items():
+        player = ensure_player(key, row)
+        if not player:
+            continue
 
-                yds = int(row.get("rushYds") or row.get("yards") or row.get("yds") or 0)
-                tds = int(row.get("rushTDs") or row.get("td") or row.get("tds") or 0)
+        yds = int(row.get("rushYds") or 0)
+        tds = int(row.get("rushTDs") or 0)
 
-                player["rushYds"] += yds
-                player["rushTDs"] += tds
-                player["totalYds"] += yds
-                player["totalTDs"] += tds
+        player["rushYds"] += yds
+        player["rushTDs"] += tds
+        player["totalYds"] += yds
+        player["totalTDs"] += tds
 
-        # Receiving
-        receiving_path = os.path.join(base_path, "receiving.json")
-        if os.path.exists(receiving_path):
-            with open(receiving_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            for row in data.get("playerReceivingStatInfoList", []) or []:
-                key = stat_player_key(row)
-                player = ensure_player(key, row)
-                if not player:
-                    continue
+    for key, row in (totals.get("receiving") or {}).items():
+        player = ensure_player(key, row)
+        if not player:
+            continue
 
-                yds = int(row.get("recYds") or row.get("receivingYds") or row.get("yards") or 0)
-                tds = int(row.get("recTDs") or row.get("recTds") or row.get("tds") or 0)
-
-                player["recYds"] += yds
-                player["recTDs"] += tds
-                player["totalYds"] += yds
-                player["totalTDs"] += tds
-
-        # Defense
-        defense_path = os.path.join(base_path, "parsed_defense.json")
-        if os.path.exists(defense_path):
-            with open(defense_path, "r", encoding="utf-8") as f:
-                rows = json.load(f) or []
-            for row in rows:
-                key = stat_player_key(row)
-                player = ensure_player(key, row)
-                if not player:
-                    continue
+        yds = int(row.get("recYds") or 0)
+        tds = int(row.get("recTDs") or 0)
 
-                player["tackles"] += int(row.get("tackles") or 0)
-                player["sacks"] += float(row.get("sacks") or 0)
-                player["ints"] += int(row.get("ints") or 0)
+        player["recYds"] += yds
+        player["recTDs"] += tds
+        player["totalYds"] += yds
+        player["totalTDs"] += tds
+
+    for key, row in (totals.get("defense") or {}).items():
+        player = ensure_player(key, row)
+        if not player:
+            continue
+
+        player["tackles"] += int(row.get("tackles") or 0)
+        player["sacks"] += float(row.get("sacks") or 0)
+        player["ints"] += int(row.get("ints") or 0)
 
     rookie_rows = list(leaders.values())
 
@@ -2879,6 +3347,7 @@ def rookie_preseason_stats():
     )
 
 @app.route("/teams")
+@generation_cached(league_deps())
 def show_teams():
     league_id = request.args.get("league") or league_data.get("latest_league") or DEFAULT_LEAGUE_ID
     season = request.args.get("season") or league_data.get("latest_season")
@@ -3021,98 +3490,49 @@ def injury_name(code):
 
 
 # cache to avoid re-parsing huge files on every request
-_roster_cache = {}  # {league_id: {"mtime": float, "players": [...], "positions": set()}}
-
-def _normalize_player(p: dict) -> dict:
-    def g(*keys, default=None):
-        for k in keys:
-            if k in p and p[k] is not None:
-                return p[k]
-        return default
-
-    first = g("firstName", "first_name", default="")
-    last  = g("lastName", "last_name", default="")
-    name  = (first + " " + last).strip() or g("fullName", "name", default="Unknown")
-
-    team_id = str(g("teamId", "teamID", "team", default=""))
-    pos     = g("position", "pos", default="UNK")
-
-    jersey  = g("jerseyNum", "uniformNumber", "jerseyNumber", "jersey", "number", default=None)
-
-    ovr = g("overallRating", "ovr", "overall", "playerBestOvr", "playerSchemeOvr", default=0)
-    age = g("age", default=None)
-    dev = g("devTrait", "developmentTrait", "dev", default=None)
-
-    speed = g("speedRating", "spd", "speed", default=None)
-    acc   = g("accelerationRating", "accelRating", "acc", default=None)
-    agi   = g("agilityRating", "agi", "agility", default=None)
-    strn  = g("strengthRating", "str", "strength", default=None)
-    awa   = g("awarenessRating", "awareRating", "awr", default=None)
-
-    thp   = g("throwPowerRating", "throwPower", default=None)
-    tha   = g("throwAccRating", "throwAccuracy", "throwAccuracyShort",
-              "throwAccShortRating", "throwAccMidRating", "throwAccDeepRating",
-              "throwAccShort", "throwAccMid", "throwAccDeep", default=None)
+_roster_cache = {}  # {league_id: {"mtime": float, "players": [...], "positions": set(), buckets...}}
 
-    cat   = g("catching", "catchRating", "catchingRating", default=None)
-    cit   = g("catchInTraffic", "cITRating", "catchInTrafficRating", default=None)
-    spc   = g("spectacularCatch", "specCatchRating", "spectacularCatchRating", default=None)
-    car   = g("carrying", "carryRating", "carryingRating", default=None)
-    btk   = g("breakTackleRating", "breakTackle", default=None)
-
-    tak   = g("tackleRating", "tackle", default=None)
-    bsh   = g("blockSheddingRating", "blockShedRating", "blockShed", default=None)
-    pmv   = g("powerMovesRating", "powerMoves", default=None)
-    fmv   = g("finesseMovesRating", "finesseMoves", default=None)
-    prc   = g("playRecognitionRating", "playRecRating", "playRec", default=None)
-    mcv   = g("manCoverageRating", "manCoverRating", "man", default=None)
-    zcv   = g("zoneCoverageRating", "zoneCoverRating", "zone", default=None)
-    prs   = g("pressRating", "press", default=None)
-
-    pbk   = g("passBlockRating", "passBlockPowerRating", "passBlockFinesseRating", "pbk", default=None)
-    rbk   = g("runBlockRating", "runBlockPowerRating", "runBlockFinesseRating", "rbk", default=None)
-    ibl   = g("impactBlocking", "impactBlockRating", "impactBlock", default=None)
-
-    kpw   = g("kickPowerRating", "kickPower", "kpw", default=None)
-    kac   = g("kickAccRating", "kickAccuracy", "kac", default=None)
-
-    try:
-        ovr = int(ovr)
-    except Exception:
-        ovr = ovr or 0
+def _bucket_roster(players: list[dict], teams: dict) -> dict:
+    """
+    Presorted (OVR, SPD desc) views of the roster so /rosters only slices.
+    A stable sort then filter gives the same order as filter then sort.
+    """
+    valid_team_ids = {str(k) for k in teams.keys()} | {str(i) for i in range(32)}
 
-    # 🩹 Injury fields (various possible keys from Companion exports)
-    inj_len = g("injuryLength", "injuryWeeks", "injury_len", "injury_weeks", default=0)
-    inj_type = g("injuryType", "injury", "injuryDesc", "injury_desc", default=None)
-    try:
-        inj_len_int = int(str(inj_len).strip())
-    except Exception:
-        inj_len_int = 0
+    ranked = sorted(players, key=sort_key, reverse=True)
+    by_team, by_pos, by_team_pos = defaultdict(list), defaultdict(list), defaultdict(list)
+    free_agents = []
+    for p in ranked:
+        tid, pos = str(p.get("teamId")), p.get("pos")
+        by_team[tid].append(p)
+        by_pos[pos].append(p)
+        by_team_pos[(tid, pos)].append(p)
+        if is_free_agent(p, valid_team_ids):
+            free_agents.append(p)
+            by_team_pos[("FA", pos)].append(p)
+
+    if players:
+        fa_buckets = Counter(str(p.get("teamId")) for p in free_agents)
+        print("🔎 FA teamId buckets:", fa_buckets)
+        print("🔎 Total FAs:", len(free_agents))
 
     return {
-        "name": name, "teamId": team_id, "pos": pos, "ovr": ovr,
-        "jerseyNum": jersey,
-        "_raw": p,
-
-        "age": age, "dev": dev,
-        "spd": speed, "acc": acc, "agi": agi, "str": strn, "awr": awa,
-        "thp": thp, "tha": tha, "cth": cat, "cit": cit, "spc": spc,
-        "car": car, "btk": btk,
-        "tak": tak, "bsh": bsh, "pmv": pmv, "fmv": fmv, "prc": prc, "mcv": mcv, "zcv": zcv, "prs": prs,
-        "pbk": pbk, "rbk": rbk, "ibl": ibl,
-        "kpw": kpw, "kac": kac,
-
-        "injuryLength": inj_len_int,  # integer weeks
-        "injuryType": inj_type,  # text if present
-        "isInjured": inj_len_int > 0,  # handy boolean for templates
+        "teams": teams,
+        "ranked": ranked,
+        "by_team": dict(by_team),
+        "by_pos": dict(by_pos),
+        "by_team_pos": dict(by_team_pos),
+        "free_agents": free_agents,
+        "sections": None,   # NFL/ALL page sections, built on first request
     }
 
 
 def load_roster_index(league_id: str) -> dict:
     """
     Reads uploads/<league>/season_global/week_global/rosters.json (or parsed one),
-    normalizes to a compact list and caches it.
-    Returns {"players": [...], "positions": set([...])}
+    normalizes to a compact list and caches it, together with presorted
+    buckets (see _bucket_roster), until the roster or team_map.json changes.
+    Returns {"players": [...], "positions": set([...]), "ranked": [...], "by_team": {...}, ...}
     """
     base = os.path.join(app.config['UPLOAD_FOLDER'], league_id, "season_global", "week_global")
     path_candidates = [
@@ -3121,32 +3541,42 @@ def load_roster_index(league_id: str) -> dict:
     ]
     roster_path = next((p for p in path_candidates if os.path.exists(p)), None)
     if not roster_path:
-        return {"players": [], "positions": set()}
+        return {"players": [], "positions": set(), **_bucket_roster([], {})}
 
+    team_map_path = os.path.join(app.config['UPLOAD_FOLDER'], league_id, "team_map.json")
     mtime = os.path.getmtime(roster_path)
+    team_map_mtime = os.path.getmtime(team_map_path) if os.path.exists(team_map_path) else None
     cached = _roster_cache.get(league_id)
-    if cached and cached["mtime"] == mtime:
+    if cached and cached["mtime"] == mtime and cached["team_map_mtime"] == team_map_mtime:
         return cached
 
-    # load and normalize
+    # load and normalize (in the parse pool when enabled)
     try:
-        with open(roster_path, "r", encoding="utf-8") as f:
-            raw = json.load(f)
+        records = run_in_pool(load_roster_records, roster_path)
     except Exception as e:
         app.logger.error("⚠️ Corrupted roster file %s: %s", roster_path, e)
-        return {"players": [], "positions": set()}
+        return {"players": [], "positions": set(), **_bucket_roster([], {})}
 
-    # Support either the Companion raw shape or your parsed shape
-    if isinstance(raw, dict):
-        players_raw = raw.get("rosterInfoList") or raw.get("players") or raw.get("items") or []
-    elif isinstance(raw, list):
-        players_raw = raw
-    else:
-        players_raw = []
+    teams = {}
+    if team_map_mtime is not None:
+        try:
+            with open(team_map_path, "r", encoding="utf-8") as f:
+                teams = json.load(f)
+        except Exception as e:
+            app.logger.warning("⚠️ Couldn't read %s: %s", team_map_path, e)
 
-    players = [_normalize_player(p) for p in players_raw]
+    # compact records; the raw payload is re-read from the file only on demand
+    raw_src = RawRosterSource(roster_path, mtime)
+    players = [RosterPlayer.from_values(values, kept, raw_src, i) for i, (values, kept) in enumerate(records)]
+    del records
     positions = {p["pos"] for p in players if p.get("pos")}
-    out = {"players": players, "positions": positions, "mtime": mtime}
+    out = {
+        "players": players,
+        "positions": positions,
+        "mtime": mtime,
+        "team_map_mtime": team_map_mtime,
+        **_bucket_roster(players, teams),
+    }
     _roster_cache[league_id] = out
     return out
 
@@ -3227,7 +3657,45 @@ COLUMN_LABELS = {
 # dev trait template
 DEV_LABELS = {0: "Normal", 1: "Star", 2: "Superstar", 3: "X-Factor"}
 
+def _dev_to_label(v):
+    try: return DEV_LABELS.get(int(v), v)
+    except (TypeError, ValueError): return v or ""
+
+
+def _roster_sections(idx: dict) -> dict:
+    """NFL/ALL page sections; built once per roster index (i.e. per roster generation)."""
+    sections = idx.get("sections")
+    if sections is not None:
+        return sections
+
+    teams = idx["teams"]
+    fa_ids = {id(p) for p in idx["free_agents"]}
+
+    # teams in roster-file order (as before), players presorted from the buckets
+    team_order = dict.fromkeys(str(p.get("teamId")) for p in idx["players"] if id(p) not in fa_ids)
+
+    teams_block = []
+    for tid in team_order:
+        plist = [p for p in idx["by_team"][tid] if id(p) not in fa_ids]
+        tname = teams.get(tid, {}).get("name", f"Team {tid}")
+        teams_block.append({"teamId": tid, "teamName": tname,
+                            "players": [ui_player(p, _dev_to_label) for p in plist]})
+    teams_block.sort(key=lambda t: (t["players"][0].get("ovr") or 0) if t["players"] else 0, reverse=True)
+
+    def _pname(p): return p.get("playerName") or p.get("name") or ""
+
+    sections = {
+        "overall_players": [ui_player(p, _dev_to_label) for p in idx["ranked"][:100]],
+        "free_agents": [ui_player(p, _dev_to_label) for p in idx["free_agents"]],
+        "teams_block": teams_block,
+        "search_index": [{"name": _pname(p)} for p in idx["players"] if _pname(p)],
+    }
+    idx["sections"] = sections
+    return sections
+
+
 @app.route("/rosters")
+@generation_cached(global_deps())
 def rosters():
     league = request.args.get("league") or league_data.get("latest_league") or "26969931"
     team   = request.args.get("team", "NFL")
@@ -3237,7 +3705,6 @@ def rosters():
 
     # load players + positions
     idx = load_roster_index(league)
-    all_players = idx["players"]
     positions = ["ALL"] + sorted(list(idx["positions"]))
 
     league_folder = os.path.join(
@@ -3251,12 +3718,7 @@ def rosters():
     if not os.path.exists(parsed_path):
         return "Rosters are still processing, please refresh"
 
-    # --- build valid ids first ---
-    team_map_path = os.path.join(app.config['UPLOAD_FOLDER'], league, "team_map.json")
-    teams = {}
-    if os.path.exists(team_map_path):
-        with open(team_map_path, "r", encoding="utf-8") as f:
-            teams = json.load(f)
+    teams = idx["teams"]
 
     team_name = None
     team_total_count = None
@@ -3269,18 +3731,7 @@ def rosters():
 
     if team not in ("NFL", "FA"):
         team_name = teams.get(str(team), {}).get("name", f"Team {team}")
-        team_total_count = sum(1 for p in all_players if str(p.get("teamId")) == str(team))
-
-    valid_team_ids = {str(k) for k in teams.keys()} | {str(i) for i in range(32)}
-
-    # now define the wrapper (bind the set at definition time)
-    def is_fa(p, _valid_ids=valid_team_ids):
-        return is_free_agent(p, _valid_ids)
-
-    # debug after is_fa exists and valid_team_ids is bound
-    fa_buckets = Counter(str(p.get("teamId")) for p in all_players if is_fa(p))
-    print("🔎 FA teamId buckets:", fa_buckets)
-    print("🔎 Total FAs:", sum(fa_buckets.values()))
+        team_total_count = len(idx["by_team"].get(str(team), ()))
 
     # UI options
     team_options = (
@@ -3288,52 +3739,34 @@ def rosters():
         [{"id": tid, "name": info.get("name","")} for tid, info in sorted(teams.items(), key=lambda x: x[1].get("name",""))]
     )
 
-    # filtering/sorting/pagination...
-    players = list(all_players)
-    if team and team != "NFL":
-        players = [p for p in players if is_fa(p)] if team == "FA" else [p for p in players if str(p.get("teamId")) == str(team)]
-    if pos and pos != "ALL":
-        players = [p for p in players if p.get("pos") == pos]
-    players.sort(key=sort_key, reverse=True)
+    # filtering/sorting/pagination: pick the presorted bucket, then slice
+    if not team or team == "NFL":
+        players = idx["ranked"] if pos == "ALL" or not pos else idx["by_pos"].get(pos, [])
+    else:
+        bucket_team = "FA" if team == "FA" else str(team)
+        if pos == "ALL" or not pos:
+            players = idx["free_agents"] if team == "FA" else idx["by_team"].get(bucket_team, [])
+        else:
+            players = idx["by_team_pos"].get((bucket_team, pos), [])
 
     columns = OVERALL_COLUMNS if pos == "ALL" else POSITION_COLUMNS.get(pos, OVERALL_COLUMNS)
     total = len(players); start = (page - 1) * per; end = start + per
-    def _dev_to_label(v):
-        try: return DEV_LABELS.get(int(v), v)
-        except (TypeError, ValueError): return v or ""
     page_players_ui = [ui_player(p, _dev_to_label) for p in players[start:end]]
 
     for row in page_players_ui:
         row["teamLogo"] = team_logo(row.get("teamId"))
 
     show_sections = (team == "NFL" and pos == "ALL")
-    overall_players_ui = []; free_agents_ui = []; teams_block = []
-    if show_sections:
-        overall_players_ui = [ui_player(p, _dev_to_label) for p in sorted(all_players, key=sort_key, reverse=True)[:100]]
-        fa_list = sorted([p for p in all_players if is_fa(p)], key=sort_key, reverse=True)
-        free_agents_ui = [ui_player(p, _dev_to_label) for p in fa_list]
-
-        from collections import defaultdict
-        grouped = defaultdict(list)
-        for p in all_players:
-            if not is_fa(p):
-                grouped[str(p.get("teamId"))].append(p)
-        for tid, plist in grouped.items():
-            plist.sort(key=sort_key, reverse=True)
-            tname = teams.get(tid, {}).get("name", f"Team {tid}")
-            teams_block.append({"teamId": tid, "teamName": tname,
-                                "players": [ui_player(p, _dev_to_label) for p in plist]})
-        teams_block.sort(key=lambda t: (t["players"][0].get("ovr") or 0) if t["players"] else 0, reverse=True)
-
     # show search only on NFL + Overall
     show_search = (team == "NFL" and pos == "ALL")
 
-    # minimal search index (names only is enough for a friendly typeahead)
-    search_index = []
-    if show_search:
-        def _pname(p): return p.get("playerName") or p.get("name") or ""
-
-        search_index = [{"name": _pname(p)} for p in all_players if _pname(p)]
+    overall_players_ui = []; free_agents_ui = []; teams_block = []; search_index = []
+    if show_sections:
+        sections = _roster_sections(idx)
+        overall_players_ui = sections["overall_players"]
+        free_agents_ui = sections["free_agents"]
+        teams_block = sections["teams_block"]
+        search_index = sections["search_index"]
 
     show_team_logos = (team == "NFL")
 
@@ -3415,6 +3848,7 @@ def build_schedule_id_fallback_map(league_id: str, parsed_schedule: list) -> dic
     return fallback
 
 @app.route('/schedule')
+@generation_cached(week_deps())
 def show_schedule():
     league_id = request.args.get("league") or league_data.get("latest_league") or "26969931"
 
@@ -3499,6 +3933,7 @@ def show_schedule():
 
 
 @app.route("/standings")
+@generation_cached(league_deps())
 def show_standings():
     try:
         league_id = request.args.get("league") or league_data.get("latest_league") or DEFAULT_LEAGUE_ID
@@ -3734,6 +4169,14 @@ def streamers_hub():
 
 import os
 
+# The parse pool's forkserver imports this script again as __mp_main__ (python
+# madden_flask_app.py): it must not replay spools or run jobs there.
+if __name__ != "__mp_main__":
+    # ♻️ Replay webhooks spooled by a worker that died mid-export (module fully loaded now)
+    recover_spooled_jobs()
+    # ♻️ Requeue background jobs a dead worker was running; start the job workers
+    recover_jobs()
+
 if __name__ == '__main__':
     debug_mode = os.environ.get("FLASK_DEBUG", "0") == "1"
     app.run(host='0.0.0.0', port=5000, debug=debug_mode)
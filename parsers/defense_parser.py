@@ -2,6 +2,10 @@
 
 import json, os
 
+from services.stats_store import store_week_rows
+from services.season_totals import update_season_totals
+from services.parse_pool import run_in_pool, write_artifacts
+
 # ✅ Include the "def*" keys from your export
 DEF_KEYS = {
     "playerId":    ["playerId", "rosterId", "id"],
@@ -104,15 +108,24 @@ def _norm_one(r: dict) -> dict:
         "points": pts,
     }
 
-def parse_defense_stats(league_id: str, payload: dict, out_dir: str):
+def defense_artifacts(payload: dict, out_dir: str) -> dict:
+    """Pure half of parse_defense_stats (runs in the parse pool): rows + parsed_defense.json text."""
     items = payload.get("playerDefensiveStatInfoList") or payload.get("items") or []
     rows  = [_norm_one(p) for p in items]
 
     # Sort: INTs → Sacks → Tackles → PD → FF (tweak to taste)
     rows.sort(key=lambda r: (r["ints"], r["sacks"], r["tackles"], r["pd"], r["ff"]), reverse=True)
 
-    os.makedirs(out_dir, exist_ok=True)
     out_path = os.path.join(out_dir, "parsed_defense.json")
-    with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(rows, f, indent=2)
-    print(f"🛡️ Wrote parsed defense → {out_path} (rows={len(rows)})")
+    return {"files": {out_path: json.dumps(rows, indent=2)}, "rows": rows}
+
+def parse_defense_stats(league_id: str, payload: dict, out_dir: str):
+    art = run_in_pool(defense_artifacts, payload, out_dir)
+    rows = art["rows"]
+
+    os.makedirs(out_dir, exist_ok=True)
+    write_artifacts(art["files"])
+    print(f"🛡️ Wrote parsed defense → {os.path.join(out_dir, 'parsed_defense.json')} (rows={len(rows)})")
+
+    store_week_rows("defense", out_dir, rows)
+    update_season_totals("defense", out_dir, rows)
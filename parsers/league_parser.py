@@ -1,6 +1,9 @@
 import os
 import json
 
+from services.stats_store import store_league_info, period_from_folder
+from services.parse_pool import write_artifacts
+
 def parse_league_info_data(data, subpath, output_folder):
     print(f"📘 Parsing league info data from {subpath}")
 
@@ -9,6 +12,25 @@ def parse_league_info_data(data, subpath, output_folder):
         print("⚠️ No teamInfoList found in data.")
         return
 
+    art = league_info_artifacts(data, output_folder)
+    team_map_path, parsed_league_info_path = art["files"]
+
+    # team_map.json (for mapping lookups), then parsed_league_info.json (for /teams page)
+    write_artifacts(art["files"])
+    print(f"✅ Saved cleaned team map to {team_map_path}")
+    print(f"✅ Saved parsed league info to {parsed_league_info_path}")
+
+    store_league_info(
+        period_from_folder(output_folder)[0],
+        art["info"],
+        art["team_map"],
+    )
+
+
+def league_info_artifacts(data, output_folder) -> dict:
+    """Pure half of parse_league_info_data (reparse.py runs it in a process pool): team_map.json + parsed_league_info.json text."""
+    team_info = data.get("teamInfoList") or data.get("leagueTeamInfoList") or []
+
     # ✅ Try loading capAvailable and calendarYear from parsed_standings.json
     standings_lookup = {}
     calendar_year = data.get("calendarYear")
@@ -73,20 +95,15 @@ def parse_league_info_data(data, subpath, output_folder):
             **team_data
         })
 
-    # Save team_map.json (for mapping lookups)
-    league_id = subpath.split('/')[1] if len(subpath.split('/')) > 1 else "unknown_league"
     league_root = os.path.join(output_folder, "..", "..")
     team_map_path = os.path.abspath(os.path.join(league_root, "team_map.json"))
-    os.makedirs(os.path.dirname(team_map_path), exist_ok=True)
-    with open(team_map_path, "w") as f:
-        json.dump(team_map, f, indent=4)
-    print(f"✅ Saved cleaned team map to {team_map_path}")
-
-    # Save parsed_league_info.json (for /teams page)
     parsed_league_info_path = os.path.join(output_folder, "parsed_league_info.json")
-    with open(parsed_league_info_path, "w") as f:
-        json.dump({
-            "calendarYear": calendar_year,
-            "leagueTeamInfoList": league_info_list
-        }, f, indent=2)
-    print(f"✅ Saved parsed league info to {parsed_league_info_path}")
+    info = {"calendarYear": calendar_year, "leagueTeamInfoList": league_info_list}
+    return {
+        "files": {
+            team_map_path: json.dumps(team_map, indent=4),
+            parsed_league_info_path: json.dumps(info, indent=2),
+        },
+        "info": info,
+        "team_map": team_map,
+    }
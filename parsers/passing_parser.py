@@ -2,11 +2,27 @@ import os
 import json
 from datetime import datetime
 
+from services.stats_store import store_week_rows
+from services.season_totals import update_season_totals
+from services.parse_pool import run_in_pool, write_artifacts
+
 def parse_passing_stats(subpath, data, upload_folder):
     if "playerPassingStatInfoList" not in data:
         print("⚠️ No passing stats found")
         return None
 
+    art = run_in_pool(passing_artifacts, data, upload_folder)
+    write_artifacts(art["files"])
+    print(f"🌐 Shared passing stats updated at {os.path.join(upload_folder, 'passing.json')}")
+
+    store_week_rows("passing", upload_folder, art["rows"])
+    update_season_totals("passing", upload_folder, art["rows"])
+
+    return None  # output_path
+
+
+def passing_artifacts(data, upload_folder) -> dict:
+    """Pure half of parse_passing_stats (runs in the parse pool): rows + passing.json text."""
     # Try to load league info for team name mapping
     league_path = os.path.join(upload_folder, "league.json")
     if os.path.exists(league_path):
@@ -21,6 +37,7 @@ def parse_passing_stats(subpath, data, upload_folder):
         team_id = player.get("teamId")
         parsed.append({
             "teamId": player.get("teamId"),
+            "rosterId": player.get("rosterId"),
             "name": player.get("fullName"),
             "passYds": player.get("passYds", 0),
             "passComp": player.get("passComp", 0),
@@ -46,8 +63,7 @@ def parse_passing_stats(subpath, data, upload_folder):
 
     # Save shared version for website (/stats route)
     shared_path = os.path.join(upload_folder, "passing.json")
-    with open(shared_path, "w") as f:
-        json.dump({"playerPassingStatInfoList": parsed}, f, indent=2)
-    print(f"🌐 Shared passing stats updated at {shared_path}")
-
-    return None  # output_path
+    return {
+        "files": {shared_path: json.dumps({"playerPassingStatInfoList": parsed}, indent=2)},
+        "rows": parsed,
+    }
@@ -3,7 +3,22 @@
 import json
 import os
 
+from services.stats_store import store_week_rows
+from services.season_totals import update_season_totals
+from services.parse_pool import run_in_pool, write_artifacts
+
 def parse_rushing_stats(league_id, data, output_folder):
+    art = run_in_pool(rushing_artifacts, data, output_folder)
+    write_artifacts(art["files"])
+
+    print(f"✅ Parsed rushing stats saved to {os.path.join(output_folder, 'parsed_rushing.json')}")
+
+    store_week_rows("rushing", output_folder, art["rows"])
+    update_season_totals("rushing", output_folder, art["rows"])
+
+
+def rushing_artifacts(data, output_folder) -> dict:
+    """Pure half of parse_rushing_stats (runs in the parse pool): rows + parsed_rushing.json text."""
     rushing_list = data.get("playerRushingStatInfoList", [])
     parsed = []
 
@@ -31,7 +46,4 @@ def parse_rushing_stats(league_id, data, output_folder):
     parsed.sort(key=lambda x: x.get("rushYds", 0), reverse=True)
 
     output_path = os.path.join(output_folder, "parsed_rushing.json")
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(parsed, f, indent=2)
-
-    print(f"✅ Parsed rushing stats saved to {output_path}")
+    return {"files": {output_path: json.dumps(parsed, indent=2)}, "rows": parsed}
@@ -2,7 +2,17 @@ import os
 import json
 from datetime import datetime
 
+from services.parse_pool import write_artifacts
+
 def parse_schedule_data(data, subpath, upload_folder):
+    art = schedule_artifacts(data, upload_folder)
+    write_artifacts(art["files"])
+
+    print(f"✅ Parsed schedule data saved to {os.path.join(upload_folder, 'parsed_schedule.json')}")
+
+
+def schedule_artifacts(data, upload_folder) -> dict:
+    """Pure half of parse_schedule_data (reparse.py runs it in a process pool): rows + parsed_schedule.json text."""
     parsed = []
     for game in data.get("gameScheduleInfoList", []):
         parsed.append({
@@ -18,7 +28,4 @@ def parse_schedule_data(data, subpath, upload_folder):
         })
 
     filename = os.path.join(upload_folder, "parsed_schedule.json")
-    with open(filename, "w") as f:
-        json.dump(parsed, f, indent=2)
-
-    print(f"✅ Parsed schedule data saved to {filename}")
+    return {"files": {filename: json.dumps(parsed, indent=2)}, "rows": parsed}
@@ -0,0 +1,293 @@
+"""
+Rebuild every parsed_* file from the raw exports already under uploads/.
+
+    python reparse.py                                  # all leagues, one process per CPU
+    python reparse.py --league 17287266 --dry-run      # what would change, nothing written
+    python reparse.py --diff --dry-run                 # ... with a unified diff per changed file
+    python reparse.py --workers 8 --json bench/reparse.json
+
+Use it after a parser change: walks uploads/<league>/season_*/* and feeds
+each raw file to the pure half of its parser (the *_artifacts functions the
+ingest path and the parse pool use) across a process pool:
+
+    season_global/week_global   standings.json  league.json (after standings; it reads parsed_standings.json)
+    season_*/week_*, pre_*      rushing.json  defense.json  schedule.json  passing.json
+
+passing.json is rewritten in place by its parser, so it is only reparsed
+while it still holds raw rows (fullName); a parsed one is reported as
+skipped. receiving has no parsed file.
+
+This process writes the results (atomically, under the league write lock,
+so it is safe next to a running app), replays the parsers' stateful steps
+(stats store, season totals), bumps the generation counter of every changed
+folder (ETags, page cache), records the new input hashes in the build
+state and queues one "derived_rebuild" job per changed folder, which the
+running app picks up to refresh power rankings and game summaries
+(--no-derived to skip). Reported: files/s and MB/s of raw input, plus
+changed / unchanged / new outputs.
+
+Exit status 1 if any file failed to parse.
+"""
+import argparse
+import difflib
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from config import UPLOAD_FOLDER
+from parsers.passing_parser import passing_artifacts
+from parsers.rushing_parser import rushing_artifacts
+from parsers.defense_parser import defense_artifacts
+from parsers.schedule_parser import schedule_artifacts
+from parsers.standings_parser import standings_artifacts
+from parsers.league_parser import league_info_artifacts
+
+GLOBAL = ("season_global", "week_global")
+WEEK_DIR = re.compile(r"^(week|pre)_\d+$")
+DIFF_MAX_LINES = 80
+
+# raw file -> pure parser; global files in this order (league info reads parsed standings)
+GLOBAL_FILES = {"standings.json": standings_artifacts, "league.json": league_info_artifacts}
+WEEK_FILES = {
+    "rushing.json": rushing_artifacts,
+    "defense.json": defense_artifacts,
+    "schedule.json": schedule_artifacts,
+    "passing.json": passing_artifacts,
+}
+STAT_CATEGORY = {"passing.json": "passing", "rushing.json": "rushing", "defense.json": "defense"}
+
+
+def find_tasks(uploads: str, leagues=None) -> list[dict]:
+    tasks = []
+    for league_id in sorted(os.listdir(uploads)):
+        root = os.path.join(uploads, league_id)
+        if leagues and league_id not in leagues:
+            continue
+        if not os.path.isdir(root):
+            continue
+        for season_dir in sorted(d for d in os.listdir(root) if d.startswith("season_")):
+            for week_dir in sorted(os.listdir(os.path.join(root, season_dir))):
+                folder = os.path.join(root, season_dir, week_dir)
+                if (season_dir, week_dir) == GLOBAL:
+                    files = GLOBAL_FILES
+                elif WEEK_DIR.match(week_dir) and season_dir != GLOBAL[0]:
+                    files = WEEK_FILES
+                else:
+                    continue
+                for raw in files:
+                    path = os.path.join(folder, raw)
+                    if os.path.isfile(path):
+                        tasks.append({"league_id": league_id, "season_dir": season_dir,
+                                      "week_dir": week_dir, "folder": folder, "raw": raw, "path": path})
+    return tasks
+
+
+def reparse_one(task: dict) -> dict:
+    """Runs in a pool process: raw file -> {"files": {path: text}, ...} (nothing written)."""
+    st = time.perf_counter()
+    out = {"in_bytes": os.path.getsize(task["path"])}
+    try:
+        with open(task["path"], "r", encoding="utf-8") as f:
+            data = json.load(f)
+        raw = task["raw"]
+        if raw == "passing.json":
+            rows = data.get("playerPassingStatInfoList") or []
+            if rows and "fullName" not in rows[0] and "name" in rows[0]:
+                out["skipped"] = "already parsed in place"
+        elif raw == "standings.json" and not data.get("teamStandingInfoList"):
+            out["skipped"] = "no teamStandingInfoList"
+        elif raw == "league.json" and not (data.get("teamInfoList") or data.get("leagueTeamInfoList")):
+            out["skipped"] = "no teamInfoList"
+        if "skipped" not in out:
+            fn = GLOBAL_FILES.get(raw) or WEEK_FILES[raw]
+            with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+                out.update(fn(data, task["folder"]))
+            if raw == "standings.json":
+                out["raw_rows"] = data["teamStandingInfoList"]   # store_standings keeps both
+    except Exception as e:
+        out["error"] = f"{type(e).__name__}: {e}"
+    out["sec"] = time.perf_counter() - st
+    return out
+
+
+def _read_text(path: str):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _print_diff(old: str, new: str, rel: str):
+    lines = list(difflib.unified_diff(
+        old.splitlines(keepends=True), new.splitlines(keepends=True),
+        fromfile=f"{rel} (on disk)", tofile=f"{rel} (reparsed)",
+    ))
+    for ln in lines[:DIFF_MAX_LINES]:
+        sys.stdout.write(ln if ln.endswith("\n") else ln + "\n")
+    if len(lines) > DIFF_MAX_LINES:
+        print(f"   ... {len(lines) - DIFF_MAX_LINES} more diff lines")
+
+
+def apply_result(task: dict, res: dict, uploads: str):
+    """Write one result the way the parser would have, in this process."""
+    from services.parse_pool import write_artifacts
+    from services.stats_store import store_week_rows, store_standings, store_league_info, period_from_folder
+    from services.season_totals import update_season_totals
+    from services.build_graph import mark_fresh
+
+    raw, folder = task["raw"], task["folder"]
+    write_artifacts(res["files"])
+    if raw in STAT_CATEGORY:
+        store_week_rows(STAT_CATEGORY[raw], folder, res["rows"])
+        update_season_totals(STAT_CATEGORY[raw], folder, res["rows"])
+    elif raw == "standings.json":
+        store_standings(period_from_folder(folder)[0], raw_rows=res["raw_rows"], parsed_rows=res["rows"])
+    elif raw == "league.json":
+        store_league_info(period_from_folder(folder)[0], res["info"], res["team_map"])
+    mark_fresh(uploads, task["league_id"], task["season_dir"], task["week_dir"], raw)
+
+
+def run(uploads: str, leagues, workers: int, dry_run: bool, show_diff: bool, derived: bool) -> dict:
+    from services.league_locks import league_lock
+
+    tasks = find_tasks(uploads, leagues)
+    # league info reads parsed_standings.json: it goes in a second round, after standings are written
+    rounds = [[t for t in tasks if t["raw"] != "league.json"], [t for t in tasks if t["raw"] == "league.json"]]
+
+    counts = {"files": 0, "in_bytes": 0, "out_bytes": 0, "changed": 0, "unchanged": 0, "new": 0,
+              "skipped": 0, "failed": 0}
+    per_kind = {}
+    errors, skipped = [], []
+    touched = set()      # (league, season_dir, week_dir) with a changed output
+    parse_sec = 0.0
+
+    st = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        for batch in rounds:
+            for task, res in zip(batch, ex.map(reparse_one, batch, chunksize=4)):
+                rel = os.path.relpath(task["path"], uploads)
+                k = per_kind.setdefault(task["raw"], {"files": 0, "changed": 0, "sec": 0.0})
+                counts["files"] += 1
+                counts["in_bytes"] += res["in_bytes"]
+                parse_sec += res["sec"]
+                k["files"] += 1
+                k["sec"] = round(k["sec"] + res["sec"], 4)
+                if "error" in res:
+                    counts["failed"] += 1
+                    errors.append(f"{rel}: {res['error']}")
+                    continue
+                if "skipped" in res:
+                    counts["skipped"] += 1
+                    skipped.append(f"{rel}: {res['skipped']}")
+                    continue
+
+                changed = False
+                for path, text in res["files"].items():
+                    counts["out_bytes"] += len(text)
+                    old = _read_text(path)
+                    out_rel = os.path.relpath(path, uploads)
+                    if old is None:
+                        counts["new"] += 1
+                        changed = True
+                        print(f"   + {out_rel}")
+                    elif old != text:
+                        counts["changed"] += 1
+                        changed = True
+                        print(f"   ~ {out_rel}")
+                        if show_diff:
+                            _print_diff(old, text, out_rel)
+                    else:
+                        counts["unchanged"] += 1
+                if changed:
+                    k["changed"] += 1
+                    touched.add((task["league_id"], task["season_dir"], task["week_dir"]))
+                if not dry_run:
+                    with league_lock(task["league_id"], uploads):
+                        apply_result(task, res, uploads)
+    wall = time.perf_counter() - st
+
+    if not dry_run:
+        # /stats, /schedule ETags and cached pages hang off the folder's generation counter
+        from services.generation import bump_generation
+        for league_id, season_dir, week_dir in sorted(touched):
+            bump_generation(league_id, os.path.join(uploads, league_id, season_dir, week_dir))
+
+    queued = 0
+    if derived and not dry_run and touched:
+        from services.job_queue import enqueue_job
+        for league_id, season_dir, week_dir in sorted(touched):
+            enqueue_job(
+                "derived_rebuild",
+                {"upload_folder": uploads, "league_id": league_id, "season_dir": season_dir, "week_dir": week_dir},
+                key=f"derived_rebuild:{league_id}:{season_dir}:{week_dir}",
+                event="reparse",
+            )
+            queued += 1
+
+    return {
+        "uploads": uploads,
+        "workers": workers,
+        "dry_run": dry_run,
+        **counts,
+        "wall_sec": round(wall, 3),
+        "parse_sec": round(parse_sec, 3),
+        "files_per_sec": round(counts["files"] / wall, 1) if wall else None,
+        "mb_per_sec": round(counts["in_bytes"] / 1e6 / wall, 2) if wall else None,
+        "per_kind": per_kind,
+        "derived_jobs": queued,
+        "skipped_files": skipped,
+        "errors": errors,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--uploads", default=UPLOAD_FOLDER, help="upload tree (default: %(default)s)")
+    ap.add_argument("--league", action="append", help="only this league (repeatable)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="parse processes")
+    ap.add_argument("--dry-run", action="store_true", help="parse and compare, write nothing")
+    ap.add_argument("--diff", action="store_true", help="print a unified diff for every changed file")
+    ap.add_argument("--no-derived", action="store_true", help="don't queue derived_rebuild jobs")
+    ap.add_argument("--json", help="also write the report to this JSON file")
+    args = ap.parse_args()
+
+    if not os.path.isdir(args.uploads):
+        sys.exit(f"❌ No upload tree at {args.uploads}")
+
+    print(f"🔁 Reparsing {args.uploads} with {args.workers} worker(s){' (dry run)' if args.dry_run else ''}")
+    r = run(args.uploads, set(args.league or ()), max(1, args.workers), args.dry_run, args.diff,
+            not args.no_derived)
+
+    print(f"   {r['files']} raw files, {r['in_bytes'] / 1e6:.1f} MB in {r['wall_sec']:.2f}s: "
+          f"{r['files_per_sec']} files/s, {r['mb_per_sec']} MB/s (parse {r['parse_sec']:.2f}s summed)")
+    for raw, k in sorted(r["per_kind"].items()):
+        print(f"   {raw:<15} files={k['files']:<5} changed={k['changed']:<5} parse={k['sec']:.2f}s")
+    verb = "would be written" if args.dry_run else "written"
+    print(f"   outputs {verb}: changed={r['changed']} new={r['new']} unchanged={r['unchanged']}; "
+          f"skipped={r['skipped']} failed={r['failed']}")
+    for s in r["skipped_files"][:20]:
+        print(f"   ⏭️ {s}")
+    if r["derived_jobs"]:
+        print(f"   🔧 Queued {r['derived_jobs']} derived_rebuild job(s) for the running app")
+    for e in r["errors"]:
+        print(f"   ❌ {e}")
+
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(r, f, indent=2)
+        print(f"💾 Report written to {args.json}")
+
+    sys.exit(1 if r["errors"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+Replay captured webhooks (services/capture_log.py) against a running server.
+
+    python replay_webhooks.py                              # original inter-arrival times
+    python replay_webhooks.py --speed 10                   # 10x faster than recorded
+    python replay_webhooks.py --speed 0 --concurrency 16   # as fast as 16 senders can go
+    python replay_webhooks.py --filter roster --json out/replay.json
+
+Captures are streamed in arrival order (segments from different workers are
+merged by timestamp), earlier replays are skipped. Every request carries
+X-Replay: 1. After the last send the tool waits for the ingest queue to drain
+and for parsed_rosters.json and the derived artifacts under --uploads to stop
+changing, then prints per-endpoint latency percentiles, errors and the
+end-to-end time until everything settled.
+"""
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+
+import requests
+
+from services.capture_log import capture_segments, iter_capture
+
+ROSTER_DEBOUNCE_SEC = float(os.getenv("ROSTER_DEBOUNCE_SEC", "10.0"))
+
+# capture log + ingest spool change on every hit; they aren't derived artifacts
+SKIP_DIRS = {"_capture", ".ingest_queue"}
+
+
+def endpoint_of(subpath: str) -> str:
+    parts = [p for p in (subpath or "").split("/") if p]
+    if not parts:
+        return "(root)"
+    if "freeagents" in parts:
+        return "freeagents"
+    return parts[-1]
+
+
+def percentile(values: list[float], pct: float) -> float | None:
+    if not values:
+        return None
+    s = sorted(values)
+    k = min(len(s) - 1, max(0, round(pct / 100 * (len(s) - 1))))
+    return s[k]
+
+
+def latest_artifact(uploads: str) -> tuple[float, float]:
+    """(newest mtime of any artifact, mtime of the newest parsed_rosters.json)."""
+    newest, rosters = 0.0, 0.0
+    for root, dirs, files in os.walk(uploads):
+        dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+        for fn in files:
+            if fn.endswith(".tmp"):
+                continue
+            try:
+                mt = os.path.getmtime(os.path.join(root, fn))
+            except OSError:
+                continue
+            newest = max(newest, mt)
+            if fn == "parsed_rosters.json":
+                rosters = max(rosters, mt)
+    return newest, rosters
+
+
+class Replayer:
+    def __init__(self, url: str, concurrency: int, timeout: float):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.jobs: "queue.Queue[dict | None]" = queue.Queue(maxsize=concurrency * 4)
+        self.lock = threading.Lock()
+        self.latency = defaultdict(list)      # {endpoint: [seconds]}
+        self.errors = defaultdict(int)        # {endpoint: count}
+        self.status = defaultdict(int)        # {status code: count}
+        self.sent = 0
+        self.threads = [threading.Thread(target=self._sender, daemon=True) for _ in range(concurrency)]
+        for t in self.threads:
+            t.start()
+
+    def _sender(self):
+        session = requests.Session()
+        while True:
+            rec = self.jobs.get()
+            if rec is None:
+                return
+            subpath = rec.get("subpath") or ""
+            ep = endpoint_of(subpath)
+            headers = {
+                "Content-Type": (rec.get("headers") or {}).get("Content-Type", "application/json"),
+                "X-Replay": "1",
+            }
+            body = (rec.get("body") or "").encode("utf-8")
+            st = time.perf_counter()
+            try:
+                r = session.post(f"{self.url}/webhook/{subpath}", data=body, headers=headers, timeout=self.timeout)
+                code = r.status_code
+            except Exception as e:
+                code = type(e).__name__
+            took = time.perf_counter() - st
+            with self.lock:
+                self.sent += 1
+                self.latency[ep].append(took)
+                self.status[code] += 1
+                if not (isinstance(code, int) and 200 <= code < 300):
+                    self.errors[ep] += 1
+
+    def submit(self, rec: dict):
+        self.jobs.put(rec)
+
+    def close(self):
+        for _ in self.threads:
+            self.jobs.put(None)
+        for t in self.threads:
+            t.join()
+
+
+def wait_settled(url: str, uploads: str | None, started: float, quiet: float, expect_rosters: bool,
+                 limit: float) -> dict:
+    """Ingest queue idle + no artifact written for `quiet` seconds (and rosters flushed, if any were sent)."""
+    deadline = time.time() + limit
+    idle_at = None
+    while time.time() < deadline:
+        try:
+            s = requests.get(f"{url}/api/health/ingest", timeout=5).json()
+            busy = s.get("depth", 0) > 0 or bool(s.get("active"))
+        except Exception:
+            busy = True
+        if busy:
+            idle_at = None
+            time.sleep(0.2)
+            continue
+        if idle_at is None:
+            idle_at = time.time()
+
+        if not uploads:
+            return {"settled": True, "queue_idle_sec": round(idle_at - started, 3)}
+
+        newest, rosters = latest_artifact(uploads)
+        rosters_ok = (not expect_rosters) or rosters >= started
+        if rosters_ok and time.time() - max(newest, idle_at) >= quiet:
+            return {
+                "settled": True,
+                "queue_idle_sec": round(idle_at - started, 3),
+                "parsed_rosters_sec": round(rosters - started, 3) if rosters >= started else None,
+                "last_artifact_sec": round(newest - started, 3) if newest >= started else None,
+            }
+        time.sleep(0.5)
+    return {"settled": False}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--url", default=os.getenv("REPLAY_URL", "http://localhost:5000"))
+    ap.add_argument("--capture-dir", help="capture segments to replay (default: the app's capture dir)")
+    ap.add_argument("--filter", help="only replay subpaths containing this text")
+    ap.add_argument("--speed", type=float, default=1.0,
+                    help="time scale for recorded gaps (2 = twice as fast, 0 = no gaps)")
+    ap.add_argument("--concurrency", type=int, default=4, help="parallel senders")
+    ap.add_argument("--limit", type=int, default=0, help="stop after this many webhooks")
+    ap.add_argument("--timeout", type=float, default=60.0, help="per-request timeout (sec)")
+    ap.add_argument("--uploads", default="uploads",
+                    help="uploads folder to watch for settle ('' = queue only, e.g. remote server)")
+    ap.add_argument("--quiet", type=float, default=ROSTER_DEBOUNCE_SEC + 2.0,
+                    help="seconds without artifact writes that count as settled")
+    ap.add_argument("--settle-timeout", type=float, default=600.0)
+    ap.add_argument("--json", help="also write the report to this JSON file")
+    args = ap.parse_args()
+
+    paths = capture_segments(args.capture_dir)
+    if not paths:
+        print("No capture segments found.")
+        return
+    uploads = args.uploads if args.uploads and os.path.isdir(args.uploads) else None
+
+    rp = Replayer(args.url, max(1, args.concurrency), args.timeout)
+    lag = []                       # actual dispatch time - scheduled time
+    first_ts = last_ts = None
+    saw_rosters = False
+    n = 0
+
+    print(f"📦 Replaying {len(paths)} segment(s) → {args.url} (speed={args.speed or 'max'}, concurrency={args.concurrency})")
+    started = time.time()
+    t0 = time.perf_counter()
+    for rec in iter_capture(include_replays=False, paths=paths):
+        if args.filter and args.filter not in (rec.get("subpath") or ""):
+            continue
+        if args.limit and n >= args.limit:
+            break
+        ts = rec.get("ts") or 0.0
+        if first_ts is None:
+            first_ts = ts
+        last_ts = ts
+        if args.speed > 0:
+            due = t0 + (ts - first_ts) / args.speed
+            wait = due - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+            lag.append(max(0.0, time.perf_counter() - due))
+        if endpoint_of(rec.get("subpath")) in ("roster", "freeagents"):
+            saw_rosters = True
+        rp.submit(rec)
+        n += 1
+    rp.close()
+    send_sec = time.perf_counter() - t0
+    print(f"📤 Sent {n} webhook(s) in {send_sec:.2f}s, waiting for ingest to settle...")
+
+    settle = wait_settled(args.url, uploads, started, args.quiet, saw_rosters, args.settle_timeout)
+
+    endpoints = {}
+    for ep, vals in sorted(rp.latency.items()):
+        endpoints[ep] = {
+            "count": len(vals),
+            "errors": rp.errors.get(ep, 0),
+            "p50_ms": round(percentile(vals, 50) * 1000, 1),
+            "p90_ms": round(percentile(vals, 90) * 1000, 1),
+            "p99_ms": round(percentile(vals, 99) * 1000, 1),
+            "max_ms": round(max(vals) * 1000, 1),
+        }
+    report = {
+        "url": args.url,
+        "segments": len(paths),
+        "webhooks": n,
+        "speed": args.speed,
+        "concurrency": args.concurrency,
+        "send_sec": round(send_sec, 3),
+        "recorded_span_sec": round(last_ts - first_ts, 3) if first_ts is not None else None,
+        "schedule_lag_p99_ms": round(percentile(lag, 99) * 1000, 1) if lag else None,
+        "status": {str(k): v for k, v in rp.status.items()},
+        "errors": sum(rp.errors.values()),
+        "endpoints": endpoints,
+        **settle,
+    }
+
+    print(f"\n{'endpoint':<14}{'n':>6}{'err':>6}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for ep, e in endpoints.items():
+        print(f"{ep:<14}{e['count']:>6}{e['errors']:>6}{e['p50_ms']:>10}{e['p90_ms']:>10}{e['p99_ms']:>10}{e['max_ms']:>10}")
+    if report["schedule_lag_p99_ms"] is not None:
+        print(f"⏱️ Dispatch lag p99: {report['schedule_lag_p99_ms']} ms")
+    if settle.get("settled"):
+        print(f"✅ Settled: queue idle at {settle.get('queue_idle_sec')}s, "
+              f"parsed_rosters at {settle.get('parsed_rosters_sec')}s, "
+              f"last artifact at {settle.get('last_artifact_sec')}s")
+    else:
+        print("⚠️ Did not settle before --settle-timeout")
+
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+# build_graph.py
+"""
+Derived files and what they are built from.
+
+    rebuild_stale(upload_folder, league_id, "season_0", "week_3")     # the "derived_rebuild" job
+    mark_fresh(upload_folder, league_id, "season_0", "week_3", "defense.json")   # ingest parsed it inline
+
+Every artifact declares its inputs (paths under the league's upload tree)
+and a builder. After a build the sha256 of each input is stored next to the
+outputs, in <output dir>/_build_state.json; an artifact is stale when an
+input hash differs from the stored one (or it was never built). A rebuild
+looks at the artifacts of one folder scope and rebuilds only the stale ones,
+in topological order: artifacts whose inputs don't depend on each other run
+side by side on BUILD_GRAPH_THREADS threads (their parse steps go through the
+parse pool). A failed artifact keeps its old state, skips everything
+downstream of it for this round, and makes rebuild_stale() raise so the job
+is retried.
+
+    {league}  uploads/<league>
+    {global}  uploads/<league>/season_global/week_global
+    {week}    uploads/<league>/<season>/<week>
+
+The ingest path still parses a payload inline (it has the data in memory and
+feeds the stats store); mark_fresh() then records those first-level
+artifacts as built so the rebuild that follows only touches what lies
+downstream of them.
+
+Every level that built something bumps the generation counter of the
+folders it wrote (services/generation.py), so cached pages and ETags follow.
+
+Callers hold the league write lock (services/league_locks.py); builders
+don't take it themselves, they run on helper threads of the holder.
+"""
+import os
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import sha256
+from time import time, perf_counter
+
+from parsers.standings_parser import parse_standings_data
+from parsers.league_parser import parse_league_info_data
+from parsers.schedule_parser import parse_schedule_data
+from parsers.rushing_parser import parse_rushing_stats
+from parsers.defense_parser import parse_defense_stats
+from services.summary_service import generate_week_summaries_if_ready
+from services.power_rankings import rebuild_power_rankings
+from services.shared_state import get_shared_state
+from services.parse_pool import write_artifacts
+from services.generation import bump_generation
+
+BUILD_GRAPH_THREADS = int(os.getenv("BUILD_GRAPH_THREADS", "2"))
+# week stats arrive as a burst of posts; one rebuild of the folder after the last one
+DERIVED_REBUILD_DELAY_SEC = float(os.getenv("DERIVED_REBUILD_DELAY_SEC", "1"))
+BUILD_STATE = "_build_state.json"
+GLOBAL = ("season_global", "week_global")
+
+_lock = threading.Lock()
+_state_locks = {}    # {state file: Lock}
+_hashes = {}         # {path: (mtime_ns, size, sha256)}
+_executor = None
+_stats = {}          # {artifact: {"built", "skipped", "failed", "sec"}}
+
+
+class Artifact:
+    def __init__(self, name, outputs, inputs, build, optional=(), on_ingest=None,
+                 when=None, output_required=True):
+        self.name = name
+        self.outputs = list(outputs)
+        self.inputs = list(inputs)          # all must exist to build
+        self.optional = list(optional)      # hashed when present
+        self.build = build                  # build(ctx)
+        self.on_ingest = on_ingest          # raw file whose ingest parse builds this inline
+        self.when = when                    # ctx -> bool
+        self.output_required = output_required
+        self.scope = "week" if any("{week}" in p for p in self.outputs) else "global"
+
+
+def _load(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _build_standings(ctx):
+    parse_standings_data(_load(os.path.join(ctx["global"], "standings.json")), _subpath(ctx, "standings"), ctx["global"])
+
+
+def _build_league_info(ctx):
+    parse_league_info_data(_load(os.path.join(ctx["global"], "league.json")), _subpath(ctx, "leagueteams"), ctx["global"])
+
+
+def _build_power_rankings(ctx):
+    # season/week label the rankings; same source as the ingest job used (the latest pointer)
+    ptr = get_shared_state().kv_get_many(("latest_league", "latest_season", "latest_week"))
+    mine = str(ptr.get("latest_league")) == ctx["league_id"]
+    rebuild_power_rankings(
+        ctx["upload_folder"], ctx["league_id"],
+        ptr.get("latest_season") if mine else None,
+        ptr.get("latest_week") if mine else None,
+    )
+
+
+def _build_schedule(ctx):
+    parse_schedule_data(_load(os.path.join(ctx["week"], "schedule.json")), _subpath(ctx, "schedules"), ctx["week"])
+
+
+def _build_rushing(ctx):
+    parse_rushing_stats(ctx["league_id"], _load(os.path.join(ctx["week"], "rushing.json")), ctx["week"])
+
+
+def _build_defense(ctx):
+    parse_defense_stats(ctx["league_id"], _load(os.path.join(ctx["week"], "defense.json")), ctx["week"])
+
+
+def _build_summaries(ctx):
+    generate_week_summaries_if_ready(ctx["league_id"], ctx["season_dir"], ctx["week_dir"], ctx["upload_folder"])
+
+
+ARTIFACTS = [
+    Artifact("parsed_standings", ["{global}/parsed_standings.json"], ["{global}/standings.json"],
+             _build_standings, on_ingest="standings.json"),
+    Artifact("parsed_league_info", ["{global}/parsed_league_info.json", "{league}/team_map.json"],
+             ["{global}/league.json"], _build_league_info,
+             optional=["{global}/parsed_standings.json"], on_ingest="league.json"),
+    Artifact("power_rankings", ["{league}/power_rankings.json"],
+             ["{global}/parsed_league_info.json", "{global}/parsed_standings.json"], _build_power_rankings,
+             optional=["{global}/standings.json", "{league}/team_map.json"]),
+    Artifact("parsed_schedule", ["{week}/parsed_schedule.json"], ["{week}/schedule.json"],
+             _build_schedule, on_ingest="schedule.json"),
+    Artifact("parsed_rushing", ["{week}/parsed_rushing.json"], ["{week}/rushing.json"],
+             _build_rushing, on_ingest="rushing.json"),
+    Artifact("parsed_defense", ["{week}/parsed_defense.json"], ["{week}/defense.json"],
+             _build_defense, on_ingest="defense.json"),
+    # passing.json is rewritten in place by its parser, so it's an input here, not an artifact
+    Artifact("game_summaries", ["{week}/game_summaries.json"],
+             ["{week}/parsed_schedule.json", "{week}/parsed_defense.json"], _build_summaries,
+             optional=["{week}/passing.json", "{week}/parsed_rushing.json", "{league}/team_map.json"],
+             when=lambda ctx: ctx["week_dir"].startswith("week_"),   # no recaps for preseason
+             output_required=False),                                 # nothing to write until a game is final
+]
+BY_NAME = {a.name: a for a in ARTIFACTS}
+
+
+def _ctx(upload_folder, league_id, season_dir, week_dir) -> dict:
+    league = os.path.join(upload_folder, str(league_id))
+    return {
+        "upload_folder": upload_folder,
+        "league_id": str(league_id),
+        "season_dir": season_dir,
+        "week_dir": week_dir,
+        "league": league,
+        "global": os.path.join(league, *GLOBAL),
+        "week": os.path.join(league, season_dir, week_dir),
+    }
+
+
+def _subpath(ctx, kind):
+    # parsers only use it for logging / to pick the league id out of position 1
+    return f"rebuild/{ctx['league_id']}/{kind}"
+
+
+def _path(ctx, template):
+    return os.path.normpath(template.format(**ctx))
+
+
+def _in_scope(ctx, a: Artifact) -> bool:
+    is_global = (ctx["season_dir"], ctx["week_dir"]) == GLOBAL
+    if (a.scope == "global") != is_global:
+        return False
+    return a.when is None or a.when(ctx)
+
+
+def _file_hash(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    sig = (st.st_mtime_ns, st.st_size)
+    with _lock:
+        hit = _hashes.get(path)
+    if hit and hit[:2] == sig:
+        return hit[2]
+    h = sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    with _lock:
+        _hashes[path] = (*sig, h.hexdigest())
+    return h.hexdigest()
+
+
+def _input_hashes(ctx, a: Artifact) -> dict | None:
+    """{input path (relative to the league): sha256}; None when a required input is missing."""
+    out = {}
+    for template in a.inputs + a.optional:
+        path = _path(ctx, template)
+        digest = _file_hash(path)
+        if digest is None and template in a.inputs:
+            return None
+        out[os.path.relpath(path, ctx["league"])] = digest
+    return out
+
+
+def _state_path(ctx, a: Artifact) -> str:
+    return os.path.join(os.path.dirname(_path(ctx, a.outputs[0])), BUILD_STATE)
+
+
+def _state_lock(path) -> threading.Lock:
+    with _lock:
+        return _state_locks.setdefault(path, threading.Lock())
+
+
+def _read_state(path) -> dict:
+    try:
+        return _load(path)
+    except Exception:
+        return {}
+
+
+def _record(ctx, a: Artifact, hashes: dict):
+    path = _state_path(ctx, a)
+    with _state_lock(path):
+        state = _read_state(path)
+        state[a.name] = {"inputs": hashes, "built_at": time()}
+        write_artifacts({path: json.dumps(state, indent=2, sort_keys=True)})
+
+
+def _is_stale(ctx, a: Artifact, hashes: dict) -> bool:
+    rec = _read_state(_state_path(ctx, a)).get(a.name)
+    if not rec or rec.get("inputs") != hashes:
+        return True
+    return a.output_required and not all(os.path.exists(_path(ctx, p)) for p in a.outputs)
+
+
+def downstream(ctx, names) -> set:
+    """Artifacts (names) reachable from the given artifacts or input paths, the starting artifacts included."""
+    frontier = {os.path.normpath(n) for n in names}
+    out = set()
+    while frontier:
+        produced = set()
+        for a in ARTIFACTS:
+            if a.name in out:
+                continue
+            ins = {_path(ctx, p) for p in a.inputs + a.optional}
+            if a.name in frontier or ins & frontier or {os.path.basename(p) for p in ins} & frontier:
+                out.add(a.name)
+                produced |= {_path(ctx, p) for p in a.outputs}
+        frontier = produced
+    return out
+
+
+def _levels(ctx, names: list) -> list[list[Artifact]]:
+    """Kahn's algorithm over the chosen artifacts: [[no deps], [deps in level 0], ...]."""
+    arts = [BY_NAME[n] for n in names]
+    outputs = {a.name: {_path(ctx, p) for p in a.outputs} for a in arts}
+    deps = {
+        a.name: {b.name for b in arts if b is not a
+                 and outputs[b.name] & {_path(ctx, p) for p in a.inputs + a.optional}}
+        for a in arts
+    }
+    levels = []
+    done = set()
+    while len(done) < len(arts):
+        level = [a for a in arts if a.name not in done and deps[a.name] <= done]
+        if not level:
+            raise RuntimeError(f"build graph cycle among {sorted(set(names) - done)}")
+        levels.append(level)
+        done |= {a.name for a in level}
+    return levels
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max(1, BUILD_GRAPH_THREADS), thread_name_prefix="build")
+        return _executor
+
+
+def _note(name, key, sec=0.0):
+    with _lock:
+        s = _stats.setdefault(name, {"built": 0, "skipped": 0, "failed": 0, "sec": 0.0})
+        s[key] += 1
+        s["sec"] = round(s["sec"] + sec, 4)
+
+
+def _run_one(ctx, a: Artifact, hashes: dict):
+    st = perf_counter()
+    try:
+        a.build(ctx)
+    except Exception as e:
+        _note(a.name, "failed", perf_counter() - st)
+        return f"{type(e).__name__}: {e}"
+    _record(ctx, a, hashes)
+    _note(a.name, "built", perf_counter() - st)
+    return None
+
+
+def rebuild_stale(upload_folder, league_id, season_dir, week_dir, changed=None) -> dict:
+    """
+    Rebuild the stale artifacts of one folder scope (all of them, or only those
+    downstream of `changed` artifact names / input paths). Returns
+    {"built": [...], "fresh": [...], "waiting": [...]}; raises if a build failed.
+    """
+    ctx = _ctx(upload_folder, league_id, season_dir, week_dir)
+    names = [a.name for a in ARTIFACTS if _in_scope(ctx, a)]
+    if changed:
+        wanted = downstream(ctx, changed)
+        names = [n for n in names if n in wanted]
+
+    built, fresh, waiting, failed = [], [], [], {}
+    blocked = set()
+    for level in _levels(ctx, names):
+        todo = []
+        for a in level:
+            if blocked & {_path(ctx, p) for p in a.inputs + a.optional}:
+                waiting.append(a.name)   # an upstream build failed this round
+                blocked |= {_path(ctx, p) for p in a.outputs}
+                continue
+            hashes = _input_hashes(ctx, a)
+            if hashes is None:
+                waiting.append(a.name)   # a required input hasn't arrived yet
+                continue
+            if not _is_stale(ctx, a, hashes):
+                fresh.append(a.name)
+                _note(a.name, "skipped")
+                continue
+            todo.append((a, hashes))
+
+        if len(todo) == 1:
+            results = [_run_one(ctx, *todo[0])]
+        else:
+            results = list(_pool().map(lambda t: _run_one(ctx, *t), todo))
+        folders = set()
+        for (a, _), err in zip(todo, results):
+            if err:
+                failed[a.name] = err
+                blocked |= {_path(ctx, p) for p in a.outputs}
+            else:
+                built.append(a.name)
+                folders.add(ctx["week"] if a.scope == "week" else ctx["global"])
+        # pages / ETags built from these files; league-root outputs count as week_global
+        for folder in sorted(folders):
+            bump_generation(league_id, folder)
+
+    if built:
+        print(f"🔧 Rebuilt {', '.join(built)} for {league_id} {season_dir}/{week_dir}")
+    if failed:
+        raise RuntimeError(f"derived rebuild failed for {league_id} {season_dir}/{week_dir}: {failed}")
+    return {"built": built, "fresh": fresh, "waiting": waiting}
+
+
+def mark_fresh(upload_folder, league_id, season_dir, week_dir, raw_filename: str) -> list:
+    """The ingest path just parsed raw_filename inline: record the artifacts that parse produced as built."""
+    ctx = _ctx(upload_folder, league_id, season_dir, week_dir)
+    marked = []
+    for a in ARTIFACTS:
+        if a.on_ingest != raw_filename or not _in_scope(ctx, a):
+            continue
+        hashes = _input_hashes(ctx, a)
+        if hashes is not None and all(os.path.exists(_path(ctx, p)) for p in a.outputs):
+            _record(ctx, a, hashes)
+            marked.append(a.name)
+    return marked
+
+
+def build_graph_status() -> dict:
+    with _lock:
+        return {
+            "threads": BUILD_GRAPH_THREADS,
+            "artifacts": {
+                a.name: {"outputs": a.outputs, "inputs": a.inputs, "optional": a.optional,
+                         **_stats.get(a.name, {"built": 0, "skipped": 0, "failed": 0, "sec": 0.0})}
+                for a in ARTIFACTS
+            },
+            "hash_cache": len(_hashes),
+        }
@@ -0,0 +1,385 @@
+# capture_log.py
+"""
+Append-only webhook capture log.
+
+One NDJSON record per webhook (ts, subpath, headers, body sha256, body),
+compressed (gzip, or zstd when WEBHOOK_CAPTURE_COMPRESSION=zstd and the
+`zstandard` package is installed) and rotated by size:
+
+    uploads/_capture/capture-<YYYYmmddTHHMMSS>-<pid>-<seq>.ndjson.gz
+
+Callers only enqueue; a background writer thread owns the files, so the
+ingest path never touches the SD card for debug output. Each process writes
+its own segments (one compressed stream per file), the oldest segments beyond
+WEBHOOK_CAPTURE_KEEP are deleted on rotation; the newest segment of every
+other live process is never deleted, since that worker may still be writing
+it. /debug reads the tail.
+"""
+import os
+import re
+import json
+import zlib
+import codecs
+import shutil
+import heapq
+import queue
+import itertools
+import atexit
+import threading
+from time import time, strftime, localtime
+from hashlib import sha256
+
+from config import UPLOAD_FOLDER
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CAPTURE_ENABLED = os.getenv("WEBHOOK_CAPTURE", "1") != "0"
+CAPTURE_DIR = os.getenv("WEBHOOK_CAPTURE_DIR") or os.path.join(UPLOAD_FOLDER, "_capture")
+CAPTURE_MAX_BYTES = int(os.getenv("WEBHOOK_CAPTURE_MAX_BYTES", str(16 * 1024 * 1024)))   # compressed, per segment
+CAPTURE_KEEP = int(os.getenv("WEBHOOK_CAPTURE_KEEP", "8"))
+CAPTURE_QUEUE_MAX = int(os.getenv("WEBHOOK_CAPTURE_QUEUE_MAX", "1000"))
+
+_want_zstd = os.getenv("WEBHOOK_CAPTURE_COMPRESSION", "gzip").lower() == "zstd"
+if _want_zstd and zstandard is None:
+    print("⚠️ WEBHOOK_CAPTURE_COMPRESSION=zstd but zstandard isn't installed; using gzip")
+COMPRESSION = "zstd" if (_want_zstd and zstandard is not None) else "gzip"
+_EXT = {"gzip": ".ndjson.gz", "zstd": ".ndjson.zst"}
+_SEG_NAME = re.compile(r"^capture-\d{8}T\d{6}-(\d+)-(\d+)\.")
+
+_queue: "queue.Queue[dict | None]" = queue.Queue(maxsize=CAPTURE_QUEUE_MAX)
+_lock = threading.Lock()
+_writer = None          # (pid, Thread)
+_seg_seq = itertools.count(1)
+_link_seq = itertools.count(1)
+
+_stats = {
+    "captured": 0,
+    "written": 0,
+    "dropped": 0,       # queue full
+    "rotations": 0,
+    "errors": 0,
+}
+
+
+class _Segment:
+    """One compressed NDJSON file, flushed after every batch so the tail is readable."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._f = open(path, "wb")
+        if COMPRESSION == "zstd":
+            self._z = zstandard.ZstdCompressor(level=3).compressobj()
+            self._flush_mode = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        else:
+            self._z = zlib.compressobj(6, zlib.DEFLATED, 31)
+            self._flush_mode = zlib.Z_SYNC_FLUSH
+
+    def write(self, line: bytes):
+        self._f.write(self._z.compress(line))
+
+    def flush(self):
+        self._f.write(self._z.flush(self._flush_mode))
+        self._f.flush()
+
+    def size(self) -> int:
+        return self._f.tell()
+
+    def close(self):
+        self._f.write(self._z.flush())
+        self._f.close()
+
+
+def _new_segment() -> _Segment:
+    os.makedirs(CAPTURE_DIR, exist_ok=True)
+    stamp = strftime("%Y%m%dT%H%M%S", localtime())
+    return _Segment(os.path.join(
+        CAPTURE_DIR, f"capture-{stamp}-{os.getpid()}-{next(_seg_seq):04d}{_EXT[COMPRESSION]}"
+    ))
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _open_segments(paths: list[str]) -> set:
+    """Newest segment of every other live process: possibly still open for writing."""
+    newest = {}
+    for p in paths:
+        m = _SEG_NAME.match(os.path.basename(p))
+        if not m:
+            continue
+        pid, seq = int(m.group(1)), int(m.group(2))
+        if pid != os.getpid() and (pid not in newest or seq > newest[pid][0]):
+            newest[pid] = (seq, p)
+    return {p for pid, (_, p) in newest.items() if _pid_alive(pid)}
+
+
+def _prune():
+    """Keep the newest CAPTURE_KEEP - 1 segments (room for the one about to open), never another writer's open one."""
+    segs = capture_segments()
+    excess = len(segs) + 1 - CAPTURE_KEEP
+    busy = _open_segments(segs) if excess > 0 else set()
+    doomed = [p for p in segs if p not in busy]
+    for p in doomed[:max(0, excess)]:
+        try:
+            os.remove(p)
+            print(f"🧹 Capture log pruned {os.path.basename(p)}")
+        except OSError:
+            pass
+
+
+def _writer_loop():
+    seg = None
+    while True:
+        item = _queue.get()
+        batch = [item]
+        while True:                       # drain whatever else is waiting, then flush once
+            try:
+                batch.append(_queue.get_nowait())
+            except queue.Empty:
+                break
+
+        stop = any(rec is None for rec in batch)
+        try:
+            for rec in batch:
+                if rec is None:
+                    continue
+                if seg is None:
+                    seg = _new_segment()
+                if "_body_file" in rec:
+                    _write_file_record(seg, rec)
+                else:
+                    seg.write(json.dumps(rec, ensure_ascii=False).encode("utf-8") + b"\n")
+                _stats["written"] += 1
+            if seg is not None:
+                seg.flush()
+                if seg.size() >= CAPTURE_MAX_BYTES:
+                    seg.close()
+                    _stats["rotations"] += 1
+                    print(f"🔄 Capture log rotated ({os.path.basename(seg.path)})")
+                    _prune()
+                    seg = None
+        except Exception as e:
+            _stats["errors"] += 1
+            print(f"⚠️ Capture log write failed: {e}")
+            if seg is not None:
+                try:
+                    seg.close()     # end the gzip member; the next batch starts a new segment
+                except Exception:
+                    pass
+            seg = None
+        finally:
+            for _ in batch:
+                _queue.task_done()
+
+        if stop:
+            if seg is not None:
+                seg.close()
+            return
+
+
+def _write_file_record(seg: _Segment, rec: dict, chunk_size: int = 1 << 16):
+    """Same NDJSON line as a normal record, with the body streamed (and escaped) from disk."""
+    path = rec.pop("_body_file")
+    offset = rec.pop("_body_offset", 0)
+    try:
+        head = json.dumps(rec, ensure_ascii=False)
+        seg.write(head[:-1].encode("utf-8") + b', "body": "')
+        dec = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        with open(path, "rb") as f:
+            f.seek(offset)
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                seg.write(json.dumps(dec.decode(chunk), ensure_ascii=False)[1:-1].encode("utf-8"))
+        seg.write(json.dumps(dec.decode(b"", final=True), ensure_ascii=False)[1:-1].encode("utf-8") + b'"}\n')
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _ensure_writer():
+    global _writer
+    pid = os.getpid()
+    with _lock:
+        if _writer and _writer[0] == pid and _writer[1].is_alive():
+            return
+        t = threading.Thread(target=_writer_loop, name="capture-writer", daemon=True)
+        t.start()
+        _writer = (pid, t)
+        _prune()
+
+
+def capture_webhook(subpath: str, headers: dict, body: bytes, replay: bool = False):
+    """Queue one webhook for the capture log (never blocks the caller)."""
+    if not CAPTURE_ENABLED:
+        return
+    _ensure_writer()
+    rec = {
+        "ts": round(time(), 3),
+        "subpath": subpath,
+        "replay": bool(replay),
+        "headers": dict(headers),
+        "sha256": sha256(body).hexdigest(),
+        "size": len(body),
+        "body": body.decode("utf-8", errors="replace"),
+    }
+    try:
+        _queue.put_nowait(rec)
+        _stats["captured"] += 1
+    except queue.Full:
+        _stats["dropped"] += 1
+
+
+def capture_webhook_file(subpath: str, headers: dict, path: str, offset: int = 0, replay: bool = False,
+                         digest: str | None = None, size: int | None = None):
+    """
+    capture_webhook() for a body already on disk (streamed roster spool): the
+    file is hard-linked aside and the writer streams it into the segment, so
+    the body is never loaded into memory here.
+    """
+    if not CAPTURE_ENABLED:
+        return
+    _ensure_writer()
+    pending_dir = os.path.join(CAPTURE_DIR, ".pending")
+    os.makedirs(pending_dir, exist_ok=True)
+    link = os.path.join(pending_dir, f"{os.getpid()}-{next(_link_seq)}.body")
+    try:
+        os.link(path, link)
+    except OSError:
+        shutil.copyfile(path, link)
+    rec = {
+        "ts": round(time(), 3),
+        "subpath": subpath,
+        "replay": bool(replay),
+        "headers": dict(headers),
+        "sha256": digest,
+        "size": size if size is not None else os.path.getsize(path) - offset,
+        "_body_file": link,
+        "_body_offset": offset,
+    }
+    try:
+        _queue.put_nowait(rec)
+        _stats["captured"] += 1
+    except queue.Full:
+        _stats["dropped"] += 1
+        os.remove(link)
+
+
+def flush_capture(timeout: float = 5.0) -> bool:
+    """Wait until everything queued so far is on disk (tests / shutdown)."""
+    deadline = time() + timeout
+    while _queue.unfinished_tasks and time() < deadline:
+        threading.Event().wait(0.01)
+    return not _queue.unfinished_tasks
+
+
+def _shutdown():
+    if _writer and _writer[0] == os.getpid() and _writer[1].is_alive():
+        try:
+            _queue.put(None, timeout=1.0)
+            _writer[1].join(timeout=5.0)
+        except Exception:
+            pass
+
+
+atexit.register(_shutdown)
+
+
+def _iter_segment(path: str, chunk_size: int = 1 << 20):
+    """Records in one segment, decompressed as they are read; tolerates a segment still being written."""
+    if path.endswith(_EXT["zstd"]):
+        if zstandard is None:
+            return
+        d = zstandard.ZstdDecompressor().decompressobj()
+    else:
+        d = zlib.decompressobj(31)
+
+    pending = b""
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            try:
+                data = d.decompress(chunk)
+                while not path.endswith(_EXT["zstd"]) and d.unused_data:
+                    rest = d.unused_data            # concatenated gzip members, if any
+                    d = zlib.decompressobj(31)
+                    data += d.decompress(rest)
+            except Exception:
+                break
+            pending += data
+            *lines, pending = pending.split(b"\n")
+            for line in lines:
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    pass
+    # anything left in `pending` is a partial last line of a segment in flight
+
+
+def _read_segment(path: str) -> list[dict]:
+    return list(_iter_segment(path))
+
+
+def capture_segments(capture_dir: str | None = None) -> list[str]:
+    """Segment paths, oldest first (CAPTURE_DIR unless another directory is given)."""
+    capture_dir = capture_dir or CAPTURE_DIR
+    try:
+        names = [n for n in os.listdir(capture_dir) if n.startswith("capture-") and n.endswith(tuple(_EXT.values()))]
+    except FileNotFoundError:
+        return []
+    paths = [os.path.join(capture_dir, n) for n in names]
+    return sorted(paths, key=lambda p: (os.path.getmtime(p), p))
+
+
+def iter_capture(include_replays: bool = True, paths: list[str] | None = None):
+    """Stream captured webhooks in arrival order, merging segments written by different processes."""
+    streams = [_iter_segment(p) for p in (paths if paths is not None else capture_segments())]
+    for rec in heapq.merge(*streams, key=lambda r: r.get("ts") or 0):
+        if include_replays or not rec.get("replay"):
+            yield rec
+
+
+def read_capture(include_replays: bool = True) -> list[dict]:
+    """Every retained captured webhook, oldest first."""
+    return list(iter_capture(include_replays))
+
+
+def tail_capture(n: int = 20, subpath: str | None = None) -> list[dict]:
+    """Last n captured webhooks across all segments, oldest first."""
+    records = []
+    for path in reversed(capture_segments()):
+        recs = _read_segment(path)
+        if subpath:
+            recs = [r for r in recs if subpath in (r.get("subpath") or "")]
+        records.extend(recs)
+        if len(records) >= n * 2:   # segments of different pids overlap in time
+            break
+    records.sort(key=lambda r: r.get("ts") or 0)
+    return records[-n:] if n > 0 else []
+
+
+def capture_status() -> dict:
+    segs = capture_segments()
+    return {
+        "enabled": CAPTURE_ENABLED,
+        "compression": COMPRESSION,
+        "dir": CAPTURE_DIR,
+        "segments": len(segs),
+        "bytes": sum(os.path.getsize(p) for p in segs),
+        "queued": _queue.qsize(),
+        **_stats,
+    }
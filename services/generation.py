@@ -0,0 +1,92 @@
+# generation.py
+"""
+Data generation counters for HTTP validators (ETag / Last-Modified).
+
+Every ingest write bumps:
+  gen:<league>:<season>:<period>   the folder it wrote
+  gen:<league>:<season>:*          any week of that season (season totals)
+  gen:<league>                     anything in the league
+  gen:*                            anything at all (pages that can't resolve a league)
+
+Writes to season_global/week_global, the league root (team_map.json,
+power_rankings.json) and final snapshots count as the folder
+season_global/week_global. Read routes list the counters they depend on and
+derive their ETag from them, so a revalidation is one small lookup; cached
+pages built from a bumped counter are purged (services/page_cache.py).
+
+The counters outlive a restart (shared state is SQLite), so validators also
+carry the app version: APP_VERSION if set, else the git commit the code was
+deployed from, else this process's start time. A deploy that changes
+templates or view code then invalidates every ETag / Last-Modified.
+"""
+import os
+import json
+import subprocess
+from hashlib import sha1
+from time import time
+
+from services.shared_state import get_shared_state
+from services.page_cache import purge_pages_for
+from services.stats_store import period_from_folder
+
+GLOBAL = ("season_global", "week_global")
+ANY = "gen:*"
+
+
+def _app_version() -> tuple[str, float]:
+    """(version token, time it took effect) for the validators."""
+    env = os.getenv("APP_VERSION")
+    if env:
+        return env, time()
+    try:
+        out = subprocess.run(
+            ["git", "log", "-1", "--format=%H %ct"],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            capture_output=True, text=True, timeout=5,
+        )
+        commit, stamp = out.stdout.split()
+        if out.returncode == 0:
+            return commit, float(stamp)
+    except Exception:
+        pass
+    boot = time()
+    return f"boot-{boot:.6f}", boot
+
+
+APP_VERSION, APP_VERSION_SINCE = _app_version()
+
+
+def generation_key(league_id=None, season=None, period=None) -> str:
+    if not league_id:
+        return ANY
+    if season is None:
+        return f"gen:{league_id}"
+    return f"gen:{league_id}:{season}:{period}"
+
+
+def bump_generation(league_id, folder: str | None = None):
+    """Call after writing under uploads/<league>/...; folder=None means global."""
+    league_id = str(league_id)
+    season, period = period_from_folder(folder)[1:] if folder else GLOBAL
+
+    keys = [generation_key(league_id, season, period), generation_key(league_id), ANY]
+    if season != GLOBAL[0]:
+        keys.append(generation_key(league_id, season, "*"))
+
+    state = get_shared_state()
+    now = time()
+    for k in keys:
+        state.kv_bump(k, now)
+    purge_pages_for(keys)
+
+
+def generation_validators(keys: list[str], *identity) -> tuple[str, float | None]:
+    """
+    (etag, last_modified) for a response that depends on `keys`.
+    `identity` is whatever else selects the response (route, query args).
+    """
+    gens = get_shared_state().kv_get_many(keys)
+    h = sha1(json.dumps([APP_VERSION, identity, [(k, (gens.get(k) or [0])[0]) for k in keys]],
+                        sort_keys=True, default=str).encode())
+    stamps = [g[1] for g in gens.values()] + [APP_VERSION_SINCE]
+    return "g-" + h.hexdigest()[:24], (max(stamps) if stamps else None)
@@ -0,0 +1,85 @@
+# ingest_ledger.py
+"""
+Content-hash ledger for idempotent ingest.
+
+The Companion App re-sends identical exports all the time. For every
+(league, destination file) we keep the sha256 of the raw request body that
+last produced it, plus a pointer from (league, subpath) to that destination:
+
+    ingest_ledger:<league>:<dest>      {"sha256": ..., "subpath": ..., "at": ...}
+    ingest_route:<league>:<subpath>    "<dest>"
+
+dest is relative to the upload folder (e.g. 3264906/season_2/week_3/passing.json).
+A body whose hash matches the ledger entry of its destination is a duplicate
+and skips everything downstream (write, parse, summaries, rankings) - unless
+the destination file has disappeared since, in which case it is ingested again.
+
+The route checks via the subpath pointer before enqueueing; the worker checks
+again once the destination is resolved (covers duplicates that were queued
+before the first copy finished). Entries are only recorded after a
+successful ingest. Lives in the shared state store, so all workers agree.
+
+INGEST_DEDUP=0 turns the skip off (e.g. to re-run a replay against the same
+uploads folder).
+"""
+import os
+from hashlib import sha256
+from time import time
+
+from config import UPLOAD_FOLDER
+from services.shared_state import get_shared_state
+
+INGEST_DEDUP = os.getenv("INGEST_DEDUP", "1") != "0"
+
+
+def body_digest(body: bytes | None) -> str:
+    return sha256(body or b"").hexdigest()
+
+
+def _rel(dest: str, upload_folder: str) -> str:
+    return os.path.relpath(dest, upload_folder).replace(os.sep, "/")
+
+
+def _dest_key(league_id, rel: str) -> str:
+    return f"ingest_ledger:{league_id}:{rel}"
+
+
+def _route_key(league_id, subpath) -> str:
+    return f"ingest_route:{league_id}:{subpath or ''}"
+
+
+def _matches(entry, digest: str, rel: str, upload_folder: str) -> bool:
+    return (
+        isinstance(entry, dict)
+        and entry.get("sha256") == digest
+        and os.path.exists(os.path.join(upload_folder, rel))
+    )
+
+
+def duplicate_for_subpath(league_id, subpath, digest: str, upload_folder: str = UPLOAD_FOLDER) -> str | None:
+    """Destination (relative) if this body is what last landed via this subpath, else None."""
+    if not INGEST_DEDUP or not league_id:
+        return None
+    state = get_shared_state()
+    rel = state.kv_get(_route_key(league_id, subpath))
+    if not rel:
+        return None
+    return rel if _matches(state.kv_get(_dest_key(league_id, rel)), digest, rel, upload_folder) else None
+
+
+def duplicate_for_dest(league_id, dest: str, digest: str, upload_folder: str = UPLOAD_FOLDER) -> str | None:
+    """Destination (relative) if its ledger hash equals digest and the file still exists, else None."""
+    if not INGEST_DEDUP or not league_id:
+        return None
+    rel = _rel(dest, upload_folder)
+    return rel if _matches(get_shared_state().kv_get(_dest_key(league_id, rel)), digest, rel, upload_folder) else None
+
+
+def record_ingest(league_id, subpath, dest: str, digest: str, upload_folder: str = UPLOAD_FOLDER):
+    """Call after dest was written successfully from a body with this digest."""
+    if not league_id:
+        return
+    rel = _rel(dest, upload_folder)
+    state = get_shared_state()
+    state.kv_set(_dest_key(league_id, rel), {"sha256": digest, "subpath": subpath, "at": time()})
+    state.kv_set(_route_key(league_id, subpath), rel)
@@ -0,0 +1,343 @@
+# ingest_queue.py
+"""
+Durable in-process webhook ingest queue.
+
+The /webhook route only validates + enqueues; worker threads drain the queue.
+Jobs for the same league run strictly in arrival order (one worker per league
+at a time), different leagues run in parallel.
+
+Every job is spooled to disk before the route returns, so a worker restart
+does not lose an export half way through. Spool files are named
+<time_ns>_<pid>_<seq>.job and are only recovered from processes that are gone.
+
+Large roster bodies can be streamed straight from the request into the spool
+(spool_webhook_stream); such jobs carry no body in memory, only the spool
+path + offset, and the worker reads the players back incrementally.
+"""
+import os
+import json
+from hashlib import sha256
+import itertools
+import threading
+from collections import deque
+from time import time, time_ns
+
+from config import UPLOAD_FOLDER
+
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+INGEST_SPOOL_DIR = os.getenv("INGEST_SPOOL_DIR") or os.path.join(UPLOAD_FOLDER, ".ingest_queue")
+
+_cond = threading.Condition()
+_queues: dict[str, deque] = {}     # {league_id: deque([job, ...])}
+_ready: deque = deque()            # leagues with pending jobs and no active worker
+_active: set[str] = set()          # leagues currently being processed
+_workers: list[threading.Thread] = []
+_handler = None
+_seq = itertools.count(1)
+
+_stats = {
+    "enqueued": 0,
+    "processed": 0,
+    "failed": 0,
+    "recovered": 0,
+    "last_lag_sec": None,     # enqueue → done for the most recent job
+    "max_lag_sec": 0.0,
+    "last_done_at": None,
+}
+
+
+def _spool_path(name: str) -> str:
+    return os.path.join(INGEST_SPOOL_DIR, name)
+
+
+def _write_spool(job: dict) -> str:
+    """First line = JSON meta, rest = raw request body (bytes, untouched)."""
+    os.makedirs(INGEST_SPOOL_DIR, exist_ok=True)
+    name = f"{job['enqueued_ns']:020d}_{os.getpid()}_{job['seq']:06d}.job"
+    meta = {
+        "league": job["league"],
+        "subpath": job["subpath"],
+        "headers": job["headers"],
+        "enqueued_at": job["enqueued_at"],
+    }
+    path = _spool_path(name)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(json.dumps(meta).encode("utf-8") + b"\n")
+        f.write(job["body"])
+    os.replace(tmp, path)
+    return path
+
+
+def _read_spool(path: str) -> dict:
+    with open(path, "rb") as f:
+        line = f.readline()
+        meta = json.loads(line.decode("utf-8"))
+        if meta.get("stream"):
+            return {**meta, "body": None, "body_offset": len(line)}
+        body = f.read()
+    return {**meta, "body": body}
+
+
+def _push(job: dict):
+    """Caller must hold _cond."""
+    league = job["league"]
+    q = _queues.setdefault(league, deque())
+    q.append(job)
+    if league not in _active and league not in _ready:
+        _ready.append(league)
+    _cond.notify()
+
+
+def enqueue_webhook(league_id: str, subpath: str, headers: dict, body: bytes, data=None) -> dict:
+    """
+    Spool + enqueue one webhook. `data` is the already-parsed JSON (kept in
+    memory so the worker doesn't parse the body twice); it is rebuilt from the
+    spooled body after a restart.
+    """
+    start_ingest_workers()
+
+    now = time()
+    job = {
+        "seq": next(_seq),
+        "league": str(league_id or "unknown"),
+        "subpath": subpath,
+        "headers": headers,
+        "body": body,
+        "data": data,
+        "enqueued_at": now,
+        "enqueued_ns": time_ns(),
+    }
+    job["spool"] = _write_spool(job)
+
+    with _cond:
+        _push(job)
+        _stats["enqueued"] += 1
+        depth = len(_queues.get(job["league"]) or ())
+
+    return {"id": os.path.basename(job["spool"]), "league": job["league"], "depth": depth}
+
+
+def spool_webhook_stream(league_id: str, subpath: str, headers: dict, stream,
+                         chunk_size: int = 64 * 1024) -> dict:
+    """
+    Copy a request body stream into a spool file without holding it in memory.
+    Returns the (not yet queued) job with sha256/size/first_byte of the body;
+    pass it to enqueue_spooled() or discard_spooled().
+    """
+    now = time()
+    job = {
+        "seq": next(_seq),
+        "league": str(league_id or "unknown"),
+        "subpath": subpath,
+        "headers": headers,
+        "body": None,
+        "data": None,
+        "stream": True,
+        "enqueued_at": now,
+        "enqueued_ns": time_ns(),
+    }
+    os.makedirs(INGEST_SPOOL_DIR, exist_ok=True)
+    name = f"{job['enqueued_ns']:020d}_{os.getpid()}_{job['seq']:06d}.job"
+    path = _spool_path(name)
+    tmp = path + ".tmp"
+    meta = {
+        "league": job["league"],
+        "subpath": subpath,
+        "headers": headers,
+        "enqueued_at": now,
+        "stream": True,
+    }
+    h = sha256()
+    size = 0
+    first = b""
+    try:
+        with open(tmp, "wb") as f:
+            line = json.dumps(meta).encode("utf-8") + b"\n"
+            f.write(line)
+            while True:
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    break
+                if not first:
+                    first = chunk.lstrip()[:1]
+                h.update(chunk)
+                size += len(chunk)
+                f.write(chunk)
+        os.replace(tmp, path)
+    except Exception:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    job.update({
+        "spool": path,
+        "body_offset": len(line),
+        "sha256": h.hexdigest(),
+        "size": size,
+        "first_byte": first,
+    })
+    return job
+
+
+def enqueue_spooled(job: dict) -> dict:
+    """Queue a job returned by spool_webhook_stream()."""
+    start_ingest_workers()
+    with _cond:
+        _push(job)
+        _stats["enqueued"] += 1
+        depth = len(_queues.get(job["league"]) or ())
+    return {"id": os.path.basename(job["spool"]), "league": job["league"], "depth": depth}
+
+
+def discard_spooled(job: dict):
+    try:
+        os.remove(job["spool"])
+    except OSError:
+        pass
+
+
+def _finish_spool(job: dict, ok: bool):
+    path = job.get("spool")
+    if not path or not os.path.exists(path):
+        return
+    try:
+        if ok:
+            os.remove(path)
+        else:
+            failed_dir = os.path.join(INGEST_SPOOL_DIR, "failed")
+            os.makedirs(failed_dir, exist_ok=True)
+            os.replace(path, os.path.join(failed_dir, os.path.basename(path)))
+    except Exception as e:
+        print(f"⚠️ Ingest spool cleanup failed for {path}: {e}")
+
+
+def _worker_loop():
+    while True:
+        with _cond:
+            while not _ready:
+                _cond.wait()
+            league = _ready.popleft()
+            _active.add(league)
+            job = _queues[league].popleft()
+
+        ok = True
+        try:
+            _handler(job)
+        except Exception as e:
+            ok = False
+            print(f"❌ Ingest job failed ({job['league']} {job['subpath']}): {e}")
+
+        _finish_spool(job, ok)
+
+        with _cond:
+            lag = time() - job["enqueued_at"]
+            _stats["processed" if ok else "failed"] += 1
+            _stats["last_lag_sec"] = round(lag, 3)
+            _stats["max_lag_sec"] = round(max(_stats["max_lag_sec"], lag), 3)
+            _stats["last_done_at"] = time()
+
+            _active.discard(league)
+            if _queues.get(league):
+                _ready.append(league)
+                _cond.notify()
+            else:
+                _queues.pop(league, None)
+
+
+def set_ingest_handler(fn):
+    """fn(job) processes one job dict (league, subpath, headers, body, data)."""
+    global _handler
+    _handler = fn
+
+
+def start_ingest_workers(n: int | None = None):
+    if _workers:
+        return
+    if _handler is None:
+        raise RuntimeError("Ingest handler not set; call set_ingest_handler() first")
+    for i in range(n or INGEST_WORKERS):
+        t = threading.Thread(target=_worker_loop, name=f"ingest-{i}", daemon=True)
+        t.start()
+        _workers.append(t)
+    print(f"🧵 Ingest workers started: {len(_workers)}")
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def recover_spooled_jobs() -> int:
+    """Re-enqueue jobs left behind by dead processes (oldest first)."""
+    if not os.path.isdir(INGEST_SPOOL_DIR):
+        return 0
+
+    recovered = 0
+    for name in sorted(os.listdir(INGEST_SPOOL_DIR)):
+        if not name.endswith(".job"):
+            continue
+        try:
+            ts, pid, seq = name[:-4].split("_")
+            if _pid_alive(int(pid)):
+                continue
+        except ValueError:
+            continue
+
+        # claim atomically so two restarting workers can't both replay it
+        seq = next(_seq)
+        claimed = _spool_path(f"{ts}_{os.getpid()}_{seq:06d}.job")
+        try:
+            os.rename(_spool_path(name), claimed)
+        except OSError:
+            continue
+
+        try:
+            saved = _read_spool(claimed)
+        except Exception as e:
+            print(f"⚠️ Unreadable spooled job {name}: {e}")
+            _finish_spool({"spool": claimed}, ok=False)
+            continue
+
+        job = {
+            **saved,
+            "seq": seq,
+            "data": None,
+            "enqueued_ns": int(ts),
+            "spool": claimed,
+        }
+        with _cond:
+            _push(job)
+            _stats["recovered"] += 1
+        recovered += 1
+
+    if recovered:
+        start_ingest_workers()
+        print(f"♻️ Recovered {recovered} spooled webhook job(s)")
+    return recovered
+
+
+def ingest_status() -> dict:
+    now = time()
+    with _cond:
+        per_league = {lid: len(q) for lid, q in _queues.items() if q}
+        oldest = min(
+            (q[0]["enqueued_at"] for q in _queues.values() if q),
+            default=None,
+        )
+        return {
+            "depth": sum(per_league.values()),
+            "per_league": per_league,
+            "active": sorted(_active),
+            "oldest_pending_age_sec": round(now - oldest, 3) if oldest else 0.0,
+            "workers": len(_workers),
+            **_stats,
+        }
@@ -0,0 +1,389 @@
+# job_queue.py
+"""
+Persistent background jobs for derived work, fed by ingest events.
+
+    register_job("week_summaries", build_summaries, max_attempts=5)
+    on_event("defense_written", "week_summaries", key="summaries:{league_id}:{season_dir}:{week_dir}")
+    ...
+    emit("defense_written", league_id=..., season_dir=..., week_dir=...)   # from the ingest path
+
+emit() only records jobs (one SQLite row each) and returns; job worker
+threads run them off the request / ingest path. Rows live in
+JOB_QUEUE_PATH (SQLite, WAL), shared by every gunicorn worker, so jobs
+survive restarts: a job whose process died mid-run is put back by
+recover_jobs() (or once its lease runs out).
+
+Per job name:
+    max_attempts      a raising job is retried with exponential backoff
+                      (backoff_sec * 2**(attempt-1), capped at max_backoff_sec),
+                      then kept as "failed" for /api/admin/jobs
+    concurrency       running jobs of that name across all processes
+A job `key` coalesces: emitting again while a job with that key is still
+pending updates its args and pushes run_at out to the new delay (debounce).
+A finished job's row is deleted; failed rows stay until retried or discarded.
+
+Jobs only run in processes that registered their name, and job args must be JSON.
+"""
+import os
+import json
+import random
+import sqlite3
+import threading
+import traceback
+from time import time
+
+from config import UPLOAD_FOLDER
+from services.metrics import count_job
+
+JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH") or os.path.join(UPLOAD_FOLDER, "_jobs.sqlite3")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_POLL_SEC = float(os.getenv("JOB_POLL_SEC", "1.0"))      # other workers' jobs are seen this late at most
+JOB_LEASE_SEC = float(os.getenv("JOB_LEASE_SEC", "900"))    # a running job older than this is presumed dead
+
+_cond = threading.Condition()
+_local = threading.local()
+_jobs = {}           # {name: {"fn", "max_attempts", "backoff_sec", "max_backoff_sec", "concurrency"}}
+_subs = {}           # {event: [{"job", "key", "delay", "when", "args"}]}
+_workers = None      # (pid, [Thread]); a forked worker starts its own
+_schema_ready = False
+
+_stats = {
+    "events": 0,
+    "enqueued": 0,
+    "coalesced": 0,
+    "runs_done": 0,
+    "runs_retried": 0,
+    "runs_failed": 0,       # gave up after max_attempts
+    "recovered": 0,
+}
+_per_job = {}        # {name: {"runs", "sec", "last_error"}}
+
+
+def _conn() -> sqlite3.Connection:
+    # connections must not cross threads or forked processes
+    global _schema_ready
+    conn = getattr(_local, "conn", None)
+    if conn is None or getattr(_local, "pid", None) != os.getpid():
+        os.makedirs(os.path.dirname(os.path.abspath(JOB_QUEUE_PATH)), exist_ok=True)
+        conn = sqlite3.connect(JOB_QUEUE_PATH, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if not _schema_ready:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    key TEXT,
+                    args TEXT NOT NULL,
+                    state TEXT NOT NULL,          -- pending | running | failed
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    run_at REAL NOT NULL,
+                    created_at REAL NOT NULL,
+                    event TEXT,
+                    owner_pid INTEGER,
+                    lease_until REAL,
+                    last_error TEXT
+                );
+                CREATE INDEX IF NOT EXISTS jobs_due ON jobs (state, run_at);
+                CREATE INDEX IF NOT EXISTS jobs_key ON jobs (key, state);
+            """)
+            _schema_ready = True
+        _local.conn = conn
+        _local.pid = os.getpid()
+    return conn
+
+
+def _tx(fn):
+    conn = _conn()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        out = fn(conn)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return out
+
+
+def register_job(name: str, fn, max_attempts: int = 5, backoff_sec: float = 5.0,
+                 max_backoff_sec: float = 600.0, concurrency: int = 1):
+    """fn(**args) runs the job; raising schedules a retry."""
+    _jobs[name] = {
+        "fn": fn,
+        "max_attempts": max(1, int(max_attempts)),
+        "backoff_sec": float(backoff_sec),
+        "max_backoff_sec": float(max_backoff_sec),
+        "concurrency": max(1, int(concurrency)),
+    }
+    _per_job.setdefault(name, {"runs": 0, "sec": 0.0, "last_error": None})
+
+
+def on_event(event: str, job: str, key: str | None = None, delay: float = 0.0, when=None, args=None):
+    """
+    Enqueue `job` whenever `event` is emitted.
+    key    format string over the event payload ("power_rankings:{league_id}"); coalesces pending jobs
+    when   payload -> bool; skip the job when false
+    args   payload -> job args (default: the payload itself)
+    """
+    _subs.setdefault(event, []).append({"job": job, "key": key, "delay": delay, "when": when, "args": args})
+
+
+def emit(event: str, **payload) -> list[int]:
+    """Record the jobs subscribed to `event`; never raises into the caller."""
+    ids = []
+    with _cond:
+        _stats["events"] += 1
+    for sub in _subs.get(event, ()):
+        try:
+            if sub["when"] is not None and not sub["when"](payload):
+                continue
+            args = sub["args"](payload) if sub["args"] else payload
+            key = sub["key"].format(**payload) if sub["key"] else None
+            ids.append(enqueue_job(sub["job"], args, key=key, delay=sub["delay"], event=event))
+        except Exception as e:
+            print(f"❌ Could not queue job {sub['job']} for event {event}: {e}")
+    return ids
+
+
+def enqueue_job(name: str, args: dict | None = None, key: str | None = None,
+                delay: float = 0.0, event: str | None = None) -> int:
+    args_json = json.dumps(args or {}, sort_keys=True)
+    now = time()
+
+    def _put(conn):
+        if key is not None:
+            row = conn.execute(
+                "SELECT id, run_at FROM jobs WHERE key = ? AND state = 'pending'", (key,)
+            ).fetchone()
+            if row:
+                conn.execute(
+                    "UPDATE jobs SET args = ?, run_at = ?, event = ? WHERE id = ?",
+                    (args_json, max(row[1], now + delay), event, row[0]),
+                )
+                return row[0], True
+        cur = conn.execute(
+            "INSERT INTO jobs (name, key, args, state, run_at, created_at, event) "
+            "VALUES (?, ?, ?, 'pending', ?, ?, ?)",
+            (name, key, args_json, now + delay, now, event),
+        )
+        return cur.lastrowid, False
+
+    job_id, coalesced = _tx(_put)
+    start_job_workers()
+    with _cond:
+        _stats["coalesced" if coalesced else "enqueued"] += 1
+        _cond.notify()
+    return job_id
+
+
+def _backoff(spec: dict, attempts: int) -> float:
+    delay = min(spec["max_backoff_sec"], spec["backoff_sec"] * (2 ** max(0, attempts - 1)))
+    return delay * random.uniform(1.0, 1.1)
+
+
+def _claim():
+    """Next due job this process can run, marked running (or None, seconds until the next one)."""
+    names = list(_jobs)
+    if not names:
+        return None, JOB_POLL_SEC
+    marks = ",".join("?" * len(names))
+    now = time()
+
+    def _pick(conn):
+        # expired leases: the runner hung or died without recover_jobs() noticing
+        conn.execute(
+            "UPDATE jobs SET state = 'pending', owner_pid = NULL WHERE state = 'running' AND lease_until < ?",
+            (now,),
+        )
+        running = dict(conn.execute(
+            "SELECT name, COUNT(*) FROM jobs WHERE state = 'running' GROUP BY name"
+        ).fetchall())
+        for job_id, name, args, attempts in conn.execute(
+            f"SELECT id, name, args, attempts FROM jobs WHERE state = 'pending' AND run_at <= ? "
+            f"AND name IN ({marks}) ORDER BY run_at, id LIMIT 100",
+            (now, *names),
+        ).fetchall():
+            if running.get(name, 0) >= _jobs[name]["concurrency"]:
+                continue
+            conn.execute(
+                "UPDATE jobs SET state = 'running', attempts = ?, owner_pid = ?, lease_until = ? WHERE id = ?",
+                (attempts + 1, os.getpid(), now + JOB_LEASE_SEC, job_id),
+            )
+            return {"id": job_id, "name": name, "args": json.loads(args), "attempts": attempts + 1}, 0.0
+
+        (due,) = conn.execute(
+            f"SELECT MIN(run_at) FROM jobs WHERE state = 'pending' AND name IN ({marks})", names
+        ).fetchone()
+        return None, JOB_POLL_SEC if due is None else max(0.01, min(JOB_POLL_SEC, due - now))
+
+    return _tx(_pick)
+
+
+def _run(job: dict):
+    spec = _jobs[job["name"]]
+    st = time()
+    try:
+        spec["fn"](**job["args"])
+    except Exception as e:
+        err = f"{type(e).__name__}: {e}"
+        final = job["attempts"] >= spec["max_attempts"]
+        if final:
+            _conn().execute(
+                "UPDATE jobs SET state = 'failed', owner_pid = NULL, lease_until = NULL, last_error = ? WHERE id = ?",
+                (err, job["id"]),
+            )
+            print(f"❌ Job {job['name']} #{job['id']} failed after {job['attempts']} attempt(s): {err}")
+            traceback.print_exc()
+        else:
+            delay = _backoff(spec, job["attempts"])
+            _conn().execute(
+                "UPDATE jobs SET state = 'pending', owner_pid = NULL, lease_until = NULL, "
+                "run_at = ?, last_error = ? WHERE id = ?",
+                (time() + delay, err, job["id"]),
+            )
+            print(f"⚠️ Job {job['name']} #{job['id']} attempt {job['attempts']} failed ({err}); retry in {delay:.0f}s")
+        outcome = "failed" if final else "retry"
+    else:
+        _conn().execute("DELETE FROM jobs WHERE id = ?", (job["id"],))
+        err, outcome = None, "done"
+
+    count_job(job["name"], outcome)
+    with _cond:
+        _stats[{"done": "runs_done", "retry": "runs_retried", "failed": "runs_failed"}[outcome]] += 1
+        t = _per_job[job["name"]]
+        t["runs"] += 1
+        t["sec"] = round(t["sec"] + time() - st, 4)
+        if err:
+            t["last_error"] = err
+
+
+def _worker_loop():
+    while True:
+        try:
+            job, wait = _claim()
+        except Exception as e:
+            print(f"❌ Job queue unavailable: {e}")
+            job, wait = None, JOB_POLL_SEC
+        if job is not None:
+            _run(job)
+            continue
+        with _cond:
+            _cond.wait(timeout=wait)
+
+
+def _my_workers() -> list:
+    return _workers[1] if _workers and _workers[0] == os.getpid() else []
+
+
+def start_job_workers(n: int | None = None):
+    global _workers
+    with _cond:
+        if _my_workers() or not _jobs:
+            return
+        threads = []
+        for i in range(n or JOB_WORKERS):
+            t = threading.Thread(target=_worker_loop, name=f"jobs-{i}", daemon=True)
+            t.start()
+            threads.append(t)
+        _workers = (os.getpid(), threads)
+    print(f"🧵 Job workers started: {len(threads)}")
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def recover_jobs() -> int:
+    """Put jobs that were running in a process that is gone back in the queue, then start the workers."""
+    def _reset(conn):
+        dead = [(job_id,) for job_id, pid in conn.execute(
+            "SELECT id, owner_pid FROM jobs WHERE state = 'running'"
+        ).fetchall() if not pid or not _pid_alive(int(pid))]
+        conn.executemany(
+            "UPDATE jobs SET state = 'pending', owner_pid = NULL, lease_until = NULL WHERE id = ?", dead
+        )
+        return len(dead)
+
+    recovered = _tx(_reset)
+    with _cond:
+        _stats["recovered"] += recovered
+    if recovered:
+        print(f"♻️ Recovered {recovered} interrupted background job(s)")
+    start_job_workers()
+    return recovered
+
+
+def list_jobs(state: str | None = None, limit: int = 200) -> list[dict]:
+    """Queued rows, oldest first; state = pending | running | failed, or all."""
+    sql = "SELECT id, name, key, args, state, attempts, run_at, created_at, event, owner_pid, last_error FROM jobs"
+    params = []
+    if state:
+        sql += " WHERE state = ?"
+        params.append(state)
+    sql += " ORDER BY run_at, id LIMIT ?"
+    params.append(int(limit))
+    cols = ("id", "name", "key", "args", "state", "attempts", "run_at", "created_at", "event", "owner_pid", "last_error")
+    out = []
+    for row in _conn().execute(sql, params).fetchall():
+        job = dict(zip(cols, row))
+        job["args"] = json.loads(job["args"])
+        out.append(job)
+    return out
+
+
+def retry_job(job_id: int) -> bool:
+    """Failed → pending now, with a fresh set of attempts."""
+    cur = _conn().execute(
+        "UPDATE jobs SET state = 'pending', attempts = 0, run_at = ? WHERE id = ? AND state = 'failed'",
+        (time(), int(job_id)),
+    )
+    if cur.rowcount:
+        start_job_workers()
+        with _cond:
+            _cond.notify()
+    return cur.rowcount == 1
+
+
+def discard_job(job_id: int) -> bool:
+    cur = _conn().execute("DELETE FROM jobs WHERE id = ? AND state = 'failed'", (int(job_id),))
+    return cur.rowcount == 1
+
+
+def job_queue_status() -> dict:
+    counts = dict(_conn().execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall())
+    (due,) = _conn().execute(
+        "SELECT COUNT(*) FROM jobs WHERE state = 'pending' AND run_at <= ?", (time(),)
+    ).fetchone()
+    with _cond:
+        return {
+            "pid": os.getpid(),
+            "workers": len(_my_workers()),
+            "pending": counts.get("pending", 0),
+            "due": due,
+            "running": counts.get("running", 0),
+            "failed": counts.get("failed", 0),
+            **_stats,
+            "jobs": {
+                name: {**dict(_per_job[name]), "concurrency": spec["concurrency"],
+                       "max_attempts": spec["max_attempts"]}
+                for name, spec in _jobs.items()
+            },
+            "subscriptions": {e: [s["job"] for s in subs] for e, subs in _subs.items()},
+        }
+
+
+def _after_fork_in_child():
+    global _cond
+    _cond = threading.Condition()   # a parent worker may have held it at fork time
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
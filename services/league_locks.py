@@ -0,0 +1,148 @@
+# league_locks.py
+"""
+Write locks for the upload tree, one per league plus one for the global pointer files.
+
+    with league_lock(league_id):     # uploads/<league>/... (season_global/week_global, weeks, shards)
+        ...
+    with pointer_lock():             # uploads/_latest.json, uploads/<league>/default_week.json
+        ...
+    if league_lock(league_id).acquire(blocking=False): ...   # scheduler jobs: retry later instead
+
+A league lock is a re-entrant thread lock plus an fcntl.flock on
+uploads/<league>/.write.lock, so it also holds across gunicorn workers; the
+flock is only taken by the outermost holder in a process. Ingest for league A
+never waits on league B. The pointer lock is taken inside a league lock
+(never the other way round), and only around the pointer write itself.
+
+Without fcntl (Windows) the locks are per process, like the AP users file.
+
+LEAGUE_LOCK_TRACE=<path> appends one JSON line per outermost hold
+({"pid", "lock", "acquired", "released"}); stress_two_leagues.py uses it to
+check that no two holders of one lock ever overlapped.
+"""
+import os
+import json
+import threading
+from time import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from config import UPLOAD_FOLDER
+
+LEAGUE_LOCK_TRACE = os.getenv("LEAGUE_LOCK_TRACE")
+POINTER = "_pointer"
+
+_registry_lock = threading.Lock()
+_locks = {}          # {(pid, lock file): _WriteLock}
+
+_stats = {"acquired": 0, "contended": 0, "wait_sec": 0.0, "max_wait_sec": 0.0}
+
+
+class _WriteLock:
+    def __init__(self, name: str, path: str):
+        self.name = name
+        self.path = path
+        self._rlock = threading.RLock()
+        self._depth = 0
+        self._fh = None
+        self._since = 0.0
+
+    def acquire(self, blocking: bool = True) -> bool:
+        st = time()
+        contended = not self._rlock.acquire(blocking=False)
+        if contended:
+            if not blocking:
+                return False
+            self._rlock.acquire()
+        self._depth += 1
+        if self._depth > 1:
+            return True
+        try:
+            if fcntl is not None:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                self._fh = open(self.path, "a")
+                try:
+                    fcntl.flock(self._fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    if not blocking:
+                        raise
+                    contended = True
+                    fcntl.flock(self._fh, fcntl.LOCK_EX)   # held by another worker
+        except Exception as e:
+            self._release_file()
+            self._depth -= 1
+            self._rlock.release()
+            if isinstance(e, BlockingIOError) and not blocking:
+                return False
+            raise
+        self._since = time()
+        waited = self._since - st
+        with _registry_lock:
+            _stats["acquired"] += 1
+            if contended:
+                _stats["contended"] += 1
+            _stats["wait_sec"] = round(_stats["wait_sec"] + waited, 4)
+            _stats["max_wait_sec"] = round(max(_stats["max_wait_sec"], waited), 4)
+        return True
+
+    def _release_file(self):
+        if self._fh is not None:
+            try:
+                fcntl.flock(self._fh, fcntl.LOCK_UN)
+            finally:
+                self._fh.close()
+                self._fh = None
+
+    def release(self):
+        try:
+            if self._depth == 1:
+                if LEAGUE_LOCK_TRACE:
+                    _trace(self.name, self._since, time())
+                self._release_file()
+        finally:
+            self._depth -= 1
+            self._rlock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def _trace(name: str, acquired: float, released: float):
+    try:
+        with open(LEAGUE_LOCK_TRACE, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"pid": os.getpid(), "lock": name,
+                                "acquired": acquired, "released": released}) + "\n")
+    except Exception:
+        pass
+
+
+def _get(name: str, path: str) -> _WriteLock:
+    key = (os.getpid(), path)   # a forked worker must not share its parent's flock handles
+    with _registry_lock:
+        lock = _locks.get(key)
+        if lock is None:
+            lock = _locks[key] = _WriteLock(name, path)
+        return lock
+
+
+def league_lock(league_id, upload_folder: str = UPLOAD_FOLDER) -> _WriteLock:
+    league_id = str(league_id or "unknown")
+    return _get(f"league:{league_id}", os.path.join(upload_folder, league_id, ".write.lock"))
+
+
+def pointer_lock(upload_folder: str = UPLOAD_FOLDER) -> _WriteLock:
+    return _get(POINTER, os.path.join(upload_folder, ".pointer.lock"))
+
+
+def league_lock_status() -> dict:
+    pid = os.getpid()
+    with _registry_lock:
+        held = sorted(l.name for (p, _), l in _locks.items() if p == pid and l._depth > 0)
+        return {"pid": pid, "held": held, "locks": sum(1 for p, _ in _locks if p == pid), **_stats}
@@ -0,0 +1,161 @@
+# metrics.py
+"""
+In-process ingest metrics, rendered in Prometheus text format at /metrics.
+
+    with span("parse", "passing"):
+        parse_passing_stats(...)
+
+Stages: decode, classify, capture, raw_write, parse, summary, discord,
+snapshot, power_rankings, roster_flush.
+
+    count_webhook("passing", len(body))
+
+Stage timings go to one histogram (madden_ingest_stage_seconds{stage,category});
+a span that raises also bumps madden_ingest_stage_failures_total. Payload
+counts/bytes/failures/duplicates are counters by category; background job
+runs (services/job_queue.py) are counted by job and outcome. Values are per
+process, so with several gunicorn workers each scrape sees the worker that answered it
+(the pid is exported as a label on madden_process_start_time_seconds).
+"""
+import os
+import threading
+from time import perf_counter, time
+
+# seconds; the Pi's slow path (roster flush, summaries) lands in the upper buckets
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_HELP = {
+    "madden_ingest_stage_seconds": ("histogram", "Time spent per ingest stage"),
+    "madden_ingest_stage_failures_total": ("counter", "Ingest stages that raised"),
+    "madden_webhooks_total": ("counter", "Webhook payloads processed"),
+    "madden_webhook_bytes_total": ("counter", "Raw webhook body bytes processed"),
+    "madden_webhook_failures_total": ("counter", "Webhook payloads whose processing raised"),
+    "madden_webhook_duplicates_total": ("counter", "Webhook payloads skipped by the ingest ledger"),
+    "madden_jobs_total": ("counter", "Background job runs by outcome (done, retry, failed)"),
+}
+
+_lock = threading.Lock()
+_counters = {}      # {(name, labels): value}
+_histograms = {}    # {(name, labels): [bucket counts..., sum, count]}
+_started = time()
+
+
+def _labels(**labels) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+
+def inc(name: str, value: float = 1, **labels):
+    key = (name, _labels(**labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name: str, value: float, buckets=STAGE_BUCKETS, **labels):
+    key = (name, _labels(**labels))
+    with _lock:
+        h = _histograms.get(key)
+        if h is None:
+            h = _histograms[key] = [0] * len(buckets) + [0.0, 0]
+        for i, b in enumerate(buckets):
+            if value <= b:
+                h[i] += 1
+        h[-2] += value
+        h[-1] += 1
+
+
+class span:
+    """Times one ingest stage; usable as a context manager or via start()/stop()."""
+
+    __slots__ = ("stage", "category", "_t0")
+
+    def __init__(self, stage: str, category: str | None = None):
+        self.stage = stage
+        self.category = category or "other"
+        self._t0 = None
+
+    def start(self) -> "span":
+        self._t0 = perf_counter()
+        return self
+
+    def stop(self, failed: bool = False) -> float:
+        if self._t0 is None:
+            return 0.0
+        took = perf_counter() - self._t0
+        self._t0 = None
+        observe("madden_ingest_stage_seconds", took, stage=self.stage, category=self.category)
+        if failed:
+            inc("madden_ingest_stage_failures_total", stage=self.stage, category=self.category)
+        return took
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop(failed=exc_type is not None)
+        return False
+
+
+def count_webhook(category: str, size: int):
+    inc("madden_webhooks_total", category=category)
+    inc("madden_webhook_bytes_total", size, category=category)
+
+
+def count_webhook_failure(category: str):
+    inc("madden_webhook_failures_total", category=category)
+
+
+def count_webhook_duplicate(category: str):
+    inc("madden_webhook_duplicates_total", category=category)
+
+
+def count_job(job: str, outcome: str):
+    inc("madden_jobs_total", job=job, outcome=outcome)
+
+
+def _esc(v) -> str:
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt_labels(labels: tuple, extra: tuple = ()) -> str:
+    items = list(labels) + list(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_esc(v)}"' for k, v in items) + "}"
+
+
+def _fmt_value(v) -> str:
+    if isinstance(v, float):
+        return repr(v)
+    return str(v)
+
+
+def render_prometheus() -> str:
+    with _lock:
+        counters = dict(_counters)
+        histograms = {k: list(v) for k, v in _histograms.items()}
+
+    lines = [
+        "# HELP madden_process_start_time_seconds Start time of the process since unix epoch",
+        "# TYPE madden_process_start_time_seconds gauge",
+        f'madden_process_start_time_seconds{{pid="{os.getpid()}"}} {_started:.3f}',
+    ]
+
+    names = sorted({k[0] for k in counters} | {k[0] for k in histograms})
+    for name in names:
+        kind, help_text = _HELP.get(name, ("untyped", name))
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        if kind == "histogram":
+            for (n, labels), h in sorted(histograms.items()):
+                if n != name:
+                    continue
+                for i, b in enumerate(STAGE_BUCKETS):
+                    lines.append(f"{name}_bucket{_fmt_labels(labels, (('le', repr(b)),))} {h[i]}")
+                lines.append(f"{name}_bucket{_fmt_labels(labels, (('le', '+Inf'),))} {h[-1]}")
+                lines.append(f"{name}_sum{_fmt_labels(labels)} {h[-2]:.6f}")
+                lines.append(f"{name}_count{_fmt_labels(labels)} {h[-1]}")
+        else:
+            for (n, labels), v in sorted(counters.items()):
+                if n == name:
+                    lines.append(f"{name}{_fmt_labels(labels)} {_fmt_value(v)}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,112 @@
+# page_cache.py
+"""
+LRU cache of rendered read-route responses.
+
+Entries are keyed by (route, league, season, week, normalized query) and
+remember the generation counters (services/generation.py) they were built
+from plus the resulting ETag:
+  - bump_generation() purges, in this process, exactly the entries that
+    depend on a bumped counter;
+  - a lookup whose ETag no longer matches (a write in another worker) is
+    treated as a miss and replaced.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+PAGE_CACHE_SIZE = int(os.getenv("PAGE_CACHE_SIZE", "256"))
+PAGE_CACHE_MAX_BYTES = int(os.getenv("PAGE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+_lock = threading.Lock()
+_entries: "OrderedDict[tuple, dict]" = OrderedDict()
+_by_dep: dict[str, set] = {}      # {generation key: {cache key, ...}}
+_bytes = 0
+
+_stats = {
+    "hits": 0,
+    "misses": 0,
+    "stale": 0,        # built under an older generation (written by another worker)
+    "evictions": 0,
+    "purged": 0,
+}
+
+
+def _drop(key):
+    """Caller must hold _lock."""
+    global _bytes
+    entry = _entries.pop(key, None)
+    if not entry:
+        return
+    _bytes -= len(entry["body"])
+    for dep in entry["deps"]:
+        keys = _by_dep.get(dep)
+        if keys:
+            keys.discard(key)
+            if not keys:
+                del _by_dep[dep]
+
+
+def page_cache_get(key: tuple, etag: str):
+    """Cached (body, status, content_type) for key if it was built under `etag`."""
+    if PAGE_CACHE_SIZE <= 0:
+        return None
+    with _lock:
+        entry = _entries.get(key)
+        if entry is None:
+            _stats["misses"] += 1
+            return None
+        if entry["etag"] != etag:
+            _stats["stale"] += 1
+            _stats["misses"] += 1
+            _drop(key)
+            return None
+        _entries.move_to_end(key)
+        _stats["hits"] += 1
+        return entry["body"], entry["status"], entry["content_type"]
+
+
+def page_cache_put(key: tuple, etag: str, deps: list[str], body: bytes, status: int, content_type: str):
+    global _bytes
+    if PAGE_CACHE_SIZE <= 0 or len(body) > PAGE_CACHE_MAX_BYTES:
+        return
+    with _lock:
+        _drop(key)
+        _entries[key] = {
+            "etag": etag,
+            "deps": list(deps),
+            "body": body,
+            "status": status,
+            "content_type": content_type,
+        }
+        _bytes += len(body)
+        for dep in deps:
+            _by_dep.setdefault(dep, set()).add(key)
+        while len(_entries) > PAGE_CACHE_SIZE or _bytes > PAGE_CACHE_MAX_BYTES:
+            oldest = next(iter(_entries))
+            _drop(oldest)
+            _stats["evictions"] += 1
+
+
+def purge_pages_for(generation_keys) -> int:
+    """Drop every entry built from any of these generation counters."""
+    with _lock:
+        doomed = set()
+        for dep in generation_keys:
+            doomed |= _by_dep.get(dep, set())
+        for key in doomed:
+            _drop(key)
+        _stats["purged"] += len(doomed)
+    return len(doomed)
+
+
+def page_cache_status() -> dict:
+    with _lock:
+        lookups = _stats["hits"] + _stats["misses"]
+        return {
+            "entries": len(_entries),
+            "capacity": PAGE_CACHE_SIZE,
+            "bytes": _bytes,
+            "max_bytes": PAGE_CACHE_MAX_BYTES,
+            "hit_rate": round(_stats["hits"] / lookups, 3) if lookups else None,
+            **_stats,
+        }
@@ -0,0 +1,194 @@
+# parse_pool.py
+"""
+Optional process pool for the CPU-heavy parse / derive steps.
+
+    PARSE_POOL_WORKERS=2     # 0 (default): everything runs inline, as before
+
+What goes through run_in_pool():
+    roster_shards.plan_roster_merge     roster flush: merge + per-player fragments + aggregate text
+    roster_records.load_roster_records  roster index: json.load + normalize_player per player
+    passing / rushing / defense parsers row normalization + parsed_*.json text
+    summary_service.build_week_summaries game summaries for a finished week
+
+Those tasks are pure: they read what they need from uploads/ and return
+ready-to-write artifacts ({"files": {path: text | None}, ...}) instead of
+writing. The ingest worker that submitted them writes the files
+(write_artifacts) and keeps everything stateful in this process: ledger,
+stats store, season totals, generation bumps, Discord posts. While a child
+runs, the submitting thread waits without holding the GIL, so page requests
+on this worker keep being served.
+
+Children are forked from a forkserver that has the task modules preloaded.
+Like any multiprocessing start method other than fork, it also imports the
+__main__ script (once, in the server): under gunicorn that is gunicorn's
+launcher; `python madden_flask_app.py` gets one extra import of the app in
+the server process (as __mp_main__, which skips the app's spool / job
+recovery, so no job workers run there), not one per child. If the pool breaks (child killed, OOM), the task
+is run inline and a fresh pool is started on the next call. The pool is shut
+down at interpreter exit; anything submitted after that runs inline.
+"""
+import os
+import atexit
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from time import perf_counter
+
+PARSE_POOL_WORKERS = int(os.getenv("PARSE_POOL_WORKERS", "0"))
+
+_lock = threading.Lock()
+_pool = None        # (pid, ProcessPoolExecutor)
+_closed = False     # interpreter exit: late callers (shutdown roster flush) run inline
+
+_stats = {
+    "submitted": 0,
+    "inline": 0,
+    "failed_over": 0,    # pool broke; ran inline instead
+    "restarts": 0,
+    "pool_sec": 0.0,     # submit → result, summed
+}
+_per_task = {}       # {task name: {"calls", "sec"}}
+
+
+def parse_pool_enabled() -> bool:
+    return PARSE_POOL_WORKERS > 0 and not _closed
+
+
+def _context():
+    methods = multiprocessing.get_all_start_methods()
+    if "forkserver" in methods:
+        ctx = multiprocessing.get_context("forkserver")
+        # __main__ once in the server (gunicorn's launcher, or the app when run
+        # directly) instead of once per child; then the task modules
+        ctx.set_forkserver_preload([
+            "__main__", "services.parse_pool",
+            "services.roster_shards", "services.roster_records", "services.summary_service",
+            "parsers.passing_parser", "parsers.rushing_parser", "parsers.defense_parser",
+        ])
+        return ctx
+    return multiprocessing.get_context("spawn")
+
+
+def _get_pool():
+    global _pool
+    pid = os.getpid()
+    with _lock:
+        if _pool and _pool[0] == pid:
+            return _pool[1]
+        # none yet, or inherited from the parent across a fork (gunicorn preload)
+        ex = ProcessPoolExecutor(max_workers=PARSE_POOL_WORKERS, mp_context=_context())
+        _pool = (pid, ex)
+        print(f"🧮 Parse pool started: {PARSE_POOL_WORKERS} worker(s)")
+        return ex
+
+
+def _drop_pool(ex):
+    global _pool
+    with _lock:
+        if _pool and _pool[1] is ex:
+            _pool = None
+            _stats["restarts"] += 1
+    try:
+        ex.shutdown(wait=False, cancel_futures=True)
+    except Exception:
+        pass
+
+
+def _note(name: str, sec: float):
+    with _lock:
+        t = _per_task.setdefault(name, {"calls": 0, "sec": 0.0})
+        t["calls"] += 1
+        t["sec"] = round(t["sec"] + sec, 4)
+
+
+def run_in_pool(fn, *args):
+    """
+    fn(*args) in a pool process when the pool is enabled, else inline.
+    fn must be a module-level function; args and result must pickle.
+    """
+    name = f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__name__}"
+    st = perf_counter()
+    if not parse_pool_enabled():
+        with _lock:
+            _stats["inline"] += 1
+        out = fn(*args)
+        _note(name, perf_counter() - st)
+        return out
+
+    ex = _get_pool()
+    try:
+        fut = ex.submit(fn, *args)
+        with _lock:
+            _stats["submitted"] += 1
+        out = fut.result()
+    except BrokenProcessPool as e:
+        print(f"⚠️ Parse pool broken ({e}); running {name} inline")
+        _drop_pool(ex)
+        with _lock:
+            _stats["failed_over"] += 1
+        out = fn(*args)
+    else:
+        with _lock:
+            _stats["pool_sec"] = round(_stats["pool_sec"] + perf_counter() - st, 4)
+    _note(name, perf_counter() - st)
+    return out
+
+
+def _atomic_write_text(path: str, text: str):
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except Exception:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def write_artifacts(files: dict) -> int:
+    """
+    Write a task's {"files": ...} in order (dicts keep insertion order, so a
+    task lists its commit file last). None removes the path. Returns bytes written.
+    """
+    written = 0
+    for path, text in (files or {}).items():
+        if text is None:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            continue
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        _atomic_write_text(path, text)
+        written += len(text)
+    return written
+
+
+def shutdown_parse_pool():
+    """Stop the pool (this process only); later run_in_pool() calls run inline."""
+    global _closed, _pool
+    with _lock:
+        _closed = True
+        pool, _pool = _pool, None
+    if pool and pool[0] == os.getpid():
+        pool[1].shutdown(wait=True, cancel_futures=True)
+
+
+atexit.register(shutdown_parse_pool)
+
+
+def parse_pool_status() -> dict:
+    with _lock:
+        alive = bool(_pool and _pool[0] == os.getpid())
+        return {
+            "pid": os.getpid(),
+            "workers": PARSE_POOL_WORKERS,
+            "enabled": parse_pool_enabled(),
+            "started": alive,
+            **_stats,
+            "tasks": {k: dict(v) for k, v in _per_task.items()},
+        }
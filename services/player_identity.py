@@ -0,0 +1,231 @@
+# player_identity.py
+"""
+One player identity index per league roster generation.
+
+Stat rows (passing/rushing/receiving/defense) carry whatever ids and name
+formats the Companion app sent for that category; the roster is the source of
+truth for position, jersey and "who is this". Resolution tries, in order:
+
+    rosterId → playerId → (full name, team) → (first initial + last, team) → (last, team)
+
+Each step is one dict lookup. The index is rebuilt only when the roster file
+changes, and counts which step matched so the fallback chain can be tuned
+(/api/health/identity).
+"""
+import os
+import re
+import json
+import threading
+from collections import Counter
+
+from config import UPLOAD_FOLDER
+
+METHODS = ("rosterId", "playerId", "name_team", "initial_last_team", "last_team")
+
+_POS, _JERSEY, _KEY = 0, 1, 2
+
+_lock = threading.Lock()
+_indexes = {}   # {league_id: PlayerIdentityIndex}
+
+
+def _clean_name(s: str) -> str:
+    if not s: return ""
+    return re.sub(r"[^a-z0-9]", "", str(s).lower())
+
+
+def _name_keys(first: str | None, last: str | None, full: str | None) -> tuple[str, str, str]:
+    first = (first or "").strip(); last = (last or "").strip(); full = (full or "").strip()
+    clean_full = _clean_name(full or (first + " " + last))
+    first_initial = (first[:1] or "").lower()
+    clean_last = _clean_name(last)
+    init_last = (first_initial + clean_last) if first_initial and clean_last else ""
+    return clean_full, init_last, clean_last
+
+
+def _row_name_keys(row: dict) -> tuple[str, str, str]:
+    """Stat rows only have a display name ("Caleb Williams", "C.Williams", ...)."""
+    disp = (row.get("playerName") or row.get("fullName") or row.get("name") or row.get("displayName") or "").strip()
+
+    # Try to split formats like "C.Weigman"
+    m = re.match(r"^\s*([A-Za-z])\s*[\.\-_\s]*([A-Za-z']+)\s*$", disp)
+    if m:
+        first_guess, last_guess = m.group(1), m.group(2)
+    else:
+        parts = re.split(r"[\s._-]+", disp) if disp else []
+        first_guess = parts[0] if parts else ""
+        last_guess  = parts[-1] if len(parts) > 1 else ""
+    return _name_keys(first_guess, last_guess, disp)
+
+
+def roster_player_key(p: dict) -> str:
+    """Same key /rookies and season totals use for a roster player."""
+    return str(
+        p.get("rosterId")
+        or p.get("playerId")
+        or f"{_display_name(p)}_{p.get('teamId')}"
+    )
+
+
+def _display_name(p: dict) -> str:
+    first = p.get("firstName") or ""
+    last = p.get("lastName") or ""
+    return (first + " " + last).strip() or p.get("fullName") or p.get("name") or p.get("playerName") or "Unknown"
+
+
+class Resolution:
+    __slots__ = ("pos", "jersey", "key", "method")
+
+    def __init__(self, pos=None, jersey=None, key=None, method=None):
+        self.pos, self.jersey, self.key, self.method = pos, jersey, key, method
+
+
+class PlayerIdentityIndex:
+    def __init__(self, players: list[dict], source: str | None = None, mtime: float | None = None):
+        self.source = source
+        self.mtime = mtime
+        self.players = len(players)
+        self._maps = {m: {} for m in METHODS}
+        self._stats = Counter()
+        self._stats_lock = threading.Lock()
+        for rp in players:
+            self._add(rp)
+
+    def _add(self, rp: dict):
+        raw = rp.get("_raw") or {}
+        rid = str(rp.get("rosterId") or rp.get("id") or raw.get("rosterId") or raw.get("id") or "")
+        pid = str(
+            rp.get("playerId")
+            or raw.get("playerId")
+            or raw.get("id")
+            or raw.get("personaId")
+            or ""
+        )
+        tid = str(rp.get("teamId") or raw.get("teamId") or raw.get("team") or "").strip()
+
+        first = raw.get("firstName") or rp.get("firstName")
+        last  = raw.get("lastName")  or rp.get("lastName")
+        full  = (rp.get("name") or raw.get("fullName") or raw.get("playerName")
+                 or ((first or "") + " " + (last or ""))).strip()
+        clean_full, init_last, clean_last = _name_keys(first, last, full)
+
+        pos = rp.get("pos") or rp.get("position") or raw.get("position") or raw.get("pos")
+        jersey = (rp.get("jerseyNum") or raw.get("jerseyNum") or raw.get("uniformNumber")
+                  or raw.get("jerseyNumber") or raw.get("jersey") or raw.get("number"))
+        if jersey in (None, "", -1):
+            jersey = None
+        key = roster_player_key(rp)
+
+        keys = (
+            ("rosterId", rid),
+            ("playerId", pid),
+            ("name_team", (clean_full, tid) if clean_full and tid else None),
+            ("initial_last_team", (init_last, tid) if init_last and tid else None),
+            ("last_team", (clean_last, tid) if clean_last and tid else None),
+        )
+        for method, k in keys:
+            if not k:
+                continue
+            entry = self._maps[method].get(k)
+            if entry is None:
+                self._maps[method][k] = [pos or None, jersey, key]
+                continue
+            # later roster entries win, but only for the fields they actually have
+            if pos: entry[_POS] = pos
+            if jersey is not None: entry[_JERSEY] = jersey
+            entry[_KEY] = key
+
+    def _candidates(self, row: dict):
+        rid = str(row.get("rosterId") or row.get("playerId") or row.get("id") or "")
+        pid = str(row.get("playerId") or row.get("id") or row.get("personaId") or "")
+        tid = str(row.get("teamId") or row.get("team") or "").strip()
+        clean_full, init_last, clean_last = _row_name_keys(row)
+        return (
+            ("rosterId", rid),
+            ("playerId", pid),
+            ("name_team", (clean_full, tid) if clean_full and tid else None),
+            ("initial_last_team", (init_last, tid) if init_last and tid else None),
+            ("last_team", (clean_last, tid) if clean_last and tid else None),
+        )
+
+    def resolve(self, row: dict) -> Resolution:
+        """Walk the fallback chain; pos and jersey each come from the first step that has one."""
+        res = Resolution()
+        for method, k in self._candidates(row):
+            if not k:
+                continue
+            entry = self._maps[method].get(k)
+            if entry is None:
+                continue
+            if res.method is None:
+                res.method, res.key = method, entry[_KEY]
+            if res.pos is None and entry[_POS]:
+                res.pos = entry[_POS]
+            if res.jersey is None and entry[_JERSEY] is not None:
+                res.jersey = entry[_JERSEY]
+            if res.pos is not None and res.jersey is not None:
+                break
+        with self._stats_lock:
+            self._stats["lookups"] += 1
+            self._stats[res.method or "miss"] += 1
+        return res
+
+    def status(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats.pop("lookups", 0)
+        return {
+            "source": self.source,
+            "players": self.players,
+            "keys": {m: len(self._maps[m]) for m in METHODS},
+            "lookups": lookups,
+            "matched_by": {m: stats.get(m, 0) for m in METHODS},
+            "misses": stats.get("miss", 0),
+            "match_rate": round(1 - stats.get("miss", 0) / lookups, 4) if lookups else None,
+        }
+
+
+def _roster_path(league_id: str, upload_folder: str) -> str | None:
+    base = os.path.join(upload_folder, str(league_id), "season_global", "week_global")
+    for fn in ("parsed_rosters.json", "rosters.json"):
+        p = os.path.join(base, fn)
+        if os.path.exists(p):
+            return p
+    return None
+
+
+def _load_players(path: str) -> list[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    if isinstance(raw, dict):
+        return raw.get("rosterInfoList") or raw.get("players") or raw.get("items") or []
+    return raw if isinstance(raw, list) else []
+
+
+def get_identity_index(league_id, upload_folder: str = UPLOAD_FOLDER) -> PlayerIdentityIndex:
+    """Cached per roster file mtime, i.e. rebuilt once per roster flush."""
+    league_id = str(league_id)
+    path = _roster_path(league_id, upload_folder)
+    mtime = os.path.getmtime(path) if path else None
+
+    with _lock:
+        idx = _indexes.get(league_id)
+        if idx is not None and idx.source == path and idx.mtime == mtime:
+            return idx
+
+    try:
+        players = _load_players(path) if path else []
+    except Exception as e:
+        print(f"⚠️ Identity index: couldn't read {path}: {e}")
+        players = []
+
+    idx = PlayerIdentityIndex(players, source=path, mtime=mtime)
+    with _lock:
+        _indexes[league_id] = idx
+    print(f"🪪 Identity index built for league {league_id} (players={idx.players})")
+    return idx
+
+
+def identity_index_status(league_id=None) -> dict:
+    with _lock:
+        items = list(_indexes.items())
+    return {lid: idx.status() for lid, idx in items if league_id in (None, lid)}
@@ -1,7 +1,19 @@
 import os
 import json
+import threading
+from hashlib import sha256
 from datetime import datetime
 
+from services.stats_store import load_standings_rows, load_league_info
+from services.generation import bump_generation
+from services.metrics import span
+
+
+POWER_RANKINGS_DEBOUNCE_SEC = float(os.getenv("POWER_RANKINGS_DEBOUNCE_SEC", "5"))
+
+_rankings_state = {}      # {league_id: {"output", "etag", "mtime"}}
+_rankings_lock = threading.Lock()
+
 
 def _load_json_safe(path, default=None):
     try:
@@ -69,6 +81,13 @@ def _index_items(data):
 
 
 def load_standings_map(upload_folder, league_id):
+    stored = load_standings_rows(league_id)
+    if stored is not None:
+        merged = {}
+        for tid, (raw_row, parsed_row) in stored.items():
+            merged[tid] = {**(raw_row or {}), **(parsed_row or {})}
+        return merged
+
     base = os.path.join(upload_folder, str(league_id), "season_global", "week_global")
 
     raw_path = os.path.join(base, "standings.json")
@@ -89,12 +108,20 @@ def load_standings_map(upload_folder, league_id):
 
 
 def load_team_map(upload_folder, league_id):
+    _, stored_map = load_league_info(league_id)
+    if stored_map:
+        return stored_map
+
     path = os.path.join(upload_folder, str(league_id), "team_map.json")
     data = _load_json_safe(path, {})
     return data if isinstance(data, dict) else {}
 
 
 def load_league_teams(upload_folder, league_id):
+    stored_info, _ = load_league_info(league_id)
+    if stored_info is not None:
+        return stored_info, stored_info.get("leagueTeamInfoList") or []
+
     path = os.path.join(
         upload_folder,
         str(league_id),
@@ -283,3 +310,71 @@ def build_power_rankings(upload_folder, league_id, season=None, week=None, top_n
     _atomic_write_json(out_path, output)
 
     return output
+
+
+# ---------------------------------------------------------------------------
+# Rebuild (services/build_graph.py) + in-memory result
+# ---------------------------------------------------------------------------
+
+def power_rankings_path(upload_folder, league_id):
+    return os.path.join(upload_folder, str(league_id), "power_rankings.json")
+
+
+def _etag_for(output):
+    return sha256(json.dumps(output, sort_keys=True).encode()).hexdigest()[:32]
+
+
+def rebuild_power_rankings(upload_folder, league_id, season=None, week=None):
+    """
+    Rebuild power_rankings.json and return the output dict. Whether it is due
+    is the build graph's call (input hashes in _build_state.json).
+    """
+    league_id = str(league_id)
+
+    with span("power_rankings", "standings"):
+        output = build_power_rankings(upload_folder, league_id, season=season, week=week, top_n=10)
+
+    path = power_rankings_path(upload_folder, league_id)
+    with _rankings_lock:
+        _rankings_state[league_id] = {
+            "output": output,
+            "etag": _etag_for(output),
+            "mtime": os.path.getmtime(path) if os.path.exists(path) else None,
+        }
+
+    bump_generation(league_id)
+    print(f"✅ Power rankings rebuilt for league {league_id} {season} {week}")
+    return output
+
+
+def get_power_rankings(upload_folder, league_id):
+    """
+    Returns (output, etag) from memory, reloading power_rankings.json only when
+    it changed on disk (e.g. rebuilt by another worker). (None, None) if missing.
+    """
+    league_id = str(league_id)
+    path = power_rankings_path(upload_folder, league_id)
+
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        mtime = None
+
+    with _rankings_lock:
+        st = _rankings_state.get(league_id)
+        if st and st["mtime"] == mtime and st.get("output") is not None:
+            return st["output"], st["etag"]
+
+    if mtime is None:
+        return None, None
+
+    output = _load_json_safe(path)
+    if output is None:
+        return None, None
+
+    etag = _etag_for(output)
+    with _rankings_lock:
+        st = _rankings_state.setdefault(league_id, {})
+        st.update({"output": output, "etag": etag, "mtime": mtime})
+
+    return output, etag
@@ -0,0 +1,132 @@
+# request_body.py
+"""
+Content-Encoding aware webhook bodies.
+
+    stream = decoded_stream(request)     # file-like, gzip/deflate undone on the fly
+    body = read_decoded(request)         # bytes
+    headers = decoded_headers(request)   # dict(request.headers), minus Content-Encoding/-Length if encoded
+
+Backfill tooling (and anything behind a proxy that compresses uploads) posts
+`Content-Encoding: gzip`; everything downstream of the route (ledger hash,
+spool, capture log, parsers) sees the decoded bytes, so a gzip post and a
+plain post of the same payload are the same payload. The headers stored with
+the job drop the encoding, otherwise a replay of the capture log would send
+plain bytes labelled as gzip.
+
+Decoded bodies are capped at WEBHOOK_MAX_BODY_BYTES (a small gzip can expand
+to gigabytes); going over raises BodyTooLarge.
+"""
+import os
+import zlib
+
+WEBHOOK_MAX_BODY_BYTES = int(os.getenv("WEBHOOK_MAX_BODY_BYTES", str(256 * 1024 * 1024)))
+
+_GZIP = {"gzip", "x-gzip"}
+_DEFLATE = {"deflate"}
+_IDENTITY = {"", "identity"}
+_DROP_HEADERS = {"content-encoding", "content-length"}
+
+
+class UnsupportedEncoding(ValueError):
+    pass
+
+
+class BodyTooLarge(ValueError):
+    pass
+
+
+def _encoding(request) -> str:
+    return (request.headers.get("Content-Encoding") or "").strip().lower()
+
+
+class _DecodedStream:
+    """read(n) / line iteration over a zlib-decoded raw stream, with the decoded size capped."""
+
+    def __init__(self, raw, wbits: int | None, limit: int):
+        self._raw = raw
+        self._z = zlib.decompressobj(wbits) if wbits is not None else None
+        self._buf = b""
+        self._eof = False
+        self._limit = limit
+        self._total = 0      # decoded bytes produced so far
+
+    def _fill(self, n: int):
+        while len(self._buf) < n and not self._eof:
+            chunk = self._raw.read(64 * 1024)
+            if not chunk:
+                out = self._z.flush() if self._z is not None else b""
+                self._eof = True
+            elif self._z is None:
+                out = chunk
+            else:
+                out = self._z.decompress(chunk)
+                # concatenated gzip members (e.g. `cat a.gz b.gz`) are one body
+                while self._z.eof and self._z.unused_data:
+                    rest = self._z.unused_data
+                    self._z = zlib.decompressobj(32 + zlib.MAX_WBITS)
+                    out += self._z.decompress(rest)
+            self._total += len(out)
+            if self._total > self._limit:
+                raise BodyTooLarge(f"decoded body exceeds {self._limit} bytes")
+            self._buf += out
+
+    def read(self, n: int = -1) -> bytes:
+        if n is None or n < 0:
+            parts = []
+            while True:
+                chunk = self.read(64 * 1024)
+                if not chunk:
+                    return b"".join(parts)
+                parts.append(chunk)
+        self._fill(n)
+        data, self._buf = self._buf[:n], self._buf[n:]
+        return data
+
+    def __iter__(self):
+        """Lines, newline included (NDJSON)."""
+        start = 0
+        while True:
+            nl = self._buf.find(b"\n", start)
+            if nl >= 0:
+                line, self._buf = self._buf[:nl + 1], self._buf[nl + 1:]
+                start = 0
+                yield line
+                continue
+            if self._eof:
+                if self._buf:
+                    line, self._buf = self._buf, b""
+                    yield line
+                return
+            start = len(self._buf)
+            self._fill(len(self._buf) + 64 * 1024)
+
+
+def decoded_stream(request, limit: int | None = None) -> _DecodedStream:
+    """The request body as a file-like object with Content-Encoding undone."""
+    enc = _encoding(request)
+    if enc in _GZIP:
+        wbits = 32 + zlib.MAX_WBITS      # gzip (or zlib) header
+    elif enc in _DEFLATE:
+        wbits = zlib.MAX_WBITS
+    elif enc in _IDENTITY:
+        wbits = None
+    else:
+        raise UnsupportedEncoding(f"Content-Encoding {enc!r} not supported")
+    return _DecodedStream(request.stream, wbits, limit or WEBHOOK_MAX_BODY_BYTES)
+
+
+def read_decoded(request, limit: int | None = None) -> bytes:
+    """Whole decoded body. Plain bodies go through request.get_data() as before."""
+    if _encoding(request) in _IDENTITY:
+        body = request.get_data()
+        if len(body) > (limit or WEBHOOK_MAX_BODY_BYTES):
+            raise BodyTooLarge(f"body exceeds {limit or WEBHOOK_MAX_BODY_BYTES} bytes")
+        return body
+    return decoded_stream(request, limit).read()
+
+
+def decoded_headers(request) -> dict:
+    """dict(request.headers) as the job/capture log should record it for the decoded body."""
+    if _encoding(request) in _IDENTITY:
+        return dict(request.headers)
+    return {k: v for k, v in request.headers.items() if k.lower() not in _DROP_HEADERS}
@@ -0,0 +1,324 @@
+# roster_records.py
+"""
+Compact player records for the in-memory roster index.
+
+A normalized player used to be a ~37-key dict that also held the whole
+Companion payload under "_raw", so every cached league existed twice. A
+RosterPlayer keeps the normalized fields in __slots__ (position/team strings
+interned) plus the handful of raw identity fields callers look up
+(RAW_KEPT). The full raw payload is re-read from the roster file only when
+something asks for a raw key outside that set, and is dropped again after
+RAW_CACHE_SEC.
+
+Records behave like the old dicts for readers: p["name"], p.get("pos"),
+p.get("_raw").get("rosterId"), dict(p), Jinja's p.ovr / p.get(c).
+"""
+import os
+import sys
+import json
+import threading
+from collections.abc import Mapping
+from time import time
+
+from services.scheduler import schedule
+
+RAW_CACHE_SEC = float(os.getenv("ROSTER_RAW_CACHE_SEC", "60"))
+
+# normalized fields, in the order the old dict had them ("_raw" sat after jerseyNum)
+FIELDS = (
+    "name", "teamId", "pos", "ovr", "jerseyNum",
+    "age", "dev",
+    "spd", "acc", "agi", "str", "awr",
+    "thp", "tha", "cth", "cit", "spc",
+    "car", "btk",
+    "tak", "bsh", "pmv", "fmv", "prc", "mcv", "zcv", "prs",
+    "pbk", "rbk", "ibl",
+    "kpw", "kac",
+    "injuryLength", "injuryType", "isInjured",
+)
+_KEYS = FIELDS[:5] + ("_raw",) + FIELDS[5:]
+_FIELD_SET = frozenset(FIELDS)
+
+# raw keys answered without touching the file (ids, names, jersey, rookie status)
+RAW_KEPT = (
+    "rosterId", "id", "playerId", "personaId",
+    "firstName", "lastName", "fullName", "playerName",
+    "teamId", "team", "position", "pos",
+    "jerseyNum", "uniformNumber", "jerseyNumber", "jersey", "number",
+    "yearsPro", "proYears", "years", "rookieYear",
+)
+_KEPT_INDEX = {k: i for i, k in enumerate(RAW_KEPT)}
+_MISSING = object()
+
+_INTERN_FIELDS = ("teamId", "pos", "injuryType")
+
+
+def normalize_player(p: dict) -> dict:
+    """Companion roster entry → flat dict of the fields the roster pages use (old layout)."""
+    def g(*keys, default=None):
+        for k in keys:
+            if k in p and p[k] is not None:
+                return p[k]
+        return default
+
+    first = g("firstName", "first_name", default="")
+    last  = g("lastName", "last_name", default="")
+    name  = (first + " " + last).strip() or g("fullName", "name", default="Unknown")
+
+    team_id = str(g("teamId", "teamID", "team", default=""))
+    pos     = g("position", "pos", default="UNK")
+
+    jersey  = g("jerseyNum", "uniformNumber", "jerseyNumber", "jersey", "number", default=None)
+
+    ovr = g("overallRating", "ovr", "overall", "playerBestOvr", "playerSchemeOvr", default=0)
+    age = g("age", default=None)
+    dev = g("devTrait", "developmentTrait", "dev", default=None)
+
+    speed = g("speedRating", "spd", "speed", default=None)
+    acc   = g("accelerationRating", "accelRating", "acc", default=None)
+    agi   = g("agilityRating", "agi", "agility", default=None)
+    strn  = g("strengthRating", "str", "strength", default=None)
+    awa   = g("awarenessRating", "awareRating", "awr", default=None)
+
+    thp   = g("throwPowerRating", "throwPower", default=None)
+    tha   = g("throwAccRating", "throwAccuracy", "throwAccuracyShort",
+              "throwAccShortRating", "throwAccMidRating", "throwAccDeepRating",
+              "throwAccShort", "throwAccMid", "throwAccDeep", default=None)
+
+    cat   = g("catching", "catchRating", "catchingRating", default=None)
+    cit   = g("catchInTraffic", "cITRating", "catchInTrafficRating", default=None)
+    spc   = g("spectacularCatch", "specCatchRating", "spectacularCatchRating", default=None)
+    car   = g("carrying", "carryRating", "carryingRating", default=None)
+    btk   = g("breakTackleRating", "breakTackle", default=None)
+
+    tak   = g("tackleRating", "tackle", default=None)
+    bsh   = g("blockSheddingRating", "blockShedRating", "blockShed", default=None)
+    pmv   = g("powerMovesRating", "powerMoves", default=None)
+    fmv   = g("finesseMovesRating", "finesseMoves", default=None)
+    prc   = g("playRecognitionRating", "playRecRating", "playRec", default=None)
+    mcv   = g("manCoverageRating", "manCoverRating", "man", default=None)
+    zcv   = g("zoneCoverageRating", "zoneCoverRating", "zone", default=None)
+    prs   = g("pressRating", "press", default=None)
+
+    pbk   = g("passBlockRating", "passBlockPowerRating", "passBlockFinesseRating", "pbk", default=None)
+    rbk   = g("runBlockRating", "runBlockPowerRating", "runBlockFinesseRating", "rbk", default=None)
+    ibl   = g("impactBlocking", "impactBlockRating", "impactBlock", default=None)
+
+    kpw   = g("kickPowerRating", "kickPower", "kpw", default=None)
+    kac   = g("kickAccRating", "kickAccuracy", "kac", default=None)
+
+    try:
+        ovr = int(ovr)
+    except Exception:
+        ovr = ovr or 0
+
+    # 🩹 Injury fields (various possible keys from Companion exports)
+    inj_len = g("injuryLength", "injuryWeeks", "injury_len", "injury_weeks", default=0)
+    inj_type = g("injuryType", "injury", "injuryDesc", "injury_desc", default=None)
+    try:
+        inj_len_int = int(str(inj_len).strip())
+    except Exception:
+        inj_len_int = 0
+
+    return {
+        "name": name, "teamId": team_id, "pos": pos, "ovr": ovr,
+        "jerseyNum": jersey,
+        "_raw": p,
+
+        "age": age, "dev": dev,
+        "spd": speed, "acc": acc, "agi": agi, "str": strn, "awr": awa,
+        "thp": thp, "tha": tha, "cth": cat, "cit": cit, "spc": spc,
+        "car": car, "btk": btk,
+        "tak": tak, "bsh": bsh, "pmv": pmv, "fmv": fmv, "prc": prc, "mcv": mcv, "zcv": zcv, "prs": prs,
+        "pbk": pbk, "rbk": rbk, "ibl": ibl,
+        "kpw": kpw, "kac": kac,
+
+        "injuryLength": inj_len_int,  # integer weeks
+        "injuryType": inj_type,  # text if present
+        "isInjured": inj_len_int > 0,  # handy boolean for templates
+    }
+
+
+def load_roster_records(path: str) -> list[tuple[tuple, dict]]:
+    """
+    Roster file → [(FIELDS values, RAW_KEPT subset of the raw player), ...] in
+    file order, for RosterPlayer.from_values. Runs in the parse pool when it is
+    enabled (services/parse_pool.py), so the json.load + normalize_player pass
+    stays off the web worker's GIL; raises on an unreadable file.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+
+    # Support either the Companion raw shape or the parsed shape
+    if isinstance(raw, dict):
+        players_raw = raw.get("rosterInfoList") or raw.get("players") or raw.get("items") or []
+    elif isinstance(raw, list):
+        players_raw = raw
+    else:
+        players_raw = []
+
+    out = []
+    for p in players_raw:
+        n = normalize_player(p)
+        out.append((tuple(n[k] for k in FIELDS), {k: p[k] for k in RAW_KEPT if k in p}))
+    return out
+
+
+class RawRosterSource:
+    """Re-reads the roster file on demand to serve full raw payloads."""
+
+    def __init__(self, path: str, mtime: float):
+        self.path = path
+        self.mtime = mtime
+        self._lock = threading.Lock()
+        self._players = None
+        self._loaded_at = 0.0
+
+    def raw(self, i: int) -> dict:
+        with self._lock:
+            now = time()
+            if self._players is None or now - self._loaded_at > RAW_CACHE_SEC:
+                self._players = self._load()
+                self._loaded_at = now
+                schedule(f"roster_raw_drop:{id(self)}", RAW_CACHE_SEC, self._drop, on_shutdown=False)
+            players = self._players
+        return players[i] if 0 <= i < len(players) else {}
+
+    def _drop(self):
+        with self._lock:
+            if time() - self._loaded_at >= RAW_CACHE_SEC - 0.05:
+                self._players = None
+
+    def _load(self) -> list:
+        try:
+            if os.path.getmtime(self.path) != self.mtime:
+                return []   # file replaced; the index will be rebuilt on next load
+            with open(self.path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+        except Exception as e:
+            print(f"⚠️ Couldn't reload raw roster {self.path}: {e}")
+            return []
+        if isinstance(raw, dict):
+            return raw.get("rosterInfoList") or raw.get("players") or raw.get("items") or []
+        return raw if isinstance(raw, list) else []
+
+
+class RawView(Mapping):
+    """Lazy stand-in for the old p["_raw"] dict."""
+
+    __slots__ = ("_rec",)
+
+    def __init__(self, rec):
+        self._rec = rec
+
+    def _full(self) -> dict:
+        src = self._rec._src
+        return src.raw(self._rec._i) if src is not None else {}
+
+    def get(self, key, default=None):
+        i = _KEPT_INDEX.get(key)
+        if i is not None:
+            v = self._rec._kept[i]
+            return default if v is _MISSING else v
+        return self._full().get(key, default)
+
+    def __getitem__(self, key):
+        v = self.get(key, _MISSING)
+        if v is _MISSING:
+            raise KeyError(key)
+        return v
+
+    def __iter__(self):
+        return iter(self._full())
+
+    def __len__(self):
+        return len(self._full())
+
+    def __bool__(self):
+        return True
+
+
+class RosterPlayer:
+    __slots__ = FIELDS + ("_kept", "_src", "_i", "_extra")
+
+    def __init__(self, normalized: dict, raw: dict, src: RawRosterSource | None = None, i: int = -1):
+        for k in FIELDS:
+            v = normalized.get(k)
+            if k in _INTERN_FIELDS and isinstance(v, str):
+                v = sys.intern(v)
+            setattr(self, k, v)
+        self._kept = tuple(raw.get(k, _MISSING) for k in RAW_KEPT)
+        self._src = src
+        self._i = i
+        self._extra = None
+
+    @classmethod
+    def from_values(cls, values: tuple, kept: dict, src: RawRosterSource | None = None, i: int = -1) -> "RosterPlayer":
+        """Build from one load_roster_records() entry."""
+        q = object.__new__(cls)
+        for k, v in zip(FIELDS, values):
+            if k in _INTERN_FIELDS and isinstance(v, str):
+                v = sys.intern(v)
+            setattr(q, k, v)
+        q._kept = tuple(kept.get(k, _MISSING) for k in RAW_KEPT)
+        q._src = src
+        q._i = i
+        q._extra = None
+        return q
+
+    # --- dict-style access -------------------------------------------------
+    def get(self, key, default=None):
+        if key in _FIELD_SET:
+            return getattr(self, key)
+        if key == "_raw":
+            return RawView(self)
+        if self._extra and key in self._extra:
+            return self._extra[key]
+        return default
+
+    def __getitem__(self, key):
+        v = self.get(key, _MISSING)
+        if v is _MISSING:
+            raise KeyError(key)
+        return v
+
+    def __setitem__(self, key, value):
+        if key in _FIELD_SET:
+            setattr(self, key, value)
+        elif key == "_raw":
+            raise TypeError("_raw is read-only on roster records")
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __contains__(self, key):
+        return key in _FIELD_SET or key == "_raw" or bool(self._extra and key in self._extra)
+
+    def keys(self):
+        return list(_KEYS) + list(self._extra or ())
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(_KEYS) + len(self._extra or ())
+
+    def items(self):
+        return [(k, self[k]) for k in self.keys()]
+
+    def values(self):
+        return [self[k] for k in self.keys()]
+
+    def copy(self) -> "RosterPlayer":
+        q = object.__new__(RosterPlayer)
+        for k in self.__slots__:
+            setattr(q, k, getattr(self, k))
+        q._extra = dict(self._extra) if self._extra else None
+        return q
+
+    def __repr__(self):
+        return f"RosterPlayer({self.name!r}, teamId={self.teamId!r}, pos={self.pos!r}, ovr={self.ovr!r})"
+
+
+Mapping.register(RosterPlayer)
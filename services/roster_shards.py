@@ -0,0 +1,268 @@
+# roster_shards.py
+"""
+Incremental roster merge: per-team shards + one aggregate write.
+
+    uploads/<league>/season_global/week_global/
+        rosters_by_team/<teamId>.json    one shard per team (FA = 0.json), raw player list
+        _roster_shards.json              {"teams": {teamId: {"sha256": ..., "count": n}}}
+        parsed_rosters.json              {"players": [...], "meta": {...}} (ovr, spd desc)
+
+merge_roster_export() takes the players of one roster export and, in a single
+pass, works out which shards they touch: the teams that sent players, plus any
+team a player moved away from. Only those shards are rebuilt; a shard whose
+content hash (sha256 of its compact JSON) is unchanged is not rewritten.
+Players an export doesn't mention stay where they were, so a partial export
+never shrinks the roster.
+
+The aggregate is written once, from per-player JSON fragments cached per
+process and keyed by shard hash: unchanged teams are never re-serialized, so a
+one-team update costs O(team) serialization plus the copy of the file. With
+the parse pool on (services/parse_pool.py) that cache lives in the pool
+process that ran the merge.
+"""
+import os
+import json
+import threading
+from collections import Counter
+from hashlib import sha256
+
+from services.parse_pool import run_in_pool, write_artifacts
+
+SHARDS_DIR = "rosters_by_team"
+MANIFEST = "_roster_shards.json"
+AGGREGATE = "parsed_rosters.json"
+
+_lock = threading.Lock()
+_folder_locks = {}   # {output_folder: Lock}; leagues merge independently
+_cache = {}    # {output_folder: {teamId: {"sha256": str, "keys": set, "entries": [(sort_key, fragment)]}}}
+
+
+def player_key(p: dict) -> str:
+    """Stable key for merging players from many team payloads (chunk accumulator + shards)."""
+    for k in ("rosterId", "playerId", "id", "personaId", "uniqueId"):
+        v = p.get(k)
+        if v not in (None, "", 0):
+            return str(v)
+    first = p.get("firstName") or p.get("first_name") or ""
+    last = p.get("lastName") or p.get("last_name") or ""
+    pos = p.get("position") or p.get("pos") or ""
+    team = p.get("teamId") or p.get("teamID") or p.get("team") or ""
+    return f"{first}.{last}.{pos}.{team}".lower()
+
+
+def team_of(p: dict) -> str:
+    tid = p.get("teamId")
+    return str(tid) if tid is not None else "0"
+
+
+def _safe_int(x, d=0):
+    try:
+        return int(x)
+    except Exception:
+        return d
+
+
+def _sort_key(p: dict, tid: str, i: int) -> tuple:
+    # same order parse_rosters_data used (OVR then SPD, high first); ties by team/shard position
+    return (
+        -_safe_int(p.get("playerBestOvr") or p.get("overallRating") or p.get("ovr"), 0),
+        -_safe_int(p.get("speedRating") or p.get("spd"), 0),
+        tid,
+        i,
+    )
+
+
+def _fragment(p: dict) -> str:
+    # json.dump(..., indent=2) of a player nested at depth 2 of {"players": [...]}
+    return "    " + json.dumps(p, indent=2).replace("\n", "\n    ")
+
+
+def _digest(players: list[dict]) -> str:
+    return sha256(json.dumps(players, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+def _atomic_write_text(path: str, text: str):
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except Exception:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _players_of(raw) -> list:
+    if isinstance(raw, list):
+        return raw
+    if isinstance(raw, dict):
+        return raw.get("rosterInfoList") or raw.get("players") or raw.get("items") or []
+    return []
+
+
+def _read_json(path: str):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def _shard_path(output_folder: str, tid: str) -> str:
+    return os.path.join(output_folder, SHARDS_DIR, f"{tid}.json")
+
+
+def _load_shard(output_folder: str, tid: str) -> list[dict]:
+    return _players_of(_read_json(_shard_path(output_folder, tid)))
+
+
+def _entry(tid: str, players: list[dict], digest: str) -> dict:
+    return {
+        "sha256": digest,
+        "keys": {player_key(p) for p in players},
+        "entries": [(_sort_key(p, tid, i), _fragment(p)) for i, p in enumerate(players)],
+    }
+
+
+def _bootstrap_manifest(output_folder: str) -> dict:
+    """First run on an existing tree: adopt the shard files, else split parsed_rosters.json."""
+    teams = {}
+    shard_dir = os.path.join(output_folder, SHARDS_DIR)
+    if os.path.isdir(shard_dir):
+        for fn in sorted(os.listdir(shard_dir)):
+            if fn.endswith(".json"):
+                tid = fn[:-len(".json")]
+                players = _load_shard(output_folder, tid)
+                teams[tid] = {"sha256": _digest(players), "count": len(players)}
+        if teams:
+            return teams
+
+    by_team = {}
+    for p in _players_of(_read_json(os.path.join(output_folder, AGGREGATE))):
+        by_team.setdefault(team_of(p), []).append(p)
+    if by_team:
+        os.makedirs(shard_dir, exist_ok=True)
+    for tid, players in by_team.items():
+        _atomic_write_text(_shard_path(output_folder, tid), json.dumps(players, indent=2))
+        teams[tid] = {"sha256": _digest(players), "count": len(players)}
+    return teams
+
+
+def _folder_lock(output_folder: str) -> threading.Lock:
+    with _lock:
+        return _folder_locks.setdefault(os.path.abspath(output_folder), threading.Lock())
+
+
+def _ensure_manifest(output_folder: str) -> dict:
+    manifest_path = os.path.join(output_folder, MANIFEST)
+    manifest = (_read_json(manifest_path) or {}).get("teams")
+    if not isinstance(manifest, dict):
+        manifest = _bootstrap_manifest(output_folder)
+        _atomic_write_text(manifest_path, json.dumps({"teams": manifest}, indent=2))
+    return manifest
+
+
+def merge_roster_export(output_folder: str, players: list[dict]) -> dict:
+    """
+    Fold one export's players into the shards and rewrite parsed_rosters.json.
+    Returns {"players", "teams", "changed": [teamId, ...], "team_counts": Counter}.
+
+    The merge itself (plan_roster_merge) runs in the parse pool when it is
+    enabled; this process only writes what it hands back, manifest last.
+    Callers hold the league lock (services.league_locks) for other workers;
+    within this process only merges into the same folder wait on each other.
+    """
+    with _folder_lock(output_folder):
+        os.makedirs(os.path.join(output_folder, SHARDS_DIR), exist_ok=True)
+        _ensure_manifest(output_folder)
+        plan = run_in_pool(plan_roster_merge, output_folder, players)
+        write_artifacts(plan["files"])
+        return plan["result"]
+
+
+def plan_roster_merge(output_folder: str, players: list[dict]) -> dict:
+    """
+    Pure half of merge_roster_export: works out the shard rewrites and the
+    aggregate for one export without writing anything.
+    Returns {"files": {path: text | None (remove)}, "result": {...}}; the
+    manifest is the last file. The fragment cache lives in whichever process runs this.
+    """
+    manifest = dict((_read_json(os.path.join(output_folder, MANIFEST)) or {}).get("teams") or {})
+
+    cache = _cache.setdefault(output_folder, {})
+    for tid in list(cache):
+        if tid not in manifest or cache[tid]["sha256"] != manifest[tid]["sha256"]:
+            del cache[tid]   # another worker (or pool process) rewrote that shard
+
+    def cached(tid: str) -> dict:
+        ent = cache.get(tid)
+        if ent is None:
+            shard = _load_shard(output_folder, tid)
+            ent = cache[tid] = _entry(tid, shard, manifest[tid]["sha256"])
+        return ent
+
+    # ---- which shards this export touches
+    incoming = {}
+    for p in players or []:
+        incoming.setdefault(team_of(p), {})[player_key(p)] = p   # last one wins, like the accumulator
+    incoming_keys = {k for by_key in incoming.values() for k in by_key}
+
+    touched = set(incoming)
+    for tid in manifest:
+        if tid not in touched and not cached(tid)["keys"].isdisjoint(incoming_keys):
+            touched.add(tid)   # a player left this team for one in the export
+
+    # ---- rebuild touched shards; rewrite only the ones whose hash changed
+    files = {}
+    changed = []
+    for tid in sorted(touched):
+        by_key = incoming.get(tid, {})
+        kept = [p for p in (_load_shard(output_folder, tid) if tid in manifest else [])
+                if player_key(p) not in incoming_keys]
+        shard = list(by_key.values()) + kept
+        digest = _digest(shard)
+        if tid in manifest and manifest[tid]["sha256"] == digest:
+            continue
+        if shard:
+            files[_shard_path(output_folder, tid)] = json.dumps(shard, indent=2)
+            manifest[tid] = {"sha256": digest, "count": len(shard)}
+            cache[tid] = _entry(tid, shard, digest)
+        else:
+            files[_shard_path(output_folder, tid)] = None
+            manifest.pop(tid, None)
+            cache.pop(tid, None)
+        changed.append(tid)
+
+    # ---- one aggregate, spliced from cached fragments
+    entries = []
+    team_counts = Counter()
+    for tid in manifest:
+        ent = cached(tid)
+        entries.extend(ent["entries"])
+        team_counts[tid] = len(ent["entries"])
+    entries.sort(key=lambda e: e[0])
+
+    meta = {
+        "count": len(entries),
+        "teams": len([t for t in team_counts if t and t != "None"]),
+    }
+    meta_text = json.dumps({"meta": meta}, indent=2)[2:-2]   # '  "meta": {...}'
+    if entries:
+        body = '{\n  "players": [\n' + ",\n".join(e[1] for e in entries) + "\n  ],\n" + meta_text + "\n}"
+    else:
+        body = '{\n  "players": [],\n' + meta_text + "\n}"
+    files[os.path.join(output_folder, AGGREGATE)] = body
+    files[os.path.join(output_folder, MANIFEST)] = json.dumps({"teams": manifest}, indent=2)
+
+    return {
+        "files": files,
+        "result": {
+            "players": meta["count"],
+            "teams": meta["teams"],
+            "changed": changed,
+            "team_counts": team_counts,
+        },
+    }
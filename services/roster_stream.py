@@ -0,0 +1,109 @@
+# roster_stream.py
+"""
+Incremental reader for large roster bodies ({"success": ..., "rosterInfoList": [...]}).
+
+    with open(spool_path, "rb") as f:
+        f.seek(body_offset)
+        rs = RosterStream(f)
+        for player in rs:          # one dict at a time
+            ...
+        rs.meta                    # the other top-level fields ({"success": True, ...})
+
+The body is read in ROSTER_STREAM_CHUNK pieces and each player object is
+decoded on its own (json's C raw_decode on a small sliding window), so memory
+stays at one chunk plus the player being handed out - the whole document is
+never held as bytes, str and dicts at once. Bodies that don't have the
+expected shape fall back to a plain json.load of the rest of the file.
+"""
+import os
+import re
+import json
+import codecs
+
+ROSTER_STREAM_CHUNK = int(os.getenv("ROSTER_STREAM_CHUNK", str(64 * 1024)))
+
+_LIST_KEY = re.compile(r'"rosterInfoList"\s*:\s*\[')
+_WS = " \t\r\n"
+
+
+class RosterStream:
+    def __init__(self, f, chunk_size: int = ROSTER_STREAM_CHUNK):
+        self._f = f
+        self._chunk = chunk_size
+        self._dec = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._json = json.JSONDecoder()
+        self._eof = False
+        self.meta = {}
+        self.count = 0
+
+    def _read(self) -> str:
+        if self._eof:
+            return ""
+        b = self._f.read(self._chunk)
+        if not b:
+            self._eof = True
+            return self._dec.decode(b"", final=True)
+        return self._dec.decode(b)
+
+    def _fallback(self, head: str):
+        doc = json.loads(head + "".join(iter(self._read, "")))
+        players = []
+        if isinstance(doc, dict):
+            players = doc.pop("rosterInfoList", None) or doc.pop("players", None) or []
+            self.meta = doc
+        elif isinstance(doc, list):
+            players = doc
+        for p in players:
+            self.count += 1
+            yield p
+
+    def __iter__(self):
+        # ---- find the list; the text before it is the start of the top-level object
+        buf, start = "", 0
+        while True:
+            m = _LIST_KEY.search(buf, start)
+            if m or self._eof:
+                break
+            start = max(0, len(buf) - 64)   # the key may straddle two chunks
+            buf += self._read()
+        if not m:
+            yield from self._fallback(buf)
+            return
+        prefix = buf[:m.start()]
+        buf, pos = buf[m.end():], 0
+
+        # ---- one player object at a time
+        while True:
+            while True:
+                while pos < len(buf) and (buf[pos] in _WS or buf[pos] == ","):
+                    pos += 1
+                if pos < len(buf) or self._eof:
+                    break
+                buf, pos = self._read(), 0
+            if pos >= len(buf):
+                raise ValueError("rosterInfoList not terminated")
+            if buf[pos] == "]":
+                pos += 1
+                break
+            try:
+                obj, end = self._json.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+                buf, pos = buf[pos:] + self._read(), 0   # object straddles the chunk boundary
+                continue
+            pos = end
+            self.count += 1
+            yield obj
+            if pos > self._chunk:
+                buf, pos = buf[pos:], 0
+
+        # ---- the rest of the top-level object (small: success / message / ids)
+        tail = buf[pos:] + "".join(iter(self._read, ""))
+        try:
+            meta = json.loads(prefix + '"rosterInfoList": []' + tail)
+        except json.JSONDecodeError:
+            meta = {}
+        if isinstance(meta, dict):
+            meta.pop("rosterInfoList", None)
+            self.meta = meta
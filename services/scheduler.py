@@ -0,0 +1,157 @@
+# scheduler.py
+"""
+One scheduler thread for every debounce in the process.
+
+    schedule("roster_flush:3264906", 10.0, _flush_roster_if_due, args=(...))
+
+A key has at most one pending job: scheduling it again moves the deadline and
+replaces the callable/args (per-key coalescing), cancel() drops it. Deadlines
+sit in a heap; stale heap entries (rescheduled/cancelled keys) are skipped
+when they surface. Jobs run one at a time on the scheduler thread, so a slow
+job delays the others rather than piling up threads.
+
+At interpreter exit (gunicorn worker restart, Ctrl-C) pending jobs are run
+right away instead of being lost: on_shutdown=True runs the job itself, a
+callable runs that instead (e.g. "flush now" for a job that would otherwise
+re-arm), False drops it. A forked child (gunicorn preload) drops the jobs it
+inherited; they stay with the parent.
+"""
+import os
+import heapq
+import atexit
+import itertools
+import threading
+from time import time
+
+_cond = threading.Condition()
+_heap = []          # [(due, seq, key)]
+_jobs = {}          # {key: {"due", "seq", "fn", "args", "on_shutdown"}}
+_seq = itertools.count(1)
+_thread = None      # (pid, Thread)
+_closing = False
+
+_stats = {"scheduled": 0, "coalesced": 0, "ran": 0, "failed": 0, "flushed_on_shutdown": 0}
+
+
+def _ensure_thread():
+    global _thread
+    pid = os.getpid()
+    if _thread and _thread[0] == pid and _thread[1].is_alive():
+        return
+    t = threading.Thread(target=_loop, name="debounce-scheduler", daemon=True)
+    t.start()
+    _thread = (pid, t)
+
+
+def schedule(key: str, delay: float, fn, args: tuple = (), on_shutdown=True):
+    """(Re)arm `key` to run fn(*args) in `delay` seconds; replaces any pending job for that key."""
+    with _cond:
+        if _closing:
+            return
+        _ensure_thread()
+        seq = next(_seq)
+        due = time() + max(0.0, delay)
+        if key in _jobs:
+            _stats["coalesced"] += 1
+        _jobs[key] = {"due": due, "seq": seq, "fn": fn, "args": tuple(args), "on_shutdown": on_shutdown}
+        heapq.heappush(_heap, (due, seq, key))
+        _stats["scheduled"] += 1
+        _cond.notify()
+
+
+def cancel(key: str) -> bool:
+    with _cond:
+        return _jobs.pop(key, None) is not None
+
+
+def pending(key: str) -> float | None:
+    """Seconds until key runs, None if nothing is scheduled."""
+    with _cond:
+        job = _jobs.get(key)
+        return max(0.0, job["due"] - time()) if job else None
+
+
+def _run(key: str, fn, args: tuple):
+    try:
+        fn(*args)
+        _stats["ran"] += 1
+    except Exception as e:
+        _stats["failed"] += 1
+        print(f"⚠️ Scheduled job {key} failed: {e}")
+
+
+def _loop():
+    while True:
+        with _cond:
+            while True:
+                if _closing:
+                    return
+                # drop heap entries whose key was rescheduled or cancelled
+                while _heap:
+                    due, seq, key = _heap[0]
+                    job = _jobs.get(key)
+                    if job is None or job["seq"] != seq:
+                        heapq.heappop(_heap)
+                        continue
+                    break
+                if not _heap:
+                    _cond.wait()
+                    continue
+                wait = _heap[0][0] - time()
+                if wait > 0:
+                    _cond.wait(wait)
+                    continue
+                _, _, key = heapq.heappop(_heap)
+                job = _jobs.pop(key)
+                break
+        _run(key, job["fn"], job["args"])
+
+
+def scheduler_status() -> dict:
+    now = time()
+    with _cond:
+        jobs = sorted((round(j["due"] - now, 3), k) for k, j in _jobs.items())
+        alive = bool(_thread and _thread[0] == os.getpid() and _thread[1].is_alive())
+    return {
+        "pid": os.getpid(),
+        "thread_alive": alive,
+        "pending": [{"key": k, "due_in_sec": max(0.0, d)} for d, k in jobs],
+        **_stats,
+    }
+
+
+def _shutdown():
+    """Run what is still pending now (this process only)."""
+    global _closing
+    with _cond:
+        if _closing:
+            return
+        _closing = True
+        jobs = sorted(_jobs.items(), key=lambda kv: kv[1]["due"])
+        _jobs.clear()
+        _heap.clear()
+        _cond.notify_all()
+        mine = bool(_thread and _thread[0] == os.getpid())
+    if not mine:
+        return   # inherited from the parent across a fork; the parent flushes its own
+    for key, job in jobs:
+        hook = job["on_shutdown"]
+        if hook is False or hook is None:
+            continue
+        fn = job["fn"] if hook is True else hook
+        print(f"⏏️ Flushing pending {key} on shutdown")
+        _stats["flushed_on_shutdown"] += 1
+        _run(key, fn, job["args"])
+
+
+def _after_fork_in_child():
+    """A forked worker starts empty: the parent's pending jobs are the parent's to run."""
+    global _cond
+    _cond = threading.Condition()   # the parent's scheduler thread may have held it at fork time
+    _jobs.clear()
+    _heap.clear()
+
+
+atexit.register(_shutdown)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
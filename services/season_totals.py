@@ -0,0 +1,302 @@
+# season_totals.py
+"""
+Season-to-date player totals, maintained incrementally at ingest.
+
+Every parsed stat week records its own contribution next to the week's files
+(<period>/_totals_contrib.json). When a week is re-sent, its previous
+contribution is subtracted before the new one is added, so totals never
+double count. Leaderboards then read one file per season:
+
+    uploads/<league>/<season>/season_totals.json
+    {"season": {category: {player_key: row}}, "preseason": {...}}
+
+"season" covers week_* (regular season + playoffs); "preseason" covers the
+real preseason games pre_1..pre_3 (pre_4 is cut week, same as /rookies).
+"""
+import os
+import json
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from services.stats_store import period_from_folder
+
+TOTALS_FILENAME = "season_totals.json"
+CONTRIB_FILENAME = "_totals_contrib.json"
+
+PRESEASON_TOTAL_WEEKS = {"pre_1", "pre_2", "pre_3"}
+
+# Summed fields per category (keys as they appear in the rows the routes read)
+SUM_FIELDS = {
+    "passing": ["passYds", "passComp", "passAtt", "passTDs", "passINTs", "passSacked"],
+    "rushing": ["rushAtt", "rushYds", "rushTDs", "rushFum", "rushBrokenTackles",
+                "rushYdsAfterContact", "rush20PlusYds"],
+    "receiving": ["recCatches", "recYds", "recTDs", "recDrops", "recYdsAfterCatch"],
+    "defense": ["tackles", "solo", "assisted", "tfl", "sacks", "ints", "intYds", "intTd",
+                "pd", "ff", "fr", "defTds", "safeties", "catchAllowed", "points"],
+}
+
+# Longest-play fields can't be subtracted, so keep them per period and take the max
+LONG_FIELDS = {
+    "passing": "passLng",
+    "rushing": "rushLongest",
+    "receiving": "recLongest",
+}
+
+# Numeric fields _derive() fills in (plus "games"); with SUM_FIELDS, what a leaderboard can sort by
+DERIVED_FIELDS = {
+    "passing": ["passCompPct", "passYdsPerAtt", "passYdsPerGame", "passRating", "passLng"],
+    "rushing": ["rushYdsPerAtt", "rushYdsPerGame", "rushLongest"],
+    "receiving": ["recYdsPerCatch", "recYdsPerGame", "recLongest"],
+    "defense": [],
+}
+
+_lock = threading.Lock()
+
+
+def _num(v):
+    try:
+        f = float(v)
+    except Exception:
+        return 0
+    return int(f) if f.is_integer() else f
+
+
+def stat_player_key(row: dict) -> str:
+    return str(
+        row.get("rosterId")
+        or row.get("playerId")
+        or row.get("id")
+        or f"{row.get('playerName') or row.get('name') or row.get('fullName')}_{row.get('teamId')}"
+    )
+
+
+def scope_for_period(period: str):
+    if str(period).startswith("week_"):
+        return "season"
+    if period in PRESEASON_TOTAL_WEEKS:
+        return "preseason"
+    return None
+
+
+def _contribution(category: str, rows: list[dict]) -> dict:
+    out = {}
+    fields = SUM_FIELDS[category]
+    long_field = LONG_FIELDS.get(category)
+    for r in rows or []:
+        key = stat_player_key(r)
+        c = out.get(key)
+        if c is None:
+            c = out[key] = {
+                "name": r.get("name") or r.get("playerName") or r.get("fullName"),
+                "teamId": str(r.get("teamId") or ""),
+                "rosterId": r.get("rosterId") or r.get("playerId"),
+                "stats": {f: 0 for f in fields},
+            }
+            if long_field:
+                c["long"] = 0
+        for f in fields:
+            c["stats"][f] += _num(r.get(f))
+        if long_field:
+            c["long"] = max(c["long"], _num(r.get(long_field)))
+    return out
+
+
+def _derive(category: str, row: dict):
+    """Recompute rate fields from the summed counts."""
+    games = row.get("games") or 0
+    if category == "passing":
+        att, comp = row["passAtt"], row["passComp"]
+        yds, tds, ints = row["passYds"], row["passTDs"], row["passINTs"]
+        row["passCompPct"] = round(comp * 100.0 / att, 1) if att else 0.0
+        row["passYdsPerAtt"] = round(yds / att, 1) if att else 0.0
+        row["passYdsPerGame"] = round(yds / games, 1) if games else 0.0
+        row["passRating"] = _passer_rating(comp, att, yds, tds, ints)
+    elif category == "rushing":
+        att = row["rushAtt"]
+        row["rushYdsPerAtt"] = round(row["rushYds"] / att, 1) if att else 0.0
+        row["rushYdsPerGame"] = round(row["rushYds"] / games, 1) if games else 0.0
+    elif category == "receiving":
+        rec = row["recCatches"]
+        row["recYdsPerCatch"] = round(row["recYds"] / rec, 1) if rec else 0.0
+        row["recYdsPerGame"] = round(row["recYds"] / games, 1) if games else 0.0
+    long_field = LONG_FIELDS.get(category)
+    if long_field:
+        row[long_field] = max((row.get("_longs") or {}).values(), default=0)
+
+
+def _passer_rating(comp, att, yds, tds, ints):
+    if not att:
+        return 0.0
+    clamp = lambda x: max(0.0, min(2.375, x))
+    a = clamp((comp / att - 0.3) * 5)
+    b = clamp((yds / att - 3) * 0.25)
+    c = clamp((tds / att) * 20)
+    d = clamp(2.375 - (ints / att) * 25)
+    return round((a + b + c + d) / 6 * 100, 1)
+
+
+def _apply(category: str, totals: dict, contrib: dict, period: str, sign: int):
+    fields = SUM_FIELDS[category]
+    for key, c in contrib.items():
+        row = totals.get(key)
+        if row is None:
+            if sign < 0:
+                continue
+            row = totals[key] = {"name": c["name"], "teamId": c["teamId"], "rosterId": c["rosterId"],
+                                 "games": 0, "_longs": {}, **{f: 0 for f in fields}}
+        for f in fields:
+            row[f] = _num(row.get(f, 0) + sign * c["stats"][f])
+        row["games"] = row.get("games", 0) + sign
+        longs = row.setdefault("_longs", {})
+        if sign > 0:
+            row["name"] = c["name"] or row.get("name")
+            row["teamId"] = c["teamId"] or row.get("teamId")
+            if "long" in c:
+                longs[period] = c["long"]
+        else:
+            longs.pop(period, None)
+        if row["games"] <= 0:
+            del totals[key]
+            continue
+        _derive(category, row)
+
+
+def _load(path, default):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return default
+
+
+def _write(path, obj):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f)
+    os.replace(tmp, path)
+
+
+def _locked(season_folder, fn):
+    with _lock:
+        if fcntl is None:
+            return fn()
+        os.makedirs(season_folder, exist_ok=True)
+        with open(os.path.join(season_folder, ".season_totals.lock"), "w") as lockf:
+            fcntl.flock(lockf, fcntl.LOCK_EX)
+            try:
+                return fn()
+            finally:
+                fcntl.flock(lockf, fcntl.LOCK_UN)
+
+
+def update_season_totals(category: str, week_folder: str, rows: list[dict]):
+    """
+    Replace one week's contribution for `category` with `rows`.
+    Called by the parsers right after they write the week's parsed file.
+    """
+    if category not in SUM_FIELDS:
+        raise ValueError(f"Unknown stats category: {category}")
+
+    _, season, period = period_from_folder(week_folder)
+    scope = scope_for_period(period)
+    if scope is None or not str(season).startswith("season_"):
+        return
+
+    season_folder = os.path.dirname(os.path.normpath(week_folder))
+    totals_path = os.path.join(season_folder, TOTALS_FILENAME)
+    contrib_path = os.path.join(week_folder, CONTRIB_FILENAME)
+
+    def _inner():
+        all_totals = _load(totals_path, {})
+        cat_totals = all_totals.setdefault(scope, {}).setdefault(category, {})
+        contribs = _load(contrib_path, {})
+
+        old = contribs.get(category)
+        if old:
+            _apply(category, cat_totals, old, period, -1)
+
+        new = _contribution(category, rows)
+        _apply(category, cat_totals, new, period, +1)
+        contribs[category] = new
+
+        _write(contrib_path, contribs)
+        _write(totals_path, all_totals)
+        return len(cat_totals)
+
+    n = _locked(season_folder, _inner)
+    print(f"📈 Season totals updated: {category} {season}/{period} ({scope}, players={n})")
+
+
+# ---------------------------------------------------------------------------
+# reads
+# ---------------------------------------------------------------------------
+
+_WEEK_FILES = {
+    "passing": ("passing.json", "playerPassingStatInfoList"),
+    "rushing": ("parsed_rushing.json", "playerRushingStatInfoList"),
+    "receiving": ("receiving.json", "playerReceivingStatInfoList"),
+    "defense": ("parsed_defense.json", "playerDefensiveStatInfoList"),
+}
+
+
+def rebuild_season_totals(season_folder: str):
+    """One-off backfill for seasons ingested before totals were maintained."""
+    def _inner():
+        all_totals = {}
+        for period in sorted(os.listdir(season_folder)):
+            week_folder = os.path.join(season_folder, period)
+            scope = scope_for_period(period)
+            if scope is None or not os.path.isdir(week_folder):
+                continue
+            contribs = {}
+            for category, (fn, list_key) in _WEEK_FILES.items():
+                data = _load(os.path.join(week_folder, fn), None)
+                if data is None:
+                    continue
+                rows = data if isinstance(data, list) else (data.get(list_key) or [])
+                contribs[category] = _contribution(category, rows)
+                cat_totals = all_totals.setdefault(scope, {}).setdefault(category, {})
+                _apply(category, cat_totals, contribs[category], period, +1)
+            if contribs:
+                _write(os.path.join(week_folder, CONTRIB_FILENAME), contribs)
+        _write(os.path.join(season_folder, TOTALS_FILENAME), all_totals)
+        return all_totals
+
+    print(f"📈 Rebuilding season totals from week files: {season_folder}")
+    return _locked(season_folder, _inner)
+
+
+def load_season_totals(season_folder: str, scope: str = "season") -> dict:
+    """{category: {player_key: row}} for one scope; backfills once if missing."""
+    path = os.path.join(season_folder, TOTALS_FILENAME)
+    if os.path.exists(path):
+        data = _load(path, {})
+    elif os.path.isdir(season_folder):
+        data = rebuild_season_totals(season_folder)
+    else:
+        data = {}
+    return data.get(scope) or {}
+
+
+def sort_fields(category: str) -> list[str]:
+    return ["games", *SUM_FIELDS[category], *DERIVED_FIELDS[category]]
+
+
+def season_leaderboard(season_folder: str, category: str, scope: str = "season",
+                       sort_by: str | None = None, limit: int | None = None) -> list[dict]:
+    rows = list((load_season_totals(season_folder, scope).get(category) or {}).values())
+    sort_by = sort_by or {
+        "passing": "passYds", "rushing": "rushYds", "receiving": "recYds", "defense": "tackles"
+    }[category]
+    if sort_by not in sort_fields(category):
+        raise ValueError(f"sort must be one of {sort_fields(category)}")
+    rows.sort(key=lambda r: r.get(sort_by) or 0, reverse=True)
+    out = []
+    for r in rows[:max(1, limit)] if limit is not None else rows:
+        r = {k: v for k, v in r.items() if k != "_longs"}
+        out.append(r)
+    return out
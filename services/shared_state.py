@@ -0,0 +1,299 @@
+# shared_state.py
+"""
+State that must be shared by every gunicorn worker:
+  - roster chunk accumulation (32 team posts can land in different processes)
+    and which teams of the current export have arrived
+  - debounce deadlines (whoever holds the latest deadline flushes)
+  - the latest league/season/week pointer
+  - data generation counters (see services/generation.py)
+
+Backends:
+  SHARED_STATE_BACKEND=sqlite  (default) SQLite in WAL mode, safe across processes
+  SHARED_STATE_BACKEND=memory  plain dicts, single-process only (dev / scripts)
+"""
+import os
+import json
+import sqlite3
+import threading
+
+from config import UPLOAD_FOLDER
+
+SHARED_STATE_BACKEND = os.getenv("SHARED_STATE_BACKEND", "sqlite").lower()
+SHARED_STATE_PATH = os.getenv("SHARED_STATE_PATH") or os.path.join(UPLOAD_FOLDER, "_shared_state.sqlite3")
+
+# timers can wake a hair early relative to the wall clock
+DEADLINE_SLACK_SEC = 0.05
+
+POINTER_KEYS = ("latest_league", "latest_season", "latest_week")
+
+
+class MemoryState:
+    """Single-process backend; same semantics as SqliteState."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._maps = {}
+        self._deadlines = {}
+        self._kv = {}
+
+    # --- keyed maps (roster chunks, pending buffers)
+    def map_put(self, ns: str, items: dict) -> int:
+        with self._lock:
+            m = self._maps.setdefault(ns, {})
+            m.update(items)
+            return len(m)
+
+    def map_len(self, ns: str) -> int:
+        with self._lock:
+            return len(self._maps.get(ns) or {})
+
+    def map_get(self, ns: str) -> dict:
+        with self._lock:
+            return dict(self._maps.get(ns) or {})
+
+    def map_take(self, ns: str) -> dict:
+        with self._lock:
+            return self._maps.pop(ns, None) or {}
+
+    # --- debounce deadlines
+    def deadline_set(self, name: str, due: float):
+        with self._lock:
+            self._deadlines[name] = due
+
+    def deadline_get(self, name: str):
+        with self._lock:
+            return self._deadlines.get(name)
+
+    def deadline_claim(self, name: str, now: float) -> bool:
+        with self._lock:
+            due = self._deadlines.get(name)
+            if due is None or due > now + DEADLINE_SLACK_SEC:
+                return False
+            del self._deadlines[name]
+            return True
+
+    # --- small values (latest pointer, hashes)
+    def kv_get(self, key: str, default=None):
+        with self._lock:
+            return self._kv.get(key, default)
+
+    def kv_set(self, key: str, value):
+        with self._lock:
+            self._kv[key] = value
+
+    def kv_get_many(self, keys) -> dict:
+        with self._lock:
+            return {k: self._kv[k] for k in keys if k in self._kv}
+
+    def kv_bump(self, key: str, now: float) -> int:
+        """Increment a [count, last_bumped_at] counter; returns the new count."""
+        with self._lock:
+            n = (self._kv.get(key) or [0])[0] + 1
+            self._kv[key] = [n, now]
+            return n
+
+
+class SqliteState:
+    """Multi-process backend: one SQLite file in WAL mode, one connection per thread."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._conn() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS maps (
+                    ns TEXT NOT NULL,
+                    k TEXT NOT NULL,
+                    v TEXT NOT NULL,
+                    PRIMARY KEY (ns, k)
+                );
+                CREATE TABLE IF NOT EXISTS deadlines (
+                    name TEXT PRIMARY KEY,
+                    due REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS kv (
+                    k TEXT PRIMARY KEY,
+                    v TEXT
+                );
+            """)
+
+    def _conn(self) -> sqlite3.Connection:
+        # connections must not cross threads or forked processes
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def map_put(self, ns: str, items: dict) -> int:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO maps (ns, k, v) VALUES (?, ?, ?)",
+                [(ns, str(k), json.dumps(v)) for k, v in items.items()],
+            )
+            (n,) = conn.execute("SELECT COUNT(*) FROM maps WHERE ns = ?", (ns,)).fetchone()
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return n
+
+    def map_len(self, ns: str) -> int:
+        (n,) = self._conn().execute("SELECT COUNT(*) FROM maps WHERE ns = ?", (ns,)).fetchone()
+        return n
+
+    def map_get(self, ns: str) -> dict:
+        rows = self._conn().execute("SELECT k, v FROM maps WHERE ns = ? ORDER BY rowid", (ns,)).fetchall()
+        return {k: json.loads(v) for k, v in rows}
+
+    def map_take(self, ns: str) -> dict:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute("SELECT k, v FROM maps WHERE ns = ? ORDER BY rowid", (ns,)).fetchall()
+            conn.execute("DELETE FROM maps WHERE ns = ?", (ns,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return {k: json.loads(v) for k, v in rows}
+
+    def deadline_set(self, name: str, due: float):
+        self._conn().execute(
+            "INSERT OR REPLACE INTO deadlines (name, due) VALUES (?, ?)", (name, due)
+        )
+
+    def deadline_get(self, name: str):
+        row = self._conn().execute("SELECT due FROM deadlines WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def deadline_claim(self, name: str, now: float) -> bool:
+        cur = self._conn().execute(
+            "DELETE FROM deadlines WHERE name = ? AND due <= ?",
+            (name, now + DEADLINE_SLACK_SEC),
+        )
+        return cur.rowcount == 1
+
+    def kv_get(self, key: str, default=None):
+        row = self._conn().execute("SELECT v FROM kv WHERE k = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def kv_set(self, key: str, value):
+        self._conn().execute(
+            "INSERT OR REPLACE INTO kv (k, v) VALUES (?, ?)", (key, json.dumps(value))
+        )
+
+    def kv_get_many(self, keys) -> dict:
+        keys = list(keys)
+        if not keys:
+            return {}
+        rows = self._conn().execute(
+            f"SELECT k, v FROM kv WHERE k IN ({','.join('?' * len(keys))})", keys
+        ).fetchall()
+        return {k: json.loads(v) for k, v in rows}
+
+    def kv_bump(self, key: str, now: float) -> int:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT v FROM kv WHERE k = ?", (key,)).fetchone()
+            n = (json.loads(row[0])[0] if row else 0) + 1
+            conn.execute(
+                "INSERT OR REPLACE INTO kv (k, v) VALUES (?, ?)", (key, json.dumps([n, now]))
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return n
+
+
+_state = None
+_state_lock = threading.Lock()
+
+
+def get_shared_state():
+    global _state
+    if _state is None:
+        with _state_lock:
+            if _state is None:
+                if SHARED_STATE_BACKEND == "memory":
+                    _state = MemoryState()
+                else:
+                    _state = SqliteState(SHARED_STATE_PATH)
+                print(f"🗄️ Shared state backend: {type(_state).__name__}")
+    return _state
+
+
+class SharedLeagueData(dict):
+    """
+    Drop-in for the old league_data dict: the latest_* pointer lives in the
+    shared store so every worker agrees on the current league/season/week.
+    Everything else (teams, cached payloads) stays per-process.
+    """
+
+    def __getitem__(self, key):
+        if key in POINTER_KEYS:
+            value = get_shared_state().kv_get(key)
+            if value is None:
+                raise KeyError(key)
+            return value
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        if key in POINTER_KEYS:
+            value = get_shared_state().kv_get(key)
+            return default if value is None else value
+        return super().get(key, default)
+
+    def __setitem__(self, key, value):
+        if key in POINTER_KEYS:
+            get_shared_state().kv_set(key, value)
+            return
+        super().__setitem__(key, value)
+
+    def __contains__(self, key):
+        if key in POINTER_KEYS:
+            return get_shared_state().kv_get(key) is not None
+        return super().__contains__(key)
+
+    def __delitem__(self, key):
+        if key in POINTER_KEYS:
+            if get_shared_state().kv_get(key) is None:
+                raise KeyError(key)
+            get_shared_state().kv_set(key, None)   # None reads as unset
+            return
+        super().__delitem__(key)
+
+    # dict's own update/clear/setdefault/pop bypass the methods above
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def setdefault(self, key, default=None):
+        if key in self:
+            return self[key]
+        self[key] = default
+        return default
+
+    def pop(self, key, *default):
+        if key in POINTER_KEYS:
+            value = get_shared_state().kv_get(key)
+            if value is None:
+                if default:
+                    return default[0]
+                raise KeyError(key)
+            get_shared_state().kv_set(key, None)
+            return value
+        return super().pop(key, *default)
+
+    def clear(self):
+        super().clear()
+        for key in POINTER_KEYS:
+            get_shared_state().kv_set(key, None)
@@ -0,0 +1,262 @@
+# stats_store.py
+"""
+Optional SQLite store for per-week stats, standings and league teams.
+
+Enable with STATS_STORE=sqlite. Parsers write into it at ingest time (the JSON
+files under uploads/ are still written and remain the export format); read
+routes and build_power_rankings query it and fall back to the JSON files for
+periods that were never ingested into the store.
+
+Each stat category has its own table keyed/indexed by
+(league, season, period, teamId, rosterId); `row` holds the exact dict the
+matching JSON file would have contained.
+"""
+import os
+import json
+import sqlite3
+import threading
+from time import time
+
+from config import UPLOAD_FOLDER
+
+STATS_STORE = os.getenv("STATS_STORE", "").lower()
+STATS_DB_PATH = os.getenv("STATS_DB_PATH") or os.path.join(UPLOAD_FOLDER, "_stats.sqlite3")
+
+STAT_CATEGORIES = ("passing", "rushing", "receiving", "defense")
+
+_local = threading.local()
+_schema_ready = set()
+_schema_lock = threading.Lock()
+
+
+def stats_store_enabled() -> bool:
+    return STATS_STORE == "sqlite"
+
+
+def _schema_sql() -> str:
+    parts = []
+    for cat in STAT_CATEGORIES:
+        parts.append(f"""
+            CREATE TABLE IF NOT EXISTS {cat} (
+                league TEXT NOT NULL,
+                season TEXT NOT NULL,
+                period TEXT NOT NULL,
+                teamId TEXT,
+                rosterId TEXT,
+                row TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_{cat}_key
+                ON {cat} (league, season, period, teamId, rosterId);
+            CREATE INDEX IF NOT EXISTS idx_{cat}_player
+                ON {cat} (league, season, rosterId);
+        """)
+    parts.append("""
+        CREATE TABLE IF NOT EXISTS ingested (
+            category TEXT NOT NULL,
+            league TEXT NOT NULL,
+            season TEXT NOT NULL,
+            period TEXT NOT NULL,
+            rows INTEGER NOT NULL,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (category, league, season, period)
+        );
+        CREATE TABLE IF NOT EXISTS standings (
+            league TEXT NOT NULL,
+            teamId TEXT NOT NULL,
+            raw TEXT,
+            parsed TEXT,
+            PRIMARY KEY (league, teamId)
+        );
+        CREATE TABLE IF NOT EXISTS league_teams (
+            league TEXT NOT NULL,
+            teamId TEXT NOT NULL,
+            row TEXT NOT NULL,
+            PRIMARY KEY (league, teamId)
+        );
+        CREATE TABLE IF NOT EXISTS league_meta (
+            league TEXT PRIMARY KEY,
+            info TEXT NOT NULL,
+            team_map TEXT
+        );
+    """)
+    return "\n".join(parts)
+
+
+def _conn() -> sqlite3.Connection:
+    conn = getattr(_local, "conn", None)
+    if conn is None or getattr(_local, "pid", None) != os.getpid():
+        os.makedirs(os.path.dirname(os.path.abspath(STATS_DB_PATH)), exist_ok=True)
+        conn = sqlite3.connect(STATS_DB_PATH, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with _schema_lock:
+            if STATS_DB_PATH not in _schema_ready:
+                conn.executescript(_schema_sql())
+                _schema_ready.add(STATS_DB_PATH)
+        _local.conn = conn
+        _local.pid = os.getpid()
+    return conn
+
+
+def period_from_folder(folder: str) -> tuple[str, str, str]:
+    """uploads/<league>/<season>/<period> → (league, season, period)."""
+    parts = os.path.normpath(folder).split(os.sep)
+    return parts[-3], parts[-2], parts[-1]
+
+
+def _row_ids(row: dict) -> tuple[str, str]:
+    tid = row.get("teamId") or row.get("teamID") or row.get("team") or ""
+    rid = row.get("rosterId") or row.get("playerId") or row.get("id") or ""
+    return str(tid), str(rid)
+
+
+# ---------------------------------------------------------------------------
+# writes (called from the parsers at ingest)
+# ---------------------------------------------------------------------------
+
+def store_week_rows(category: str, folder: str, rows: list[dict]):
+    """Replace all rows for one category/week. No-op unless STATS_STORE=sqlite."""
+    if not stats_store_enabled():
+        return
+    if category not in STAT_CATEGORIES:
+        raise ValueError(f"Unknown stats category: {category}")
+
+    league, season, period = period_from_folder(folder)
+    conn = _conn()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute(
+            f"DELETE FROM {category} WHERE league = ? AND season = ? AND period = ?",
+            (league, season, period),
+        )
+        conn.executemany(
+            f"INSERT INTO {category} (league, season, period, teamId, rosterId, row) "
+            f"VALUES (?, ?, ?, ?, ?, ?)",
+            [(league, season, period, *_row_ids(r), json.dumps(r)) for r in rows],
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO ingested (category, league, season, period, rows, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (category, league, season, period, len(rows), time()),
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    print(f"🗃️ Stats store: {category} {league}/{season}/{period} rows={len(rows)}")
+
+
+def store_standings(league_id: str, raw_rows: list[dict] | None = None, parsed_rows: list[dict] | None = None):
+    if not stats_store_enabled():
+        return
+    conn = _conn()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for col, rows in (("raw", raw_rows), ("parsed", parsed_rows)):
+            for r in rows or []:
+                tid = str(r.get("teamId") or r.get("teamID") or r.get("id") or "")
+                if not tid:
+                    continue
+                conn.execute(
+                    "INSERT INTO standings (league, teamId, " + col + ") VALUES (?, ?, ?) "
+                    "ON CONFLICT (league, teamId) DO UPDATE SET " + col + " = excluded." + col,
+                    (str(league_id), tid, json.dumps(r)),
+                )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def store_league_info(league_id: str, info: dict, team_map: dict):
+    if not stats_store_enabled():
+        return
+    teams = info.get("leagueTeamInfoList") or []
+    conn = _conn()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("DELETE FROM league_teams WHERE league = ?", (str(league_id),))
+        conn.executemany(
+            "INSERT INTO league_teams (league, teamId, row) VALUES (?, ?, ?)",
+            [(str(league_id), str(t.get("teamId")), json.dumps(t)) for t in teams],
+        )
+        meta = {k: v for k, v in info.items() if k != "leagueTeamInfoList"}
+        conn.execute(
+            "INSERT OR REPLACE INTO league_meta (league, info, team_map) VALUES (?, ?, ?)",
+            (str(league_id), json.dumps(meta), json.dumps(team_map)),
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+# ---------------------------------------------------------------------------
+# reads
+# ---------------------------------------------------------------------------
+
+def load_week_rows(category: str, league_id: str, season: str, period: str, team_id: str | None = None):
+    """
+    Rows for one category/week, or None when the store is off or the week was
+    never ingested into it (callers then fall back to the JSON files).
+    """
+    if not stats_store_enabled():
+        return None
+    conn = _conn()
+    seen = conn.execute(
+        "SELECT 1 FROM ingested WHERE category = ? AND league = ? AND season = ? AND period = ?",
+        (category, str(league_id), season, period),
+    ).fetchone()
+    if not seen:
+        return None
+
+    sql = f"SELECT row FROM {category} WHERE league = ? AND season = ? AND period = ?"
+    args = [str(league_id), season, period]
+    if team_id is not None:
+        sql += " AND teamId = ?"
+        args.append(str(team_id))
+    return [json.loads(r) for (r,) in conn.execute(sql + " ORDER BY rowid", args)]
+
+
+def load_season_rows(category: str, league_id: str, season: str, roster_id: str | None = None):
+    """All (period, row) pairs for a season, optionally for one player."""
+    if not stats_store_enabled():
+        return None
+    sql = f"SELECT period, row FROM {category} WHERE league = ? AND season = ?"
+    args = [str(league_id), season]
+    if roster_id is not None:
+        sql += " AND rosterId = ?"
+        args.append(str(roster_id))
+    return [(p, json.loads(r)) for p, r in _conn().execute(sql, args)]
+
+
+def load_standings_rows(league_id: str):
+    """{teamId: (raw_row, parsed_row)} or None when nothing is stored."""
+    if not stats_store_enabled():
+        return None
+    rows = _conn().execute(
+        "SELECT teamId, raw, parsed FROM standings WHERE league = ?", (str(league_id),)
+    ).fetchall()
+    if not rows:
+        return None
+    return {
+        tid: (json.loads(raw) if raw else None, json.loads(parsed) if parsed else None)
+        for tid, raw, parsed in rows
+    }
+
+
+def load_league_info(league_id: str):
+    """(info_dict_with_leagueTeamInfoList, team_map) or (None, None)."""
+    if not stats_store_enabled():
+        return None, None
+    conn = _conn()
+    meta = conn.execute(
+        "SELECT info, team_map FROM league_meta WHERE league = ?", (str(league_id),)
+    ).fetchone()
+    if not meta:
+        return None, None
+    teams = [json.loads(r) for (r,) in conn.execute(
+        "SELECT row FROM league_teams WHERE league = ? ORDER BY rowid", (str(league_id),)
+    )]
+    info = {**json.loads(meta[0]), "leagueTeamInfoList": teams}
+    return info, (json.loads(meta[1]) if meta[1] else {})
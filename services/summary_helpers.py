@@ -163,13 +163,10 @@ def post_summary_to_discord(summary, week_number, league_id, season_dir, week_di
         f"🌐 Read the full recap:\n{recap_url}"
     )
 
-    try:
-        response = requests.post(webhook_url, json={"content": message})
-        if response.status_code in (200, 204):
-            print("✅ Recap teaser posted to Discord")
-        else:
-            print(f"❌ Failed to post recap teaser: {response.status_code} {response.text}")
-    except Exception as e:
-        print(f"❌ Discord recap error: {e}")
+    # runs as the "discord_recap" job: raising gets it retried with backoff
+    response = requests.post(webhook_url, json={"content": message}, timeout=15)
+    if response.status_code not in (200, 204):
+        raise RuntimeError(f"recap teaser not posted: {response.status_code} {response.text[:200]}")
+    print("✅ Recap teaser posted to Discord")
 
 
@@ -11,13 +11,41 @@ from services.summary_helpers import (
     _tone_from_scores,
     _best_offense_player,
     _impact_defenders,
-    post_summary_to_discord,
 )
+from services.metrics import span
+from services.parse_pool import run_in_pool, write_artifacts
+from services.job_queue import emit
 
 def generate_week_summaries_if_ready(league_id, season_dir, week_dir, upload_folder):
     """
     Generates one summary per completed game.
-    Runs after defensive stats webhook (stats complete signal).
+    Built by the derived rebuild (services/build_graph.py, "game_summaries")
+    once the week's schedule and defensive stats (stats complete signal) are in.
+    The build runs in the parse pool; each new summary is written, then
+    emitted as "summary_written" for the Discord recap job.
+    """
+    with span("summary", "defense"):
+        built = run_in_pool(build_week_summaries, league_id, season_dir, week_dir, upload_folder)
+        if not built["new"]:
+            return
+        write_artifacts(built["files"])
+
+    for summary_obj in built["new"]:
+        emit(
+            "summary_written",
+            summary=summary_obj,
+            week_number=built["week_number"],
+            league_id=league_id,
+            season_dir=season_dir,
+            week_dir=week_dir,
+        )
+        print(f"📝 Generated summary for game {summary_obj['gameId']}")
+
+
+def build_week_summaries(league_id, season_dir, week_dir, upload_folder) -> dict:
+    """
+    Pure half of generate_week_summaries_if_ready: reads the week's files and
+    returns {"files": {game_summaries.json: text}, "new": [summary, ...], "week_number"}.
     """
 
     base_path = os.path.join(
@@ -48,7 +76,7 @@ def generate_week_summaries_if_ready(league_id, season_dir, week_dir, upload_fol
 
     if not os.path.exists(schedule_path):
         print("⚠️ No schedule found. Skipping summaries.")
-        return
+        return {"files": {}, "new": [], "week_number": week_number}
 
     # Load schedule
     with open(schedule_path, "r", encoding="utf-8") as f:
@@ -77,7 +105,7 @@ def generate_week_summaries_if_ready(league_id, season_dir, week_dir, upload_fol
         with open(team_map_path, "r", encoding="utf-8") as f:
             team_map = json.load(f)
 
-    new_games_added = False
+    new_games = []
 
     for game in schedule:
         game_id = str(game.get("scheduleId") or game.get("gameId"))
@@ -168,18 +196,8 @@ def generate_week_summaries_if_ready(league_id, season_dir, week_dir, upload_fol
         }
 
         summaries_data["games"].append(summary_obj)
-        post_summary_to_discord(
-            summary_obj,
-            week_number,
-            league_id,
-            season_dir,
-            week_dir
-        )
-        new_games_added = True
-
-        print(f"📝 Generated summary for game {game_id}")
+        new_games.append(summary_obj)
 
     # Write file only if new games added
-    if new_games_added:
-        with open(summaries_path, "w", encoding="utf-8") as f:
-            json.dump(summaries_data, f, indent=2)
+    files = {summaries_path: json.dumps(summaries_data, indent=2)} if new_games else {}
+    return {"files": files, "new": new_games, "week_number": week_number}
@@ -3,33 +3,38 @@
 
 
 import os
+import re
 import json
 import tempfile
-from collections import Counter
+from time import time
 
-from parsers.rosters_parser import (
-    parse_rosters_data,
-    rebuild_parsed_rosters,
-)
+from services.shared_state import get_shared_state
+from services.generation import bump_generation
+from services.metrics import span
+from services.scheduler import schedule
+from services.league_locks import league_lock, pointer_lock
+from services.roster_shards import merge_roster_export, player_key as _player_key
 
 current_stats_hash = None
 
-ROSTER_DEBOUNCE_SEC = 10.0   # try 8s; tweak to 10–12s if needed
+ROSTER_DEBOUNCE_SEC = float(os.getenv("ROSTER_DEBOUNCE_SEC", "10.0"))   # try 8s; tweak to 10–12s if needed
 
-batch_timers = {}
-_roster_acc = {}
+# Once team_map.json is known an export flushes as soon as every team (+ the
+# free agents) has arrived; the timeout only catches exports that never complete.
+ROSTER_FLUSH_ON_COMPLETE = os.getenv("ROSTER_FLUSH_ON_COMPLETE", "1") != "0"
+ROSTER_FLUSH_TIMEOUT_SEC = float(os.getenv("ROSTER_FLUSH_TIMEOUT_SEC", str(max(ROSTER_DEBOUNCE_SEC, 30.0))))
+ROSTER_EXPECT_FREE_AGENTS = os.getenv("ROSTER_EXPECT_FREE_AGENTS", "1") != "0"
+# arrivals older than this belong to an earlier, abandoned export
+ROSTER_EXPORT_WINDOW_SEC = float(os.getenv("ROSTER_EXPORT_WINDOW_SEC", "600"))
+# flush due while the league's write lock is held (ingest in progress): look again after this
+ROSTER_LOCK_RETRY_SEC = float(os.getenv("ROSTER_LOCK_RETRY_SEC", "0.25"))
 
-webhook_buffer = {
-    "league": [],
-    "stats": [],
-    "roster": []
-}
+FREE_AGENTS = "freeagents"
+NON_TEAM_IDS = {"0", "-1", "32", "1000"}
 
-last_webhook_time = {
-    "league": 0,
-    "stats": 0,
-    "roster": 0
-}
+# The chunks and deadlines live in the shared state store so any worker can
+# receive a chunk and any worker can flush; each worker only keeps a
+# "roster_flush:<league>" job on its scheduler (services/scheduler.py).
 
 POST_ROUND_TO_WEEK = {
     1: 19,
@@ -38,19 +43,6 @@ POST_ROUND_TO_WEEK = {
     4: 22,
 }
 
-def _player_key(p: dict) -> str:
-    """Stable key for merging players from many team payloads."""
-    for k in ("rosterId", "playerId", "id", "personaId", "uniqueId"):
-        v = p.get(k)
-        if v not in (None, "", 0):
-            return str(v)
-    # fallback if exporter doesn’t provide an id
-    first = p.get("firstName") or p.get("first_name") or ""
-    last  = p.get("lastName")  or p.get("last_name")  or ""
-    pos   = p.get("position")  or p.get("pos")        or ""
-    team  = p.get("teamId")    or p.get("teamID")     or p.get("team") or ""
-    return f"{first}.{last}.{pos}.{team}".lower()
-
 def _load_team_map(league_id, upload_folder="uploads"):
     p = os.path.join(upload_folder, str(league_id), "team_map.json")
     try:
@@ -70,24 +62,166 @@ def find_league_in_subpath(subpath):
     return None
 
 
+def _roster_ns(league_id: str) -> str:
+    return f"roster:{league_id}"
+
+
+def _coverage_ns(league_id: str) -> str:
+    return f"roster_cov:{league_id}"
+
+
+def expected_roster_teams(league_id: str, upload_folder: str = "uploads") -> set[str]:
+    return {
+        str(tid) for tid in _load_team_map(league_id, upload_folder).keys()
+        if str(tid) not in NON_TEAM_IDS
+    }
+
+
+def roster_chunk_teams(subpath: str | None, players: list[dict], team_id: str | None = None) -> set[str]:
+    """Export slots a roster payload fills: its team id, or "freeagents"."""
+    if team_id:
+        return {str(team_id)}
+    sp = (subpath or "").lower()
+    if FREE_AGENTS in sp:
+        return {FREE_AGENTS}
+    m = re.search(r"team/(\d+)", sp)
+    if m:
+        return {m.group(1)}
+    # league-wide payload: whatever teams its players belong to
+    teams = set()
+    for p in players or []:
+        tid = str(p.get("teamId") or 0)
+        teams.add(FREE_AGENTS if tid == "0" else tid)
+    return teams
+
+
+def roster_coverage(league_id: str, upload_folder: str = "uploads") -> dict:
+    """Which teams of the current roster export have arrived (admin progress view)."""
+    state = get_shared_state()
+    team_map = _load_team_map(league_id, upload_folder)
+    expected = {str(tid) for tid in team_map if str(tid) not in NON_TEAM_IDS}
+    cutoff = time() - ROSTER_EXPORT_WINDOW_SEC
+    arrived = {
+        k: v for k, v in state.map_get(_coverage_ns(league_id)).items()
+        if (v or {}).get("at", 0) >= cutoff
+    }
+    missing = sorted(expected - set(arrived))
+    free_agents = FREE_AGENTS in arrived
+    due = state.deadline_get(_roster_ns(league_id))
+    return {
+        "league": league_id,
+        "expected_teams": len(expected),
+        "arrived_teams": len(expected & set(arrived)),
+        "free_agents": free_agents,
+        "complete": bool(expected) and not missing and (free_agents or not ROSTER_EXPECT_FREE_AGENTS),
+        "missing": [
+            {"teamId": tid, "name": (team_map.get(tid) or {}).get("name") or (team_map.get(tid) or {}).get("abbr")}
+            for tid in missing
+        ],
+        "first_arrival": min((v.get("at") for v in arrived.values()), default=None),
+        "pending_players": state.map_len(_roster_ns(league_id)),
+        "flush_in_sec": round(max(0.0, due - time()), 2) if due is not None else None,
+        "last_flush": state.kv_get(f"roster_last_flush:{league_id}"),
+    }
+
+
+def note_roster_arrival(league_id: str, subpath: str | None, players: list[dict],
+                        upload_folder: str, team_id: str | None = None) -> bool:
+    """
+    Mark this payload's team(s) as arrived for the current export (duplicates
+    count too). Returns True when that completed the export; a pending flush
+    is then pulled forward to now.
+    """
+    teams = roster_chunk_teams(subpath, players, team_id)
+    if not teams:
+        return False
+    state = get_shared_state()
+    now = time()
+    state.map_put(_coverage_ns(league_id), {t: {"at": now} for t in teams})
+    if not ROSTER_FLUSH_ON_COMPLETE:
+        return False
+
+    cov = roster_coverage(league_id, upload_folder)
+    if not cov["complete"]:
+        return False
+
+    if state.deadline_get(_roster_ns(league_id)) is None:
+        # nothing pending: every chunk was a duplicate or already flushed
+        state.map_take(_coverage_ns(league_id))
+        print(f"🏁 Roster export complete for {league_id}; nothing new to flush.")
+        return True
+
+    print(f"🏁 Roster export complete ({cov['arrived_teams']} teams + FA); flushing now.")
+    dest_folder = os.path.join(upload_folder, league_id, "season_global", "week_global")
+    state.deadline_set(_roster_ns(league_id), now)
+    _arm_roster_timer(league_id, dest_folder, upload_folder, 0)
+    return True
+
+
 def _add_roster_chunk(league_id: str, players: list[dict]) -> tuple[int, int]:
-    acc = _get_roster_acc(league_id)
-    pbk = acc["players_by_key"]
-    added = 0
+    items = {}
     for p in players or []:
         k = _player_key(p)
         if not k:
             continue
-        pbk[k] = p
-        added += 1
-    return added, len(pbk)
+        items[k] = p
+    total = get_shared_state().map_put(_roster_ns(league_id), items) if items else \
+        get_shared_state().map_len(_roster_ns(league_id))
+    return len(items), total
 
-def _get_roster_acc(league_id: str) -> dict:
-    acc = _roster_acc.get(league_id)
-    if not acc:
-        acc = {"players_by_key": {}, "timer": None}
-        _roster_acc[league_id] = acc
-    return acc
+def _schedule_roster_flush(league_id: str, dest_folder: str, upload_folder: str):
+    """
+    (Re)arm the shared flush deadline; the last chunk from any worker wins.
+    With a known team list this is only the fallback (see note_roster_arrival).
+    """
+    if ROSTER_FLUSH_ON_COMPLETE and expected_roster_teams(league_id, upload_folder):
+        delay = ROSTER_FLUSH_TIMEOUT_SEC
+    else:
+        delay = ROSTER_DEBOUNCE_SEC
+    get_shared_state().deadline_set(_roster_ns(league_id), time() + delay)
+    _arm_roster_timer(league_id, dest_folder, upload_folder, delay)
+
+def _arm_roster_timer(league_id: str, dest_folder: str, upload_folder: str, delay: float):
+    schedule(
+        f"roster_flush:{league_id}",
+        delay,
+        _flush_roster_if_due,
+        args=(league_id, dest_folder, upload_folder),
+        on_shutdown=_flush_roster_now,
+    )
+
+def _flush_roster_if_due(league_id: str, dest_folder: str, upload_folder: str, wait: bool = False):
+    state = get_shared_state()
+    due = state.deadline_get(_roster_ns(league_id))
+    if due is None:
+        return  # already flushed by another worker
+
+    remaining = due - time()
+    if remaining > 0.05:
+        # a later chunk (maybe in another worker) pushed the deadline out; keep watching
+        _arm_roster_timer(league_id, dest_folder, upload_folder, remaining)
+        return
+
+    # All debounce timers share one scheduler thread: never block it on a
+    # league that is busy ingesting, just look again shortly.
+    lock = league_lock(league_id, upload_folder)
+    if not lock.acquire(blocking=wait):
+        _arm_roster_timer(league_id, dest_folder, upload_folder, ROSTER_LOCK_RETRY_SEC)
+        return
+    try:
+        if state.deadline_claim(_roster_ns(league_id), time()):
+            with span("roster_flush", "roster"):
+                _flush_roster(league_id, dest_folder, upload_folder)
+    finally:
+        lock.release()
+
+def _flush_roster_now(league_id: str, dest_folder: str, upload_folder: str):
+    """Shutdown hook: don't leave received chunks waiting for a timer that will never fire."""
+    state = get_shared_state()
+    if state.deadline_get(_roster_ns(league_id)) is None:
+        return
+    state.deadline_set(_roster_ns(league_id), time())
+    _flush_roster_if_due(league_id, dest_folder, upload_folder, wait=True)
 
 def resolve_league_id(payload: dict, subpath: str | None = None, league_data=None):
     # Try payload fields first
@@ -116,6 +250,46 @@ def resolve_league_id(payload: dict, subpath: str | None = None, league_data=Non
 def is_team_id(value: str) -> bool:
     return isinstance(value, str) and value.isdigit() and value.startswith("774")
 
+# payload list key → category (metrics labels, ingest routing)
+PAYLOAD_CATEGORIES = (
+    ("playerPassingStatInfoList", "passing"),
+    ("playerReceivingStatInfoList", "receiving"),
+    ("playerRushingStatInfoList", "rushing"),
+    ("playerDefensiveStatInfoList", "defense"),
+    ("playerKickingStatInfoList", "kicking"),
+    ("playerPuntingStatInfoList", "punting"),
+    ("teamStatInfoList", "teamstats"),
+    ("gameScheduleInfoList", "schedule"),
+    ("rosterInfoList", "roster"),
+    ("teamInfoList", "league"),
+    ("leagueTeamInfoList", "league"),
+    ("teamStandingInfoList", "standings"),
+)
+
+def webhook_category(payload: dict) -> str:
+    if isinstance(payload, dict):
+        if "error" in payload:
+            return "error"
+        for key, category in PAYLOAD_CATEGORIES:
+            if key in payload:
+                return category
+    return "other"
+
+def ingest_league_key(payload: dict, subpath: str | None, league_data) -> str | None:
+    """
+    League used to order ingest jobs. Team-scoped roster posts resolve to a
+    teamId, so fall back to the league in the URL like process_webhook_data does.
+    """
+    lid = resolve_league_id(payload, subpath, league_data)
+    if lid and is_team_id(lid):
+        lid = (
+            payload.get("leagueId")
+            or payload.get("franchiseInfo", {}).get("leagueId")
+            or find_league_in_subpath(subpath)
+            or league_data.get("latest_league")
+        )
+    return str(lid) if lid else None
+
 def compute_display_week(phase: str | None, week_number: int | None) -> int | None:
     """
     Convert season phase + week_number into a single display week index.
@@ -150,9 +324,21 @@ def _atomic_write_json(path, obj):
         except: pass
         raise
 
-def update_default_week(season_index, week_index, league_data):
+def write_latest_pointer(league_data, league_id, season_str, week_str, upload_folder="uploads"):
+    """uploads/_latest.json + the latest_* keys, together under the pointer lock."""
+    with pointer_lock(upload_folder):
+        league_data["latest_league"] = league_id
+        league_data["latest_season"] = season_str
+        league_data["latest_week"] = week_str
+        _atomic_write_json(os.path.join(upload_folder, "_latest.json"), {
+            "league": league_id,
+            "season": season_str,
+            "week": week_str,
+        })
+
+def update_default_week(season_index, week_index, league_data, league_id=None):
     try:
-        league_id = league_data.get("latest_league", "3264906")
+        league_id = league_id or league_data.get("latest_league", "3264906")
         default_path = os.path.join("uploads", league_id, "default_week.json")
         season_str = f"season_{season_index}"
         week_str = f"week_{week_index}"
@@ -160,70 +346,35 @@ def update_default_week(season_index, week_index, league_data):
             "season": season_str,
             "week": week_str
         }
-        with open(default_path, "w") as f:
-            json.dump(default_data, f, indent=2)
+        with pointer_lock():
+            _atomic_write_json(default_path, default_data)
         print(f"🆕 Default week updated: {season_str}, {week_str}")
     except Exception as e:
         print(f"⚠️ Failed to update default week: {e}")
 
 def _flush_roster(league_id: str, dest_folder: str, upload_folder: str):
-    """Debounce flush → write merged rosters.json and parsed_rosters.json."""
-    acc = _roster_acc.get(league_id)
-    if not acc:
+    """Debounce flush → fold the export into the per-team shards, write parsed_rosters.json once."""
+    with league_lock(league_id, upload_folder):   # re-entrant; direct callers (bench) take it here
+        _flush_roster_locked(league_id, dest_folder, upload_folder)
+
+def _flush_roster_locked(league_id: str, dest_folder: str, upload_folder: str):
+    state = get_shared_state()
+    cov = roster_coverage(league_id, upload_folder)
+    state.map_take(_coverage_ns(league_id))   # next chunk starts a new export
+    merged_map = state.map_take(_roster_ns(league_id))
+    if not merged_map:
         return
-    merged_map = acc["players_by_key"]
-    merged = list(merged_map.values())
-
-    # Union with previous parsed_rosters to avoid shrinking on partial cycles
-    parsed_path = os.path.join(dest_folder, "parsed_rosters.json")
-    if os.path.exists(parsed_path):
-        try:
-            with open(parsed_path, "r", encoding="utf-8") as f:
-                prev = json.load(f)
-
-            # handle both raw-list and wrapped-dict formats
-            if isinstance(prev, dict):
-                prev_players = prev.get("rosterInfoList") or prev.get("players") or []
-            elif isinstance(prev, list):
-                prev_players = prev
-            else:
-                prev_players = []
-
-            for p in prev_players:
-                k = _player_key(p)
-                if k not in merged_map:
-                    merged.append(p)
-
-            print(f"🧬 Unioned {len(prev_players)} previous players for fallback safety")
-
-        except Exception as e:
-            print(f"⚠️ Couldn’t union previous parsed_rosters.json: {e}")
-
-    # Write a raw-style rosters.json and then run the parser on the merged data
-    out_raw = {"rosterInfoList": merged}
-    os.makedirs(dest_folder, exist_ok=True)
-    raw_path = os.path.join(dest_folder, "rosters.json")
-
-    _atomic_write_json(raw_path, out_raw)
-
-    print(f"✅ Roster merged → {raw_path} (players={len(merged)})")
-
-    output_folder = os.path.join(
-        upload_folder,
-        league_id,
-        "season_global",
-        "week_global"
-    )
 
-    # 🔧 FINAL, AUTHORITATIVE rebuild from per-team files
-    rebuild_parsed_rosters(output_folder)
-
-    valid_team_ids = {
-        str(tid) for tid in _load_team_map(league_id).keys()
-        if str(tid) not in {"0", "-1", "32", "1000"}
-    }
+    # Players this export didn't mention keep their shard, so partial cycles never shrink the roster
+    result = merge_roster_export(dest_folder, list(merged_map.values()))
+    print(
+        f"✅ Roster merged → {os.path.join(dest_folder, 'parsed_rosters.json')} "
+        f"(received={len(merged_map)}, players={result['players']}, "
+        f"teams rewritten={len(result['changed'])})"
+    )
 
-    team_counts = Counter(str(p.get("teamId")) for p in merged)
+    valid_team_ids = expected_roster_teams(league_id, upload_folder)
+    team_counts = result["team_counts"]
 
     missing = valid_team_ids - set(team_counts.keys())
     if missing:
@@ -231,19 +382,22 @@ def _flush_roster(league_id: str, dest_folder: str, upload_folder: str):
     else:
         print("✅ All teams present in roster snapshot")
 
-    # Drive the existing parser (keeps rosters.html reading parsed_rosters.json)
-    parse_rosters_data(out_raw, "debounced/merge", dest_folder)
-
     # Helpful per-team log
-    team_counts = Counter(str(p.get("teamId") or p.get("team") or 0) for p in merged)
     non_fa = {tid: c for tid, c in team_counts.items() if tid != "0"}
     print(f"📊 Roster coverage: teams={len(non_fa)} + FA={team_counts.get('0', 0)} players")
     if non_fa:
         top = sorted(non_fa.items(), key=lambda kv: kv[1], reverse=True)[:10]
         print("   top teams:", ", ".join(f"{tid}:{cnt}" for tid, cnt in top))
 
-    # reset accumulator
-    merged_map.clear()
-    acc["timer"] = None
+    state.kv_set(f"roster_last_flush:{league_id}", {
+        "at": time(),
+        "players": result["players"],
+        "changed_teams": result["changed"],
+        "trigger": "complete" if cov["complete"] else "timeout",
+        "missing": [m["teamId"] for m in cov["missing"]],
+        "free_agents": cov["free_agents"],
+    })
+
+    bump_generation(league_id)
 
 
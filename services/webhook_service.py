@@ -2,10 +2,10 @@
 import os
 import json
 import re
-from pathlib import Path
-from threading import Timer
-from time import time
+import shutil
+import itertools
 from hashlib import sha256
+from pathlib import Path
 
 from parsers.passing_parser import parse_passing_stats
 from parsers.schedule_parser import parse_schedule_data
@@ -13,7 +13,13 @@ from parsers.league_parser import parse_league_info_data
 from parsers.standings_parser import parse_standings_data
 from parsers.defense_parser import parse_defense_stats
 
-from services.summary_service import generate_week_summaries_if_ready
+from services.job_queue import emit
+from services.build_graph import mark_fresh
+from services.stats_store import store_week_rows
+from services.season_totals import update_season_totals
+from services.generation import bump_generation
+from services.capture_log import capture_webhook, capture_webhook_file
+from services.roster_stream import RosterStream
 
 import services.webhook_helpers as webhook_helpers
 
@@ -21,18 +27,29 @@ from services.webhook_helpers import (
     resolve_league_id,
     is_team_id,
     compute_display_week,
-    _atomic_write_json,
     update_default_week,
-    last_webhook_time,
-    webhook_buffer,
-    batch_timers,
-    ROSTER_DEBOUNCE_SEC,
+    write_latest_pointer,
     _add_roster_chunk,
-    _get_roster_acc,
-    _flush_roster,
+    _schedule_roster_flush,
+    note_roster_arrival,
+    webhook_category,
 )
+from services.metrics import span, count_webhook, count_webhook_failure, count_webhook_duplicate
+from services.ingest_ledger import body_digest, duplicate_for_subpath, duplicate_for_dest, record_ingest
+
 
 
+def _roster_dest(upload_folder: str, league_id: str, subpath: str | None, team_id: str | None = None) -> str:
+    """Ledger destination of a roster payload: its team's shard, the FA dump, or the aggregate."""
+    global_folder = os.path.join(upload_folder, league_id, "season_global", "week_global")
+    team_in_path = re.search(r"team/(\d+)", subpath or "")
+    roster_team = team_id or (team_in_path.group(1) if team_in_path else None)
+    if roster_team:
+        return os.path.join(global_folder, "rosters_by_team", f"{roster_team}.json")
+    if "freeagents" in (subpath or "").lower():
+        return os.path.join(global_folder, "freeagents_last_raw.json")
+    return os.path.join(global_folder, "parsed_rosters.json")
+
 
 def process_webhook_data(
     data,
@@ -42,18 +59,50 @@ def process_webhook_data(
     app,
     league_data
 ):
+    """
+    Counts payloads / bytes / failures by category around the actual ingest (see /metrics).
+    Returns {"status": "duplicate", "dest": ...} when the ingest ledger skipped the payload,
+    {"status": "ingested", "season": ..., "week": ...} (this league's period) once it was written.
+    """
+    category = webhook_category(data)
+    count_webhook(category, len(body or b""))
+    try:
+        return _process_webhook_data(data, subpath, headers, body, app, league_data, category)
+    except Exception:
+        count_webhook_failure(category)
+        raise
+
+
+def _process_webhook_data(
+    data,
+    subpath,
+    headers,
+    body,
+    app,
+    league_data,
+    category
+):
+    upload_folder = app.config["UPLOAD_FOLDER"]
+    digest = body_digest(body)
+
+    def duplicate(rel):
+        classify.stop()
+        count_webhook_duplicate(category)
+        if category == "roster":
+            # an unchanged team still counts towards the export being complete
+            note_roster_arrival(league_id, subpath, data.get("rosterInfoList") or [], upload_folder, team_id)
+        print(f"🟰 Duplicate payload for {rel} (sha256 {digest[:12]}); skipping ingest.")
+        return {"status": "duplicate", "dest": rel}
+
     # ✅ detect simulator replays (headers dict is passed in from the request)
     is_replay = (headers.get("X-Replay") == "1" or headers.get("x-replay") == "1")
 
-    # ✅ 1. Save debug snapshot (skip for replays so we don't rewrite during sims)
-    if not is_replay:
-        debug_path = os.path.join(app.config['UPLOAD_FOLDER'], 'webhook_debug.txt')
-        with open(debug_path, 'w', encoding='utf-8') as f:
-            f.write(f"SUBPATH: {subpath}\n\nHEADERS:\n")
-            for k, v in headers.items():
-                f.write(f"{k}: {v}\n")
-            f.write("\nBODY:\n")
-            f.write(body.decode('utf-8', errors='replace'))
+    # ✅ 1. Capture log (append-only, written by a background thread)
+    with span("capture", category):
+        capture_webhook(subpath, headers, body, replay=is_replay)
+
+    # league / payload type / season + week resolution, up to the write
+    classify = span("classify", category).start()
 
     # ✅ 2. Determine storage path (league id)
     league_id = resolve_league_id(data, subpath, league_data)
@@ -93,82 +142,14 @@ def process_webhook_data(
     if is_team_id(league_id):
         raise RuntimeError(f"🚨 INTERNAL ERROR: league_id still a teamId after normalization: {league_id}")
 
+    # ✅ 3. Same bytes as what last landed via this subpath → nothing to do
+    dup = duplicate_for_subpath(league_id, subpath, digest, upload_folder)
+    if dup:
+        return duplicate(dup)
+
     league_data["latest_league"] = league_id
     print(f"📎 Using league_id: {league_id}")
 
-    # 3) Classify batch for debug batching (kept as-is: based on subpath)
-    if "league" in (subpath or ""):
-        batch_type = "league"
-        filename = "webhook_debug_league.txt"
-    elif any(x in (subpath or "") for x in ["passing", "kicking", "rushing", "receiving", "defense"]):
-        batch_type = "stats"
-        filename = "webhook_debug_stats.txt"
-    elif "roster" in (subpath or ""):
-        batch_type = "roster"
-        filename = "webhook_debug_roster.txt"
-    else:
-        batch_type = "other"
-        filename = "webhook_debug_misc.txt"
-
-    # If this is a replay, redirect logs to a separate *_replay.txt file
-    if is_replay:
-        base, ext = os.path.splitext(filename)
-        filename = f"{base}_replay{ext}"
-
-    debug_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-
-    # 4) Debug logging
-    if batch_type not in ["league", "stats", "roster"]:
-        # non-batched logs → just append (replay or normal)
-        with open(debug_path, 'a', encoding='utf-8') as f:
-            f.write(f"\n===== NEW WEBHOOK: {subpath} =====\n")
-            f.write("HEADERS:\n")
-            for k, v in headers.items():
-                f.write(f"{k}: {v}\n")
-            f.write("\nBODY:\n")
-            f.write(body.decode('utf-8', errors='replace'))
-            f.write("\n\n")
-    else:
-        if is_replay:
-            # For replays, write immediately to *_replay.txt (no batching/timers)
-            with open(debug_path, 'a', encoding='utf-8') as f:
-                f.write(f"\n===== NEW WEBHOOK: {subpath} =====\n")
-                f.write("HEADERS:\n")
-                for k, v in headers.items():
-                    f.write(f"{k}: {v}\n")
-                f.write("\nBODY:\n")
-                f.write(body.decode('utf-8', errors='replace'))
-                f.write("\n\n")
-        else:
-            # Normal path: buffered batching with timer
-            last_webhook_time[batch_type] = time()
-            webhook_buffer[batch_type].append({
-                "subpath": subpath,
-                "headers": headers,
-                "body": body.decode('utf-8', errors='replace'),
-            })
-
-            if batch_timers.get(batch_type):
-                batch_timers[batch_type].cancel()
-
-            def flush_batch(bt=batch_type):
-                debug_path_flush = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                # NOTE: this still overwrites on each flush; switch to 'a' to append history
-                with open(debug_path_flush, 'w', encoding='utf-8') as f:
-                    for entry in webhook_buffer[bt]:
-                        f.write(f"\n===== NEW WEBHOOK: {entry['subpath']} =====\n")
-                        f.write("HEADERS:\n")
-                        for k, v in entry['headers'].items():
-                            f.write(f"{k}: {v}\n")
-                        f.write("\nBODY:\n")
-                        f.write(entry['body'])
-                        f.write("\n\n")
-                print(f"✅ Flushed {bt} batch with {len(webhook_buffer[bt])} webhooks.")
-                webhook_buffer[bt] = []
-
-            batch_timers[batch_type] = Timer(5.0, flush_batch)
-            batch_timers[batch_type].start()
-
     # 5) Companion error?
     if 'error' in data:
         print(f"⚠️ Companion App Error: {data['error']}")
@@ -195,6 +176,14 @@ def process_webhook_data(
                 f"🚨 INTERNAL ERROR: league_id still a teamId inside roster handler: {league_id}"
             )
 
+        roster_dest = _roster_dest(upload_folder, league_id, subpath, team_id)
+        dup = duplicate_for_dest(league_id, roster_dest, digest, upload_folder)
+        if dup:
+            return duplicate(dup)
+
+        classify.stop()
+        write = span("raw_write", category).start()
+
         # ✳️ Debug FA payloads specifically
         if "freeagents" in (subpath or "").lower():
             fa_count = len(data.get("rosterInfoList") or [])
@@ -204,17 +193,17 @@ def process_webhook_data(
                 f"message={data.get('message') or data.get('error')}"
             )
 
-            dump_root = Path(app.config["UPLOAD_FOLDER"])
-            dump_dir = dump_root / str(league_id) / "season_global" / "week_global"
+            dump_dir = Path(app.config["UPLOAD_FOLDER"]) / str(league_id) / "season_global" / "week_global"
             dump_dir.mkdir(parents=True, exist_ok=True)
 
+            # the request bytes as received; no re-encode of the whole pool
             raw_path = dump_dir / "freeagents_last_raw.json"
-            with raw_path.open("w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            raw_path.write_bytes(body or b"")
 
             print(f"🧲 Free Agents payload: wrote → {raw_path}")
 
         if data.get("success") is False and not data.get("rosterInfoList"):
+            write.stop()
             print("⚠️ Skipping roster write: export failed / empty list.")
             return
 
@@ -233,35 +222,16 @@ def process_webhook_data(
 
         roster_list = data.get("rosterInfoList") or []
 
-        rosters_by_team_dir = os.path.join(
-            app.config['UPLOAD_FOLDER'],
-            league_id,
-            "season_global",
-            "week_global",
-            "rosters_by_team"
-        )
-        os.makedirs(rosters_by_team_dir, exist_ok=True)
-
-        # If this payload is team-scoped, persist it
-        if team_id:
-            team_path = os.path.join(rosters_by_team_dir, f"{team_id}.json")
-            with open(team_path, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2)
-
+        # per-team files under rosters_by_team/ are the flush's shards (services/roster_shards.py)
         added, total = _add_roster_chunk(league_id, roster_list)
+        write.stop()
         print(f"📥 Roster chunk received ({len(roster_list)}); merged so far={total} (added={added}).")
 
-        acc = _get_roster_acc(league_id)
-        if acc["timer"]:
-            acc["timer"].cancel()
-        acc["timer"] = Timer(
-            ROSTER_DEBOUNCE_SEC,
-            _flush_roster,
-            args=[league_id, league_folder, app.config["UPLOAD_FOLDER"]]
-        )
-        acc["timer"].start()
+        _schedule_roster_flush(league_id, league_folder, app.config["UPLOAD_FOLDER"])
+        record_ingest(league_id, subpath, roster_dest, digest, upload_folder)
+        note_roster_arrival(league_id, subpath, roster_list, upload_folder, team_id)
 
-        return
+        return _ingested(*_league_period(upload_folder, league_id))
     elif "teamInfoList" in data or "leagueTeamInfoList" in data:
         filename = "league.json"
         print("🏈 League Info received and saved!")
@@ -364,6 +334,9 @@ def process_webhook_data(
     print(f"📊 PAYLOAD WEEK: {week_index_int_payload}")
 
     # 🔒 AUTHORITATIVE STATE UPDATE (ONE SOURCE OF TRUTH)
+    # resolved here, written once the ledger has ruled out a duplicate (step 9)
+    period = None         # (season, week) this payload sets as the league's latest
+    default_week = None   # (season index, week) for default_week.json
     if season_index_int is not None and display_week is not None:
         season_str = f"season_{season_index_int}"
 
@@ -374,44 +347,10 @@ def process_webhook_data(
             if pre_week is None:
                 print("⚠️ Preseason detected but no valid pre_week for latest state.")
             else:
-                week_str = f"pre_{pre_week}"
-
-                league_data["latest_league"] = league_id
-                league_data["latest_season"] = season_str
-                league_data["latest_week"] = week_str
-
-                print(
-                    f"🔒 Authoritative set → league={league_id} "
-                    f"season={season_str} week={week_str}",
-                    flush=True
-                )
-
-                latest_path = os.path.join(app.config['UPLOAD_FOLDER'], "_latest.json")
-                _atomic_write_json(latest_path, {
-                    "league": league_id,
-                    "season": season_str,
-                    "week": week_str
-                })
+                period = (season_str, f"pre_{pre_week}")
 
         else:
-            week_str = f"week_{display_week}"
-
-            league_data["latest_league"] = league_id
-            league_data["latest_season"] = season_str
-            league_data["latest_week"] = week_str
-
-            print(
-                f"🔒 Authoritative set → league={league_id} "
-                f"season={season_str} week={week_str}",
-                flush=True
-            )
-
-            latest_path = os.path.join(app.config['UPLOAD_FOLDER'], "_latest.json")
-            _atomic_write_json(latest_path, {
-                "league": league_id,
-                "season": season_str,
-                "week": week_str
-            })
+            period = (season_str, f"week_{display_week}")
 
     # 8) Destination folder (non-roster)
     if (season_index == "global" and week_index == "global") or \
@@ -455,23 +394,42 @@ def process_webhook_data(
 
             week_dir = f"week_{effective_week}"
 
-            print(f"📌 Auto-updating default_week.json: season_{season_index_int}, week_{effective_week}")
-            update_default_week(season_index_int, effective_week, league_data)
+            default_week = (season_index_int, effective_week)
 
     league_folder = os.path.join(app.config['UPLOAD_FOLDER'], league_id, season_dir, week_dir)
     os.makedirs(league_folder, exist_ok=True)
 
-    # 9) Write + parse (non-roster)
+    output_path = os.path.join(league_folder, filename)
+    dup = duplicate_for_dest(league_id, output_path, digest, upload_folder)
+    if dup:
+        return duplicate(dup)
+
+    classify.stop()
+
+    # 9) Pointer + default week, then write + parse (non-roster)
+    if period:
+        write_latest_pointer(league_data, league_id, *period, app.config['UPLOAD_FOLDER'])
+        print(
+            f"🔒 Authoritative set → league={league_id} "
+            f"season={period[0]} week={period[1]}",
+            flush=True
+        )
+    if default_week:
+        print(f"📌 Auto-updating default_week.json: season_{default_week[0]}, week_{default_week[1]}")
+        update_default_week(*default_week, league_data, league_id)
+
     if filename == "league.json":
-        parse_league_info_data(data, subpath, league_folder)
+        with span("parse", category):
+            parse_league_info_data(data, subpath, league_folder)
 
     # Generic write for non-roster payloads
-    output_path = os.path.join(league_folder, filename)
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=4)
+    with span("raw_write", category):
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=4)
     print(f"✅ Data saved to {output_path}")
 
     # Type-specific parse
+    parse = span("parse", category).start()
     if "playerPassingStatInfoList" in data:
         parse_passing_stats(league_id, data, league_folder)
     elif "gameScheduleInfoList" in data:
@@ -480,6 +438,11 @@ def process_webhook_data(
         parse_league_info_data(data, subpath, league_folder)
     elif "teamStandingInfoList" in data:
         parse_standings_data(data, subpath, league_folder)
+    elif "playerReceivingStatInfoList" in data:
+        # /receiving reads the raw rows; mirror them into the stats store as-is
+        receiving_rows = data.get("playerReceivingStatInfoList") or []
+        store_week_rows("receiving", league_folder, receiving_rows)
+        update_season_totals("receiving", league_folder, receiving_rows)
     elif "playerRushingStatInfoList" in data:
         from parsers.rushing_parser import parse_rushing_stats
         print(f"🐛 DEBUG: Detected rushing stats for season={season_index}, week={week_index}")
@@ -487,25 +450,163 @@ def process_webhook_data(
     elif "playerDefensiveStatInfoList" in data:
         print(f"🛡️ DEBUG: Detected defensive stats for season={season_index}, week={week_index}")
         parse_defense_stats(league_id, data, league_folder)
-        try:
-            if not (phase and phase.startswith("pre")):
-                generate_week_summaries_if_ready(
-                    league_id=league_id,
-                    season_dir=season_dir,
-                    week_dir=week_dir,
-                    upload_folder=app.config["UPLOAD_FOLDER"]
-                )
-        except Exception as e:
-            print(f"❌ Summary generation failed: {e}")
+    parse.stop()
+
+    # what the parse just built is fresh; the "derived_rebuild" job handles what's downstream
+    mark_fresh(app.config["UPLOAD_FOLDER"], league_id, season_dir, week_dir, filename)
+
+    bump_generation(league_id, league_folder)
 
     # 10) Cache copy
     league_data[subpath] = data
 
-    # 🔐 Update stats hash after stats write
+    # 🔐 Ledger + stats hash, both from the raw request bytes
+    record_ingest(league_id, subpath, output_path, digest, upload_folder)
+    webhook_helpers.current_stats_hash = digest
+    print(f"🔄 Stats hash updated → {digest}")
+
+    # "defense_written" etc.: derived work (rebuilds, recaps) runs as background jobs
+    emit(
+        f"{category}_written",
+        league_id=league_id,
+        season_dir=season_dir,
+        week_dir=week_dir,
+        upload_folder=app.config["UPLOAD_FOLDER"],
+        phase=phase,
+    )
+    return _ingested(*(period or _league_period(upload_folder, league_id)))
+
+
+def _ingested(season, week) -> dict:
+    return {"status": "ingested", "season": season, "week": week}
+
+
+def _league_period(upload_folder, league_id) -> tuple:
+    """(season, week) from uploads/<league>/default_week.json; the global latest_* pointer may name another league."""
     try:
-        webhook_helpers.current_stats_hash = sha256(
-            json.dumps(data, sort_keys=True).encode()
-        ).hexdigest()
-        print(f"🔄 Stats hash updated → {webhook_helpers.current_stats_hash}")
-    except Exception as e:
-        print(f"⚠️ Failed to update stats hash: {e}")
+        with open(os.path.join(upload_folder, str(league_id), "default_week.json"), "r", encoding="utf-8") as f:
+            d = json.load(f)
+        return d.get("season"), d.get("week")
+    except Exception:
+        return None, None
+
+
+ROSTER_STREAM_BATCH = int(os.getenv("ROSTER_STREAM_BATCH", "500"))
+
+
+def process_roster_stream(job, app, league_data):
+    """
+    Streaming twin of the roster branch of process_webhook_data for bodies the
+    route spooled straight to disk (ingest_queue.spool_webhook_stream): players
+    are decoded one at a time from the spool and handed to the accumulator in
+    batches, so the payload never exists as bytes + str + dict at once.
+    """
+    count_webhook("roster", job.get("size") or 0)
+    try:
+        return _process_roster_stream(job, app, league_data)
+    except Exception:
+        count_webhook_failure("roster")
+        raise
+
+
+def _process_roster_stream(job, app, league_data):
+    category = "roster"
+    subpath = job["subpath"]
+    headers = job["headers"]
+    path = job["spool"]
+    offset = job.get("body_offset", 0)
+    upload_folder = app.config["UPLOAD_FOLDER"]
+    league_id = str(job["league"])
+
+    digest = job.get("sha256")
+    if not digest:
+        # recovered from the spool after a restart
+        h = sha256()
+        with open(path, "rb") as f:
+            f.seek(offset)
+            for chunk in iter(lambda: f.read(1 << 16), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+
+    is_replay = (headers.get("X-Replay") == "1" or headers.get("x-replay") == "1")
+    with span("capture", category):
+        capture_webhook_file(subpath, headers, path, offset, replay=is_replay, digest=digest, size=job.get("size"))
+
+    classify = span("classify", category).start()
+    league_data["latest_league"] = league_id
+    print(f"📎 Using league_id: {league_id} (streamed roster)")
+
+    roster_dest = _roster_dest(upload_folder, league_id, subpath)
+    dup = duplicate_for_subpath(league_id, subpath, digest, upload_folder) \
+        or duplicate_for_dest(league_id, roster_dest, digest, upload_folder)
+    if dup:
+        classify.stop()
+        count_webhook_duplicate(category)
+        note_roster_arrival(league_id, subpath, [], upload_folder)
+        print(f"🟰 Duplicate payload for {dup} (sha256 {digest[:12]}); skipping ingest.")
+        return {"status": "duplicate", "dest": dup}
+    classify.stop()
+
+    league_folder = os.path.join(upload_folder, league_id, "season_global", "week_global")
+    os.makedirs(league_folder, exist_ok=True)
+    is_fa = "freeagents" in (subpath or "").lower()
+
+    parse = span("parse", category).start()
+    teams = set()
+    batch = []
+    added = total = 0
+    with open(path, "rb") as f:
+        f.seek(offset)
+        rs = RosterStream(f)
+        players = iter(rs)
+        # Companion error bodies carry no players: the first pull has read the
+        # whole body and set rs.meta, so the error is known before anything is merged
+        first = next(players, None)
+        if "error" in rs.meta:
+            parse.stop()
+            print(f"⚠️ Companion App Error: {rs.meta['error']}")
+            error_filename = f"{subpath.replace('/', '_')}_error.json"
+            with open(os.path.join(upload_folder, error_filename), 'w', encoding='utf-8') as ef:
+                json.dump(rs.meta, ef, indent=4)
+            return None
+
+        if is_fa:
+            # the request bytes as received, copied file to file
+            with span("raw_write", category):
+                raw_path = os.path.join(league_folder, "freeagents_last_raw.json")
+                with open(path, "rb") as src, open(raw_path, "wb") as dst:
+                    src.seek(offset)
+                    shutil.copyfileobj(src, dst, 1 << 16)
+            print(f"🧲 Free Agents payload: wrote → {raw_path}")
+
+        for p in itertools.chain([first] if first is not None else [], players):
+            if not isinstance(p, dict):
+                continue
+            batch.append(p)
+            teams.add(str(p.get("teamId") or 0))
+            if len(batch) >= ROSTER_STREAM_BATCH:
+                n, total = _add_roster_chunk(league_id, batch)
+                added += n
+                batch = []
+        if batch:
+            n, total = _add_roster_chunk(league_id, batch)
+            added += n
+    parse.stop()
+
+    meta = rs.meta
+    if is_fa:
+        print(
+            f"🧲 Free Agents payload: success={meta.get('success')} "
+            f"count={rs.count} "
+            f"message={meta.get('message') or meta.get('error')}"
+        )
+    if meta.get("success") is False and not rs.count:
+        print("⚠️ Skipping roster write: export failed / empty list.")
+        return None
+
+    print(f"📥 Roster chunk streamed ({rs.count}); merged so far={total} (added={added}).")
+
+    _schedule_roster_flush(league_id, league_folder, upload_folder)
+    record_ingest(league_id, subpath, roster_dest, digest, upload_folder)
+    note_roster_arrival(league_id, subpath, [{"teamId": t} for t in teams], upload_folder)
+    return _ingested(*_league_period(upload_folder, league_id))
@@ -0,0 +1,255 @@
+"""
+Two leagues, two workers, one uploads/ tree: check the per-league write locks.
+
+    python stress_two_leagues.py                      # 2 worker processes, weeks 1-2
+    python stress_two_leagues.py --procs 3 --weeks 3 --json bench/two_leagues.json
+
+Runs in a scratch directory. Every worker process imports the app (same
+uploads/, same shared state store, like gunicorn workers) and posts its share
+of the synthetic exports (synthetic_export.py) of two leagues to /webhook,
+interleaved, so both workers write to both leagues at the same time and every
+roster export is split across workers. LEAGUE_LOCK_TRACE records every hold
+of a write lock; once all workers have drained their ingest and job queues
+the script checks:
+
+    exclusive   no two holds of the same lock overlap, across all processes
+    parallel    league A and league B were held at the same time (they don't serialize)
+    rosters     each league's parsed_rosters.json has every player exactly once
+    shards      every roster shard matches the hash recorded in the manifest
+    json        every .json file under uploads/ parses (no torn writes)
+
+Exit status 1 if any check fails.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+LEAGUES = ("90000001", "90000002")
+
+
+def child(index: int, procs: int, weeks: int):
+    os.environ["ROSTER_DEBOUNCE_SEC"] = "0.5"
+    os.environ["ROSTER_FLUSH_ON_COMPLETE"] = "0"
+    os.environ["POWER_RANKINGS_DEBOUNCE_SEC"] = "0.5"
+    sys.path.insert(0, HERE)
+
+    from synthetic_export import export
+
+    devnull = open(os.devnull, "w")
+    with redirect_stdout(devnull):
+        import madden_flask_app as m
+        from services.parse_pool import shutdown_parse_pool
+        client = m.app.test_client()
+
+    def settle():
+        while True:
+            s = m.ingest_status()
+            js = m.job_queue_status()
+            if s["depth"] == 0 and not s["active"] and not m.scheduler_status()["pending"] \
+                    and not js["pending"] and not js["running"]:
+                return
+            time.sleep(0.01)
+
+    # start together, after every worker has paid for its imports
+    open(f"ready_{index}", "w").close()
+    while not os.path.exists("go"):
+        time.sleep(0.01)
+
+    st = time.perf_counter()
+    posted = 0
+    with redirect_stdout(devnull):
+        for week in range(1, weeks + 1):
+            a, b = (export(week, seed=week, league_id=lid) for lid in LEAGUES)
+            # A, B, A, B, ... and every worker takes every procs-th item
+            mixed = [item for pair in zip(a, b) for item in pair]
+            for i, (subpath, payload) in enumerate(mixed):
+                if i % procs != index:
+                    continue
+                client.post(f"/webhook/{subpath}", data=json.dumps(payload), content_type="application/json")
+                posted += 1
+            settle()
+            # the next week starts once every worker is done with this one
+            open(f"done_{index}_{week}", "w").close()
+            while not all(os.path.exists(f"done_{k}_{week}") for k in range(procs)):
+                time.sleep(0.01)
+            settle()   # a roster flush armed here may have been claimed by another worker
+
+    print(json.dumps({
+        "index": index,
+        "pid": os.getpid(),
+        "posted": posted,
+        "sec": round(time.perf_counter() - st, 3),
+        "locks": m.league_lock_status(),
+        "ingest": {k: m.ingest_status()[k] for k in ("processed", "failed")},
+    }))
+    sys.stdout.flush()
+    shutdown_parse_pool()
+    os._exit(0)
+
+
+def read_trace(path: str) -> dict:
+    holds = {}
+    with open(path, encoding="utf-8") as f:
+        for ln in f:
+            h = json.loads(ln)
+            holds.setdefault(h["lock"], []).append((h["acquired"], h["released"], h["pid"]))
+    for v in holds.values():
+        v.sort()
+    return holds
+
+
+def check_exclusive(holds: dict) -> list[str]:
+    errors = []
+    for name, spans in holds.items():
+        for (a0, a1, ap), (b0, b1, bp) in zip(spans, spans[1:]):
+            if b0 < a1:
+                errors.append(f"{name}: pid {ap} held until {a1:.6f}, pid {bp} took it at {b0:.6f}")
+    return errors
+
+
+def overlap_sec(x: list, y: list) -> float:
+    total = 0.0
+    for a0, a1, _ in x:
+        for b0, b1, _ in y:
+            if b0 >= a1:
+                break
+            total += max(0.0, min(a1, b1) - max(a0, b0))
+    return total
+
+
+def check_tree(uploads: str, expect_players: int) -> dict:
+    sys.path.insert(0, HERE)
+    from services.roster_shards import MANIFEST, AGGREGATE, _digest, _load_shard
+
+    out = {"rosters": {}, "shard_mismatch": [], "bad_json": []}
+    for root, _, files in os.walk(uploads):
+        for fn in files:
+            if fn.endswith(".json"):
+                try:
+                    with open(os.path.join(root, fn), encoding="utf-8") as f:
+                        json.load(f)
+                except Exception:
+                    out["bad_json"].append(os.path.relpath(os.path.join(root, fn), uploads))
+            if fn == MANIFEST:
+                with open(os.path.join(root, fn), encoding="utf-8") as f:
+                    teams = json.load(f)["teams"]
+                for tid, ent in teams.items():
+                    if _digest(_load_shard(root, tid)) != ent["sha256"]:
+                        out["shard_mismatch"].append(os.path.relpath(os.path.join(root, tid), uploads))
+            if fn == AGGREGATE:
+                with open(os.path.join(root, fn), encoding="utf-8") as f:
+                    players = json.load(f).get("players") or []
+                league = os.path.relpath(root, uploads).split(os.sep)[0]
+                keys = {(p.get("rosterId"), p.get("teamId")) for p in players}
+                out["rosters"][league] = {"players": len(players), "unique": len(keys)}
+    for lid in LEAGUES:
+        r = out["rosters"].get(lid)
+        out.setdefault("roster_errors", [])
+        if not r or r["players"] != expect_players or r["unique"] != expect_players:
+            out["roster_errors"].append(f"{lid}: {r} (expected {expect_players})")
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--procs", type=int, default=2, help="worker processes sharing uploads/")
+    ap.add_argument("--weeks", type=int, default=2, help="exports per league")
+    ap.add_argument("--keep", action="store_true", help="keep the scratch directory")
+    ap.add_argument("--json", help="also write the results to this JSON file")
+    ap.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child is not None:
+        child(args.child, args.procs, args.weeks)
+        return
+
+    sys.path.insert(0, HERE)
+    from synthetic_export import TEAMS, PER_TEAM, FREE_AGENTS
+
+    work = tempfile.mkdtemp(prefix="stress_two_leagues_")
+    trace = os.path.join(work, "locks.trace")
+    env = dict(os.environ, LEAGUE_LOCK_TRACE=trace)
+    try:
+        workers = [
+            subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), "--child", str(k),
+                 "--procs", str(args.procs), "--weeks", str(args.weeks)],
+                cwd=work, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+            )
+            for k in range(args.procs)
+        ]
+        while not all(os.path.exists(os.path.join(work, f"ready_{k}")) for k in range(args.procs)):
+            if any(w.poll() is not None for w in workers):
+                break
+            time.sleep(0.05)
+        open(os.path.join(work, "go"), "w").close()
+
+        reports = []
+        for w in workers:
+            out, err = w.communicate()
+            if w.returncode != 0 or '{"index"' not in out:
+                sys.exit(f"worker failed ({w.returncode}):\n{err[-4000:]}")
+            reports.append(json.loads([ln for ln in out.splitlines() if ln.startswith('{"index"')][-1]))
+
+        holds = read_trace(trace)
+        a, b = (holds.get(f"league:{lid}", []) for lid in LEAGUES)
+        tree = check_tree(os.path.join(work, "uploads"), TEAMS * PER_TEAM + FREE_AGENTS)
+    finally:
+        if args.keep:
+            print(f"📁 Scratch directory kept: {work}")
+        else:
+            shutil.rmtree(work, ignore_errors=True)
+
+    exclusive = check_exclusive(holds)
+    parallel = overlap_sec(a, b)
+    checks = {
+        "exclusive": not exclusive,
+        "parallel": parallel > 0,
+        "rosters": not tree["roster_errors"],
+        "shards": not tree["shard_mismatch"],
+        "json": not tree["bad_json"],
+    }
+    results = {
+        "procs": args.procs,
+        "weeks": args.weeks,
+        "workers": reports,
+        "holds": {k: len(v) for k, v in holds.items()},
+        "league_overlap_sec": round(parallel, 3),
+        "rosters": tree["rosters"],
+        "checks": checks,
+        "errors": exclusive[:20] + tree["roster_errors"] + tree["shard_mismatch"][:20] + tree["bad_json"][:20],
+    }
+
+    print(f"🏈 {args.procs} workers × 2 leagues × {args.weeks} week(s), cpus={os.cpu_count()}")
+    for r in reports:
+        lk = r["locks"]
+        print(f"   worker {r['index']} pid={r['pid']}: posted={r['posted']} in {r['sec']:.2f}s, "
+              f"lock holds={lk['acquired']} contended={lk['contended']} "
+              f"wait={lk['wait_sec']:.2f}s (max {lk['max_wait_sec']:.2f}s), failed jobs={r['ingest']['failed']}")
+    print(f"   lock holds: {results['holds']}")
+    print(f"   league A/B held at the same time for {parallel:.2f}s")
+    for lid, r in tree["rosters"].items():
+        print(f"   {lid}: parsed_rosters.json players={r['players']} unique={r['unique']}")
+    for name, ok in checks.items():
+        print(f"   {'✅' if ok else '❌'} {name}")
+    for e in results["errors"]:
+        print(f"      {e}")
+
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results written to {args.json}")
+
+    sys.exit(0 if all(checks.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
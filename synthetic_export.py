@@ -0,0 +1,279 @@
+"""
+Deterministic Companion-shaped export for benchmarks and stress scripts.
+
+    from synthetic_export import export
+    for subpath, payload in export(week=3, seed=0):
+        ...
+
+Same (week, seed) → byte-identical payloads. One export is what the
+Companion app sends for a week: league teams, standings, the week's schedule,
+every player/team stat list, one rosterInfoList per team (32 × 53) and the
+free agent pool, each under the subpath the app posts it to.
+
+    python synthetic_export.py --out exports/week3 --week 3      # dump as files
+"""
+import argparse
+import json
+import os
+import random
+
+LEAGUE_ID = "90000001"
+PLATFORM = "ps5"
+TEAMS = 32
+PER_TEAM = 53
+FREE_AGENTS = 200
+CALENDAR_YEAR = 2025
+TEAM_ID_BASE = 774000000
+
+POSITIONS = ["QB", "HB", "FB", "WR", "TE", "LT", "LG", "C", "RG", "RT", "LE", "RE", "DT",
+             "LOLB", "MLB", "ROLB", "CB", "FS", "SS", "K", "P"]
+
+# roughly the rating/attribute keys a Companion rosterInfoList entry carries
+RATING_KEYS = [
+    "accelRating", "agilityRating", "awareRating", "bCVRating", "bigHitTrait", "blockShedRating",
+    "breakSackRating", "breakTackleRating", "cITRating", "carryRating", "catchRating", "changeOfDirectionRating",
+    "clutchTrait", "coverBallTrait", "dLBullRushTrait", "dLSpinTrait", "dLSwimTrait", "dropOpenPassTrait",
+    "elusiveRating", "feetInBoundsTrait", "finesseMovesRating", "fightForYardsTrait", "highMotorTrait",
+    "hitPowerRating", "impactBlockRating", "injuryRating", "jukeMoveRating", "jumpRating", "kickAccRating",
+    "kickPowerRating", "kickRetRating", "leadBlockRating", "manCoverRating", "passBlockFinesseRating",
+    "passBlockPowerRating", "passBlockRating", "penaltyTrait", "playActionRating", "playBallTrait",
+    "playRecRating", "posCatchTrait", "powerMovesRating", "predictTrait", "pressRating", "pursuitRating",
+    "qBStyleTrait", "releaseRating", "routeRunDeepRating", "routeRunMedRating", "routeRunShortRating",
+    "runBlockFinesseRating", "runBlockPowerRating", "runBlockRating", "runStyle", "sensePressureTrait",
+    "specCatchRating", "speedRating", "spinMoveRating", "staminaRating", "stiffArmRating", "strengthRating",
+    "tackleRating", "throwAccDeepRating", "throwAccMidRating", "throwAccRating", "throwAccShortRating",
+    "throwAwayTrait", "throwOnRunRating", "throwPowerRating", "throwUnderPressureRating", "tightSpiralTrait",
+    "toughRating", "truckRating", "yACCatchTrait", "zoneCoverRating",
+]
+CONTRACT_KEYS = [
+    "capHit", "capReleaseNetSavings", "capReleasePenalty", "contractBonus", "contractLength",
+    "contractSalary", "contractYearsLeft", "desiredBonus", "desiredLength", "desiredSalary",
+    "reSignStatus", "isFreeAgent", "isActive", "isOnIR", "isOnPracticeSquad", "isRetired",
+]
+
+STAT_LISTS = {
+    "passing": "playerPassingStatInfoList",
+    "rushing": "playerRushingStatInfoList",
+    "receiving": "playerReceivingStatInfoList",
+    "defense": "playerDefensiveStatInfoList",
+    "kicking": "playerKickingStatInfoList",
+    "punting": "playerPuntingStatInfoList",
+    "teamstats": "teamStatInfoList",
+}
+
+
+def team_ids(teams: int = TEAMS) -> list[int]:
+    return [TEAM_ID_BASE + i for i in range(teams)]
+
+
+def _roster_id(team_idx: int, j: int) -> int:
+    return team_idx * 1000 + j + 1
+
+
+def roster_players(team_idx: int, n: int = PER_TEAM, seed: int = 0, teams: int = TEAMS) -> list[dict]:
+    """rosterInfoList for one team; team_idx == teams is the free agent pool (teamId 0)."""
+    r = random.Random(f"roster:{team_idx}:{seed}")
+    team_id = TEAM_ID_BASE + team_idx if team_idx < teams else 0
+    players = []
+    for j in range(n):
+        rid = _roster_id(team_idx, j)
+        p = {
+            "rosterId": rid, "playerId": rid, "portraitId": rid * 7,
+            "firstName": f"First{rid}", "lastName": f"Last{rid}",
+            "position": POSITIONS[j % len(POSITIONS)], "teamId": team_id,
+            "jerseyNum": j % 99, "age": 21 + j % 14, "yearsPro": j % 12,
+            "rookieYear": CALENDAR_YEAR - j % 12, "college": f"College {j % 120}",
+            "height": 70 + j % 10, "weight": 180 + j % 140, "devTrait": j % 4,
+            "overallRating": r.randint(45, 99), "playerBestOvr": r.randint(45, 99),
+            "playerSchemeOvr": r.randint(45, 99), "injuryLength": 0, "injuryType": "",
+            "signatureSlotList": [{"signatureAbility": {"signatureTitle": f"Ability {k}"}} for k in range(j % 3)],
+        }
+        for k in RATING_KEYS:
+            p[k] = r.randint(20, 99)
+        for k in CONTRACT_KEYS:
+            p[k] = r.randint(0, 30_000_000)
+        players.append(p)
+    return players
+
+
+def synthetic_league(seed: int = 0, teams: int = TEAMS, per_team: int = PER_TEAM,
+                     free_agents: int = FREE_AGENTS) -> list[dict]:
+    """Every rostered player plus free agents, as one list."""
+    out = []
+    for t in range(teams + 1):
+        out.extend(roster_players(t, per_team if t < teams else free_agents, seed, teams))
+    return out
+
+
+def league_teams(teams: int = TEAMS) -> dict:
+    return {
+        "success": True,
+        "leagueTeamInfoList": [
+            {
+                "teamId": tid, "abbrName": f"T{i:02d}", "cityName": f"City{i}", "nickName": f"Team{i}",
+                "displayName": f"Team{i}", "divName": f"Div{i % 8}", "conferenceName": "AFC" if i < teams // 2 else "NFC",
+                "userName": f"user{i}" if i % 3 else "", "ovrRating": 70 + i % 20, "calendarYear": CALENDAR_YEAR,
+            }
+            for i, tid in enumerate(team_ids(teams))
+        ],
+    }
+
+
+def standings(week: int, seed: int = 0, teams: int = TEAMS) -> dict:
+    r = random.Random(f"standings:{week}:{seed}")
+    rows = []
+    for i, tid in enumerate(team_ids(teams)):
+        wins = r.randint(0, week)
+        rows.append({
+            "teamId": tid, "seasonIndex": 0, "weekIndex": week - 1, "stageIndex": 1,
+            "calendarYear": CALENDAR_YEAR, "totalWins": wins, "totalLosses": week - wins, "totalTies": 0,
+            "winPct": round(wins / week, 3) if week else 0.0, "rank": i + 1, "seed": i % 7,
+            "ptsFor": r.randint(10, 40) * week, "ptsAgainst": r.randint(10, 40) * week,
+            "offTotalYds": r.randint(250, 450) * week, "defTotalYds": r.randint(250, 450) * week,
+            "offTotalYdsRank": r.randint(1, teams), "defTotalYdsRank": r.randint(1, teams),
+            "ptsForRank": r.randint(1, teams), "ptsAgainstRank": r.randint(1, teams),
+            "tODiff": r.randint(-10, 10), "capAvailable": r.randint(0, 60_000_000),
+            "divisionName": f"Div{i % 8}", "conferenceName": "AFC" if i < teams // 2 else "NFC",
+        })
+    return {"success": True, "teamStandingInfoList": rows}
+
+
+def schedule(week: int, seed: int = 0, teams: int = TEAMS) -> dict:
+    r = random.Random(f"schedule:{week}:{seed}")
+    ids = team_ids(teams)
+    r.shuffle(ids)
+    games = []
+    for g in range(len(ids) // 2):
+        games.append({
+            "scheduleId": week * 100 + g, "seasonIndex": 0, "weekIndex": week - 1, "stageIndex": 1,
+            "homeTeamId": ids[2 * g], "awayTeamId": ids[2 * g + 1],
+            "homeScore": r.randint(0, 45), "awayScore": r.randint(0, 45),
+            "status": 2, "isGameOfTheWeek": g == 0,
+        })
+    return {"success": True, "gameScheduleInfoList": games}
+
+
+def _game_of(week: int, team_idx: int) -> int:
+    return week * 100 + team_idx // 2
+
+
+def _stat_row(kind: str, r: random.Random, week: int, team_idx: int, rid: int, name: str) -> dict:
+    row = {
+        "rosterId": rid, "teamId": TEAM_ID_BASE + team_idx, "fullName": name,
+        "seasonIndex": 0, "weekIndex": week - 1, "stageIndex": 1,
+        "scheduleId": _game_of(week, team_idx), "statId": rid * 100 + week,
+    }
+    if kind == "passing":
+        att = r.randint(18, 50); comp = r.randint(att // 2, att); yds = r.randint(120, 450)
+        row.update(passAtt=att, passComp=comp, passYds=yds, passTDs=r.randint(0, 5), passInts=r.randint(0, 3),
+                   passSacks=r.randint(0, 6), passLongest=r.randint(15, 80),
+                   passCompPct=round(100 * comp / att, 1), passYdsPerAtt=round(yds / att, 1),
+                   passYdsPerGame=float(yds), passerRating=round(r.uniform(40, 150), 1), passPts=r.randint(0, 30))
+    elif kind == "rushing":
+        att = r.randint(1, 28); yds = r.randint(-5, 180)
+        row.update(rushAtt=att, rushYds=yds, rushTDs=r.randint(0, 3), rushFum=r.randint(0, 1),
+                   rushBrokenTackles=r.randint(0, 8), rushYdsAfterContact=r.randint(0, 90),
+                   rush20PlusYds=r.randint(0, 3), rushLongest=r.randint(0, 75),
+                   rushYdsPerAtt=round(yds / att, 1), rushYdsPerGame=float(yds), rushPts=r.randint(0, 18))
+    elif kind == "receiving":
+        catches = r.randint(0, 12); yds = r.randint(0, 190)
+        row.update(recCatches=catches, recYds=yds, recTDs=r.randint(0, 3), recDrops=r.randint(0, 2),
+                   recYdsAfterCatch=r.randint(0, 80), recLongest=r.randint(0, 75),
+                   recYdsPerCatch=round(yds / catches, 1) if catches else 0.0, recYdsPerGame=float(yds),
+                   recCatchPct=round(r.uniform(40, 100), 1), recPts=r.randint(0, 18))
+    elif kind == "defense":
+        row.update(defTotalTackles=r.randint(0, 14), defSacks=r.randint(0, 3), defInts=r.randint(0, 2),
+                   defIntReturnYds=r.randint(0, 60), defDeflections=r.randint(0, 4), defForcedFum=r.randint(0, 1),
+                   defFumRec=r.randint(0, 1), defTDs=r.randint(0, 1), defSafeties=0,
+                   defCatchAllowed=r.randint(0, 8), defPts=r.randint(0, 6))
+    elif kind == "kicking":
+        fga = r.randint(0, 5); xpa = r.randint(0, 6)
+        row.update(fGAtt=fga, fGMade=r.randint(0, fga), fGLongest=r.randint(0, 58),
+                   xPAtt=xpa, xPMade=r.randint(0, xpa), kickPts=r.randint(0, 18),
+                   kickoffAtt=r.randint(1, 8), kickoffTBs=r.randint(0, 6))
+    elif kind == "punting":
+        att = r.randint(0, 8)
+        row.update(puntAtt=att, puntYds=att * r.randint(38, 52), puntLongest=r.randint(0, 70),
+                   puntsIn20=r.randint(0, att), puntTBs=r.randint(0, 1), puntNetYds=att * r.randint(33, 46))
+    return row
+
+
+# stat rows per team per game and the roster slots they come from
+_STAT_SLOTS = {
+    "passing": [0],                        # QB1
+    "rushing": [1, 22, 0],                 # HB1, HB2, QB
+    "receiving": [3, 4, 24, 25, 1],        # WRs, TEs, HB
+    "defense": list(range(10, 19)) + list(range(31, 37)),
+    "kicking": [19],
+    "punting": [20],
+}
+
+
+def player_stats(kind: str, week: int, seed: int = 0, teams: int = TEAMS) -> dict:
+    r = random.Random(f"{kind}:{week}:{seed}")
+    rows = []
+    for t in range(teams):
+        for j in _STAT_SLOTS[kind]:
+            rid = _roster_id(t, j)
+            rows.append(_stat_row(kind, r, week, t, rid, f"First{rid} Last{rid}"))
+    return {"success": True, STAT_LISTS[kind]: rows}
+
+
+def team_stats(week: int, seed: int = 0, teams: int = TEAMS) -> dict:
+    r = random.Random(f"teamstats:{week}:{seed}")
+    rows = []
+    for t, tid in enumerate(team_ids(teams)):
+        rows.append({
+            "teamId": tid, "seasonIndex": 0, "weekIndex": week - 1, "stageIndex": 1,
+            "scheduleId": _game_of(week, t), "statId": tid * 100 + week,
+            "offTotalYds": r.randint(200, 550), "offPassYds": r.randint(100, 400), "offRushYds": r.randint(30, 250),
+            "offFirstDowns": r.randint(10, 30), "off3rdDownConv": r.randint(2, 10), "off3rdDownAtt": r.randint(8, 16),
+            "offRedZones": r.randint(1, 6), "offRedZoneTDs": r.randint(0, 5), "offSacks": r.randint(0, 6),
+            "defTotalYds": r.randint(200, 550), "defPassYds": r.randint(100, 400), "defRushYds": r.randint(30, 250),
+            "defSacks": r.randint(0, 6), "defIntsRec": r.randint(0, 3), "defFumRec": r.randint(0, 2),
+            "tOGiveaways": r.randint(0, 4), "tOTakeaways": r.randint(0, 4), "penalties": r.randint(2, 12),
+            "penaltyYds": r.randint(10, 110), "totalWins": r.randint(0, week), "seed": t % 7,
+        })
+    return {"success": True, "teamStatInfoList": rows}
+
+
+def export(week: int = 1, seed: int = 0, league_id: str = LEAGUE_ID, teams: int = TEAMS,
+           per_team: int = PER_TEAM, free_agents: int = FREE_AGENTS) -> list[tuple[str, dict]]:
+    """One weekly Companion export as [(subpath, payload), ...] in the order the app sends it."""
+    base = f"{PLATFORM}/{league_id}"
+    wk = f"{base}/week/reg/{week}"
+    out = [
+        (f"{base}/leagueteams", league_teams(teams)),
+        (f"{base}/standings", standings(week, seed, teams)),
+        (f"{wk}/schedules", schedule(week, seed, teams)),
+    ]
+    for kind in ("passing", "rushing", "receiving", "defense", "kicking", "punting"):
+        out.append((f"{wk}/{kind}", player_stats(kind, week, seed, teams)))
+    out.append((f"{wk}/teamstats", team_stats(week, seed, teams)))
+    for t, tid in enumerate(team_ids(teams)):
+        out.append((f"{base}/team/{tid}/roster",
+                    {"success": True, "rosterInfoList": roster_players(t, per_team, seed, teams)}))
+    out.append((f"{base}/freeagents/roster",
+                {"success": True, "rosterInfoList": roster_players(teams, free_agents, seed, teams)}))
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--out", required=True, help="directory to write <n>_<subpath>.json files to")
+    ap.add_argument("--week", type=int, default=1)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--league", default=LEAGUE_ID)
+    args = ap.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    items = export(args.week, args.seed, args.league)
+    for i, (subpath, payload) in enumerate(items):
+        fn = f"{i:03d}_{subpath.replace('/', '_')}.json"
+        with open(os.path.join(args.out, fn), "w", encoding="utf-8") as f:
+            json.dump({"subpath": subpath, "payload": payload}, f)
+    print(f"💾 Wrote {len(items)} payloads to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,13 +3,15 @@ import json
 import re
 import platform
 
-# Define file paths
-DEBUG_FOLDER = "uploads"
+from services.capture_log import tail_capture
+
+# Views over the webhook capture log (uploads/_capture), newest webhooks only
+TAIL = int(os.getenv("VIEW_TAIL", "50"))
 DEBUG_FILES = {
-    "1": "webhook_debug.txt",
-    "2": "webhook_debug_league.txt",
-    "3": "webhook_debug_roster.txt",
-    "4": "webhook_debug_stats.txt"
+    "1": ("latest webhook", None, 1),
+    "2": ("league", "league", TAIL),
+    "3": ("roster", "roster", TAIL),
+    "4": ("stats", ("passing", "kicking", "rushing", "receiving", "defense"), TAIL),
 }
 
 def clear_terminal():
@@ -19,9 +21,9 @@ def clear_terminal():
         os.system('clear')
 
 def print_menu():
-    print("\nSelect a webhook debug file to view:")
-    for key, filename in DEBUG_FILES.items():
-        print(f"{key}. {filename}")
+    print("\nSelect captured webhooks to view:")
+    for key, (label, _, _) in DEBUG_FILES.items():
+        print(f"{key}. {label}")
     print("5. Exit")
 
 def try_pretty_json(line):
@@ -55,14 +57,30 @@ def view_from_line(lines, start_line):
         else:
             print(f"{idx + 1:>4}: {line.rstrip()}")
 
-def read_debug_file(filename):
-    path = os.path.join(DEBUG_FOLDER, filename)
-    if not os.path.exists(path):
-        print(f"\n❌ File not found: {path}\n")
-        return
+def capture_lines(match, n):
+    """Captured webhooks rendered in the old debug-file layout (body on one line)."""
+    records = tail_capture(n * 20 if match else n)
+    if match:
+        words = (match,) if isinstance(match, str) else match
+        records = [r for r in records if any(w in (r.get("subpath") or "") for w in words)][-n:]
+    lines = []
+    for r in records:
+        lines.append(f"===== NEW WEBHOOK: {r.get('subpath')} =====\n")
+        lines.append("HEADERS:\n")
+        lines.extend(f"{k}: {v}\n" for k, v in (r.get("headers") or {}).items())
+        lines.append("\n")
+        lines.append("BODY:\n")
+        lines.append((r.get("body") or "") + "\n")
+        lines.append("\n")
+    return lines
 
-    with open(path, "r", encoding="utf-8") as f:
-        lines = f.readlines()
+def read_debug_file(choice):
+    label, match, n = choice
+    lines = capture_lines(match, n)
+    if not lines:
+        print(f"\n❌ No captured {label} webhooks\n")
+        return
+    filename = label
 
     # Show dictionary-style JSON block titles
     print(f"\n📂 Titles found in {filename}:\n")